@@ -0,0 +1,119 @@
+"""
+Retrieval benchmark for rag_mcp: OpenAI text-embedding-ada-002 vs a local
+sentence-transformers model, with and without the query embedding cache.
+
+Splits a PDF (or a folder of PDFs) the way ingestion does, indexes the chunks
+once per backend in an in-memory Chroma client, then searches with sentences
+taken from random chunks: a chunk containing the sentence should come back.
+Reports recall@k, MRR, indexing time and per-query latency (embedding cold,
+embedding cached, Chroma search).
+
+    PYTHONPATH=./src/agentic_backend/mcp/servers python scripts/bench_rag_embeddings.py docs/policy.pdf \
+        [--backends openai,local] [--queries 100] [--k 5]
+"""
+import os
+import re
+import glob
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+import chromadb
+
+from rag_embeddings import QueryEmbeddingCache, build_embedder
+from rag_ingest import build_splitter, chunk_id, ingest, load_pdf_chunks
+
+SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def load_chunks(path: str) -> list:
+    paths = sorted(glob.glob(os.path.join(path, "*.pdf"))) if os.path.isdir(path) else [path]
+    splitter = build_splitter()
+    return [chunk for pdf in paths for chunk in load_pdf_chunks(pdf, splitter)]
+
+
+def make_queries(chunks: list, n: int, seed: int) -> list:
+    """(query, ids of chunks containing it): the longest sentence of random chunks."""
+    rng = random.Random(seed)
+    queries = []
+    for chunk in rng.sample(chunks, min(n, len(chunks))):
+        sentences = [s.strip() for s in SENTENCE.split(chunk["text"]) if len(s.split()) >= 6]
+        if not sentences:
+            continue
+        query = " ".join(max(sentences, key=len).split()[:40])
+        relevant = {chunk_id(c["text"], c["metadata"].get("source")) for c in chunks if query in " ".join(c["text"].split())}
+        queries.append((query, relevant))
+    return queries
+
+
+def ms(values: list, q: float) -> str:
+    values = sorted(values)
+    return f"{values[min(len(values) - 1, int(q * len(values)))] * 1000:8.1f}"
+
+
+def run(backend: str, chunks: list, queries: list, k: int) -> dict:
+    embedder = build_embedder(backend=backend)
+    client = chromadb.EphemeralClient()
+    name = f"bench_{backend}"
+    if name in [c.name for c in client.list_collections()]:
+        client.delete_collection(name)
+    collection = client.create_collection(name)
+
+    start = time.perf_counter()
+    ingest(collection, chunks, embedder)
+    index_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = QueryEmbeddingCache(os.path.join(tmp, "query_embeddings.sqlite"), max_entries=len(queries))
+        cold, cached, search, hits, reciprocal = [], [], [], 0, 0.0
+        for query, relevant in queries:
+            t0 = time.perf_counter()
+            vector = cache.embed_query(query, embedder)
+            t1 = time.perf_counter()
+            cache.embed_query(query, embedder)
+            t2 = time.perf_counter()
+            ids = collection.query(query_embeddings=[vector], n_results=k, include=[])["ids"][0]
+            t3 = time.perf_counter()
+            cold.append(t1 - t0)
+            cached.append(t2 - t1)
+            search.append(t3 - t2)
+            rank = next((i for i, id_ in enumerate(ids, 1) if id_ in relevant), None)
+            if rank:
+                hits += 1
+                reciprocal += 1 / rank
+    return {
+        "model": embedder.model,
+        "index_seconds": index_seconds,
+        "recall": hits / len(queries),
+        "mrr": reciprocal / len(queries),
+        "cold": cold,
+        "cached": cached,
+        "search": search,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="PDF file or folder of PDFs")
+    parser.add_argument("--backends", default="openai,local")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.path)
+    queries = make_queries(chunks, args.queries, args.seed)
+    print(f"{len(chunks)} chunks, {len(queries)} queries, k={args.k}")
+    print(f"{'backend':<8} {'model':<24} {'index s':>8} {'recall':>7} {'mrr':>6} "
+          f"{'embed p50/p95 ms':>18} {'cached p50 ms':>14} {'search p50 ms':>14}")
+    for backend in args.backends.split(","):
+        r = run(backend.strip(), chunks, queries, args.k)
+        print(f"{backend:<8} {r['model'][:24]:<24} {r['index_seconds']:8.1f} {r['recall']:7.1%} {r['mrr']:6.3f} "
+              f"{ms(r['cold'], 0.5)}/{ms(r['cold'], 0.95).strip():<9} {ms(r['cached'], 0.5):>14} "
+              f"{statistics.median(r['search']) * 1000:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Retrieval benchmark for rag_mcp: vector search vs BM25 vs hybrid (reciprocal
+rank fusion).
+
+Indexes a PDF (or a folder of PDFs) in an in-memory Chroma client and asks two
+kinds of questions whose answers are known from the chunks themselves:
+
+    sentence  a sentence taken from a random chunk (wording close to the text)
+    exact     an identifier found in the chunks: clause numbers such as 4.2.1
+              or tickers such as ETH-USD (what dense search tends to miss)
+
+Reports recall@k, MRR and search latency per mode (the query embedding is
+computed once per query and excluded), plus BM25 build and update time.
+
+    PYTHONPATH=./src/agentic_backend/mcp/servers python scripts/bench_rag_hybrid.py docs/policy.pdf \
+        [--backend openai] [--queries 100] [--k 5]
+"""
+import re
+import time
+import random
+import argparse
+
+import chromadb
+
+from bench_rag_embeddings import load_chunks, make_queries, ms
+from rag_embeddings import build_embedder
+from rag_hybrid import BM25Index, hybrid_search
+from rag_ingest import chunk_id, ingest
+
+IDENTIFIER = re.compile(r"\b(?:\d+(?:\.\d+){1,3}|[A-Z]{2,5}-[A-Z]{2,5}|[A-Z]{3,5})\b")
+
+
+def make_exact_queries(chunks: list, n: int, seed: int) -> list:
+    """(query, ids of chunks containing the identifier) for identifiers in few chunks."""
+    where = {}
+    for chunk in chunks:
+        key = chunk_id(chunk["text"], chunk["metadata"].get("source"))
+        for token in set(IDENTIFIER.findall(chunk["text"])):
+            where.setdefault(token, set()).add(key)
+    # Identifiers on most pages (headers, acronyms) say nothing about the chunk
+    rare = sorted(token for token, ids in where.items() if len(ids) <= 3)
+    rng = random.Random(seed)
+    return [(f"What does {token} say?", where[token]) for token in rng.sample(rare, min(n, len(rare)))]
+
+
+def evaluate(search, queries: list, vectors: list) -> dict:
+    latency, hits, reciprocal = [], 0, 0.0
+    for (query, relevant), vector in zip(queries, vectors):
+        start = time.perf_counter()
+        ids = search(query, vector)
+        latency.append(time.perf_counter() - start)
+        rank = next((i for i, id_ in enumerate(ids, 1) if id_ in relevant), None)
+        if rank:
+            hits += 1
+            reciprocal += 1 / rank
+    return {"recall": hits / len(queries), "mrr": reciprocal / len(queries), "latency": latency}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="PDF file or folder of PDFs")
+    parser.add_argument("--backend", default="openai")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.path)
+    embedder = build_embedder(backend=args.backend)
+    client = chromadb.EphemeralClient()
+    if "bench_hybrid" in [c.name for c in client.list_collections()]:
+        client.delete_collection("bench_hybrid")
+    collection = client.create_collection("bench_hybrid")
+    ingest(collection, chunks, embedder)
+
+    index = BM25Index()
+    start = time.perf_counter()
+    index.sync(collection)
+    build = time.perf_counter() - start
+    extra = {"text": "Benchmark update chunk about clause 99.9.", "metadata": {"source": "bench"}}
+    start = time.perf_counter()
+    index.add([chunk_id(extra["text"], "bench")], [extra["text"]])
+    index.remove([chunk_id(extra["text"], "bench")])
+    update = time.perf_counter() - start
+    print(f"{len(chunks)} chunks, model {embedder.model}, k={args.k}")
+    print(f"BM25 build {build * 1000:.1f} ms, incremental add+remove of one chunk {update * 1000:.2f} ms")
+
+    modes = {
+        "dense": lambda q, v: [r["id"] for r in hybrid_search(collection, None, q, v, args.k)],
+        "bm25": lambda q, v: [doc_id for doc_id, _ in index.search(q, args.k)],
+        "hybrid": lambda q, v: [r["id"] for r in hybrid_search(collection, index, q, v, args.k)],
+    }
+    query_sets = {
+        "sentence": make_queries(chunks, args.queries, args.seed),
+        "exact": make_exact_queries(chunks, args.queries, args.seed),
+    }
+    print(f"{'queries':<9} {'mode':<7} {'n':>4} {'recall':>7} {'mrr':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, queries in query_sets.items():
+        if not queries:
+            print(f"{name:<9} no queries (no identifiers found)")
+            continue
+        vectors = embedder.embed([query for query, _ in queries])
+        for mode, search in modes.items():
+            r = evaluate(search, queries, vectors)
+            print(f"{name:<9} {mode:<7} {len(queries):>4} {r['recall']:7.1%} {r['mrr']:6.3f} "
+                  f"{ms(r['latency'], 0.5)} {ms(r['latency'], 0.95)}")
+
+
+if __name__ == "__main__":
+    main()
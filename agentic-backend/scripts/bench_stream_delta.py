@@ -0,0 +1,75 @@
+"""
+Byte-count benchmark for /ws/chat streaming: full-state vs delta (JSON Patch) mode.
+
+Replays a synthetic six-hop conversation (supervisor -> agent -> supervisor ...)
+through the same message builder the endpoint uses and reports bytes per mode.
+
+    PYTHONPATH=./src python scripts/bench_stream_delta.py [--hops 6] [--output-chars 1500]
+"""
+import argparse
+import json
+
+from agentic_backend.api.streaming import build_stream_message
+from agentic_backend.models.state_models import SupervisorState, AgentState, SupervisorDecision
+from agentic_backend.utils.json_util import apply_json_patch
+
+AGENTS = ["finance_agent", "news_sentiment_agent", "trade_agent", "websearch_agent"]
+
+
+def simulate_chunks(hops: int, output_chars: int):
+    state = SupervisorState(user_query="Should I buy ETH right now?", user_detail="1")
+    for hop in range(hops):
+        agent = AGENTS[hop % len(AGENTS)]
+        state.decisions.append(SupervisorDecision(
+            step=hop + 1, selected_agent=agent, reasoning="r" * 200, task=f"task {hop}"
+        ))
+        state.current_task = f"task {hop}"
+        yield {"supervisor": state.model_dump(mode="json")}
+
+        agent_state = AgentState(
+            agent_name=agent,
+            agent_input=f"task {hop}",
+            tool_call_response_pair=[{"tool_name": "tool", "arguments": {}, "response": "x" * output_chars}],
+            agent_output="o" * output_chars,
+        )
+        state.agent_states.append(agent_state)
+        state.context[f"{agent}_step{hop + 1}"] = agent_state.agent_output
+        state.current_task = None
+        yield {agent: state.model_dump(mode="json")}
+
+    state.final_output = "f" * output_chars
+    yield {"supervisor": state.model_dump(mode="json")}
+
+
+def size(message: dict) -> int:
+    return len(json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hops", type=int, default=6)
+    parser.add_argument("--output-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    totals = {"full": 0, "delta": 0}
+    for mode in totals:
+        previous = None
+        client_state = None
+        for chunk in simulate_chunks(args.hops, args.output_chars):
+            message, previous = build_stream_message("bench", chunk, mode, previous)
+            totals[mode] += size(message)
+            # Check the client can rebuild the full state from the deltas
+            if message["type"] == "delta":
+                client_state = apply_json_patch(client_state, message["patch"])
+            else:
+                client_state = next(iter(message["state"].values()))
+            assert client_state == next(iter(chunk.values())), "delta reconstruction mismatch"
+
+    saved = 1 - totals["delta"] / totals["full"]
+    print(f"hops={args.hops} output_chars={args.output_chars}")
+    print(f"full : {totals['full']:>10,} bytes")
+    print(f"delta: {totals['delta']:>10,} bytes  ({saved:.1%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,43 @@
-from typing import List, Union
+from typing import Any, Dict, List, Union
 from langchain_core.messages.human import HumanMessage
 from langchain_core.messages.ai import AIMessage
 from langchain_core.messages.tool import ToolMessage
 from ..models.state_models import AgentState
 
 
+def summarize_tool_timing(messages) -> Dict[str, Any]:
+    """
+    Tool time per model turn ("round") from the timings TimedTool stamps on
+    ToolMessages: ``tool_seconds`` sums every call, ``wall_seconds`` sums the
+    first-start to last-finish span of each round. They differ only when a
+    round's calls ran concurrently.
+    """
+    rounds = []
+    for msg in messages:
+        if msg.__class__.__name__ == "AIMessage" and getattr(msg, "tool_calls", None):
+            rounds.append([])
+        elif msg.__class__.__name__ == "ToolMessage" and rounds:
+            timing = (getattr(msg, "response_metadata", None) or {}).get("tool_timing")
+            if timing:
+                rounds[-1].append(timing)
+
+    tool_seconds = 0.0
+    wall_seconds = 0.0
+    calls = 0
+    for timings in rounds:
+        if not timings:
+            continue
+        calls += len(timings)
+        tool_seconds += sum(t["seconds"] for t in timings)
+        wall_seconds += max(t["started"] + t["seconds"] for t in timings) - min(t["started"] for t in timings)
+    return {
+        "rounds": sum(1 for timings in rounds if timings),
+        "tool_calls": calls,
+        "tool_seconds": round(tool_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+
 def build_agent_state(messages: List[Union[HumanMessage, AIMessage, ToolMessage]], agent_name: str) -> AgentState:
     agent_input = ""
     tool_call_response_pair = []
@@ -31,6 +64,9 @@ def build_agent_state(messages: List[Union[HumanMessage, AIMessage, ToolMessage]
             if tool_call_id and tool_call_id in pending_tool_calls:
                 entry = pending_tool_calls[tool_call_id]
                 entry["response"] = getattr(msg, "content", "")
+                timing = (getattr(msg, "response_metadata", None) or {}).get("tool_timing")
+                if timing:
+                    entry["seconds"] = round(timing["seconds"], 3)
                 tool_call_response_pair.append(entry)
 
     return AgentState(
@@ -38,4 +74,5 @@ def build_agent_state(messages: List[Union[HumanMessage, AIMessage, ToolMessage]
         agent_input=agent_input,
         tool_call_response_pair=tool_call_response_pair,
         agent_output=agent_output,
+        tool_timing=summarize_tool_timing(messages),
     )
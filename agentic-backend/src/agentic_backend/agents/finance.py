@@ -1,9 +1,8 @@
 from ..models.state_models import SupervisorState
 from ..agents.base import build_agent_state
 # from ..tools.tool_wrappers import invoke_agent
-from ..mcp.clients import init_clients
+from ..agents.registry import register_agent, invoke_agent, parallel_tools_enabled
 
-from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
@@ -12,6 +11,7 @@ import os
 from langchain.chat_models import init_chat_model
 
 llm=init_chat_model("openai:gpt-4o")
+register_agent("finance_agent", llm, "financial_tools", parallel_tools=True)
 
 # Load available indicators from JSON
 def load_available_indicators():
@@ -34,6 +34,12 @@ async def financial_agent_node(state: SupervisorState) -> SupervisorState:
     indicators_list = ", ".join(AVAILABLE_INDICATORS[:30])  # Show first 30 for brevity
     indicators_note = f"Plus {len(AVAILABLE_INDICATORS) - 30} more..." if len(AVAILABLE_INDICATORS) > 30 else ""
 
+    # Independent lookups issued in the same turn run concurrently
+    if parallel_tools_enabled("finance_agent"):
+        tool_budget_rule = "Use at most 1–2 rounds of tool calls; request independent lookups (e.g. different symbols or intervals) together in one round."
+    else:
+        tool_budget_rule = "Use at most 1–2 tools per analysis."
+
 
     sysprompt_finance_agent = f"""
 <system_prompt>
@@ -55,10 +61,15 @@ async def financial_agent_node(state: SupervisorState) -> SupervisorState:
        - Available indicators: ({len(AVAILABLE_INDICATORS)} total)
          {indicators_list}
        - Note: {indicators_note}
+    2. get_indicators_bulk(indicators, symbol, interval)
+       - Function: Fetches several indicators for one symbol/interval in a single request.
+       - Input: indicators=[{{"endpoint": "rsi"}}, {{"endpoint": "macd"}}, {{"endpoint": "ema", "period": 50}}]
+       - Output: Per-indicator values with the same interpretation as get_indicator.
+       - Prefer this whenever you need more than one indicator for the same symbol and interval.
   </tools>
 
   <rules>
-    - Use at most 1–2 tools per analysis.
+    - {tool_budget_rule}
     - Avoid redundant calls; check if data already exists in context.
     - Each tool call consumes API credits — optimize for insight, not volume.
     - Focus on tools that yield the highest signal-to-noise ratio.
@@ -105,22 +116,12 @@ async def financial_agent_node(state: SupervisorState) -> SupervisorState:
   </reminder>
 </system_prompt>
 """
-    tools = await init_clients()
-    finance_tools=  tools["financial_tools"]
-    finance_agent = create_react_agent(
-        llm.bind_tools(finance_tools ,parallel_tool_calls=False),
-        tools=finance_tools,
-        prompt=sysprompt_finance_agent,
-        name="finance_agent",
-    )
     if not state.current_task:
         return state  # no task assigned, nothing to do
 
-    # Run the financial agent on the supervisor's current task
-    # Ensure your agent is the ReAct agent you created earlier
-    input = {"messages": [{"role": "user", "content": state.current_task}]}
+    # Run the cached financial agent on the supervisor's current task
     print("this is context ",state.context)
-    result = await finance_agent.ainvoke(input=input)
+    result = await invoke_agent("finance_agent", state.current_task, sysprompt_finance_agent)
     
     # Convert the messages from the agent into AgentState
     agent_state = build_agent_state(result["messages"], agent_name="finance_agent")
@@ -1,13 +1,13 @@
 from ..models.state_models import SupervisorState
 from ..agents.base import build_agent_state
 # from ..tools.tool_wrappers import invoke_agent
-from ..mcp.clients import init_clients
+from ..agents.registry import register_agent, invoke_agent
 from ..prompt import news_sentiment_prompt
-from langgraph.prebuilt import create_react_agent
 from langchain.chat_models import init_chat_model
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 llm=init_chat_model("openai:gpt-4o-mini")
+register_agent("news_sentiment_agent", llm, "sentiment_tools", parallel_tools=True)
 
 
 
@@ -61,21 +61,11 @@ async def news_sentiment_agent_node(state: SupervisorState) -> SupervisorState:
 </system_prompt>
 """
 
-    tools = await init_clients()
-    news_sentiment_tools= tools["sentiment_tools"]
-    sentiment_agent = create_react_agent(
-        llm.bind_tools(news_sentiment_tools ,parallel_tool_calls=False),
-        tools=news_sentiment_tools,
-        prompt=news_sentiment_prompt,
-        name="news_sentiment_agent",
-    )
     if not state.current_task:
         return state  # no task assigned, nothing to do
 
-    # Run the news sentiment agent on the supervisor's current task
-    # Ensure your agent is the ReAct agent you created earlier
-    input = {"messages": [{"role": "user", "content": state.current_task}]}
-    result = await sentiment_agent.ainvoke(input=input, context=state.context)
+    # Run the cached news sentiment agent on the supervisor's current task
+    result = await invoke_agent("news_sentiment_agent", state.current_task, news_sentiment_prompt, context=state.context)
     
     # Convert the messages from the agent into AgentState
     agent_state = build_agent_state(result["messages"], agent_name="news_sentiment_agent")
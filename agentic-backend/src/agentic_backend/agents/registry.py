@@ -0,0 +1,209 @@
+import time
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import create_react_agent, ToolNode
+from langgraph.prebuilt.chat_agent_executor import AgentState as ReactAgentState
+from ..mcp.clients import get_tools
+from ..config import settings
+from .base import summarize_tool_timing
+
+
+class PromptedAgentState(ReactAgentState):
+    """ReAct agent state carrying the per-turn system prompt as runtime input."""
+    system_prompt: str
+
+
+def _runtime_prompt(state: PromptedAgentState):
+    return [SystemMessage(content=state.get("system_prompt", ""))] + list(state["messages"])
+
+
+# Semaphore of the agent run in progress; the tool calls it gathers inherit it
+_tool_slots: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("tool_slots", default=None)
+
+
+class TimedTool(BaseTool):
+    """
+    Agent tool wrapper that stamps each ToolMessage with its start time and
+    duration.
+
+    Tool calls from one model turn already run concurrently (ToolNode gathers
+    them); the semaphore invoke_agent() sets for the run bounds how many reach
+    the MCP servers at once. The bound is per run: the compiled graph is shared
+    by every request, so a graph-wide semaphore would serialize unrelated chat
+    sessions. Rate limits are still enforced server side by the shared TAAPI
+    token bucket.
+    """
+
+    tool: BaseTool
+
+    def __init__(self, tool: BaseTool):
+        super().__init__(
+            tool=tool,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            response_format=tool.response_format,
+        )
+
+    def _run(self, *args, **kwargs):
+        raise NotImplementedError("TimedTool delegates invoke()/ainvoke() to the wrapped tool")
+
+    def invoke(self, input, config=None, **kwargs):
+        start = time.perf_counter()
+        output = self.tool.invoke(input, config, **kwargs)
+        return self._stamp(output, start, time.perf_counter() - start)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        semaphore = _tool_slots.get()
+        async with semaphore or contextlib.nullcontext():
+            start = time.perf_counter()
+            output = await self.tool.ainvoke(input, config, **kwargs)
+            seconds = time.perf_counter() - start
+        return self._stamp(output, start, seconds)
+
+    @staticmethod
+    def _stamp(output, start: float, seconds: float):
+        if isinstance(output, ToolMessage):
+            output.response_metadata["tool_timing"] = {"started": start, "seconds": seconds}
+        return output
+
+
+# agent name → (llm, MCP tool-set key, parallel tools allowed); filled by the agent modules at import
+_specs: Dict[str, Tuple[Any, str, bool]] = {}
+# agent name → compiled ReAct graph
+_agents: Dict[str, Any] = {}
+# agent name → lock held while compiling, so concurrent first uses compile once
+_build_locks: Dict[str, asyncio.Lock] = {}
+_metrics: Dict[str, Dict[str, float]] = {}
+
+
+def register_agent(name: str, llm, tools_key: str, parallel_tools: bool = False):
+    """
+    Declare an agent so build_agents() can compile it once at startup.
+
+    ``parallel_tools`` marks an agent whose tools are independent lookups; it
+    only takes effect when AGENT_PARALLEL_TOOL_CALLS is enabled.
+    """
+    _specs[name] = (llm, tools_key, parallel_tools)
+    _metrics.setdefault(name, {
+        "builds": 0,
+        "build_seconds": 0.0,
+        "invocations": 0,
+        "inference_seconds": 0.0,
+        "tool_calls": 0,
+        "tool_rounds": 0,
+        "tool_seconds": 0.0,
+        "tool_wall_seconds": 0.0,
+    })
+
+
+def parallel_tools_enabled(name: str) -> bool:
+    """Whether the agent's model may request several tool calls per turn."""
+    spec = _specs.get(name)
+    return bool(spec and spec[2] and settings.AGENT_PARALLEL_TOOL_CALLS)
+
+
+async def get_agent(name: str):
+    """Return the compiled ReAct graph for an agent, compiling it on first use."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+
+    if name not in _specs:
+        raise ValueError(f"Unknown agent '{name}', expected one of {list(_specs)}")
+    async with _build_locks.setdefault(name, asyncio.Lock()):
+        agent = _agents.get(name)
+        if agent is not None:
+            return agent
+
+        llm, tools_key, _ = _specs[name]
+        tools = await get_tools(tools_key)
+        parallel = parallel_tools_enabled(name)
+
+        start = time.perf_counter()
+        agent = create_react_agent(
+            llm.bind_tools(tools, parallel_tool_calls=parallel),
+            tools=ToolNode([TimedTool(tool) for tool in tools]),
+            prompt=_runtime_prompt,
+            state_schema=PromptedAgentState,
+            name=name,
+        )
+        m = _metrics[name]
+        m["builds"] += 1
+        m["build_seconds"] += time.perf_counter() - start
+
+        _agents[name] = agent
+        return agent
+
+
+async def build_agents() -> Dict[str, str]:
+    """
+    Compile every registered agent. Called from main.lifespan.
+
+    An agent whose MCP server is down or slow must not abort startup: the
+    failure is logged and get_agent() compiles it on first use, once the pool
+    has restarted the server. Returns agent name → error for the failures.
+    """
+    names = list(_specs)
+    results = await asyncio.gather(*(get_agent(name) for name in names), return_exceptions=True)
+    failed = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"[agents] {name} not compiled at startup, will retry on first use: {result!r}")
+            failed[name] = repr(result)
+    return failed
+
+
+async def invoke_agent(name: str, task: str, system_prompt: str, context: Optional[Dict[str, Any]] = None):
+    """Run a cached agent on one task with this turn's system prompt."""
+    agent = await get_agent(name)
+    agent_input = {
+        "messages": [{"role": "user", "content": task}],
+        "system_prompt": system_prompt,
+    }
+
+    limit = settings.AGENT_TOOL_CONCURRENCY if parallel_tools_enabled(name) else 1
+    token = _tool_slots.set(asyncio.Semaphore(max(1, limit)))
+    start = time.perf_counter()
+    result = None
+    try:
+        result = await agent.ainvoke(input=agent_input, context=context)
+        return result
+    finally:
+        _tool_slots.reset(token)
+        m = _metrics[name]
+        m["invocations"] += 1
+        m["inference_seconds"] += time.perf_counter() - start
+        if result is not None:
+            timing = summarize_tool_timing(result["messages"])
+            m["tool_calls"] += timing["tool_calls"]
+            m["tool_rounds"] += timing["rounds"]
+            m["tool_seconds"] += timing["tool_seconds"]
+            m["tool_wall_seconds"] += timing["wall_seconds"]
+
+
+def agent_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Graph construction vs inference time per agent.
+
+    ``build_seconds_saved`` is what rebuilding the graph on every call (the old
+    behaviour) would have cost on top of the single compile.
+    ``tool_seconds_saved`` is the sum of tool durations minus the wall-clock
+    time spent in tool rounds, i.e. what running calls one by one would add.
+    """
+    out = {}
+    for name, m in _metrics.items():
+        avg_build = m["build_seconds"] / m["builds"] if m["builds"] else 0.0
+        out[name] = {
+            **m,
+            "avg_build_seconds": avg_build,
+            "avg_inference_seconds": m["inference_seconds"] / m["invocations"] if m["invocations"] else 0.0,
+            "build_seconds_saved": avg_build * max(m["invocations"] - m["builds"], 0),
+            "parallel_tool_calls": parallel_tools_enabled(name),
+            "tool_seconds_saved": max(m["tool_seconds"] - m["tool_wall_seconds"], 0.0),
+        }
+    return out
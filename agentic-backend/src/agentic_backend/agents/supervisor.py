@@ -7,10 +7,67 @@ from langchain.chat_models import init_chat_model
 llm=init_chat_model("openai:gpt-4o")
 from ..agents.finance import load_available_indicators
 AVAILABLE_INDICATOR= load_available_indicators()
+AGENT_NAMES = ["crypto_price_agent", "news_sentiment_agent", "websearch_agent", "trade_agent"]
+
+
+def agent_node_name(selected_agent: str) -> str:
+    """Map the supervisor's agent name (and its common variants) to a graph node, or "END"."""
+    sel = (selected_agent or "").lower().replace(" ", "_")
+    if sel in ("finance_agent", "financeagent", "finance", "crypto_price_agent", "cryptopriceagent", "crypto"):
+        return "finance_agent"
+    if sel in ("websearch_agent", "websearch", "websearchagent"):
+        return "websearch_agent"
+    if sel in ("sentiment_agent", "news_sentiment_agent", "sentimentagent", "newsentiment"):
+        return "sentiment_agent"
+    if sel in ("trade_agent", "tradeagent", "trade", "trading"):
+        return "trade_agent"
+    return "END"
+
+
+# Prompt pieces that differ between the sequential and the fan-out graph
+SEQUENTIAL_PRINCIPLE = "Never call multiple agents in parallel — handle one step at a time."
+PARALLEL_PRINCIPLE = (
+    "You may dispatch several agents in the same step when their tasks are independent "
+    "(e.g. price analysis and news sentiment). Never dispatch an agent whose task needs another "
+    "agent's output from the same step; trade_agent always runs alone, after the analysis it relies on."
+)
+SEQUENTIAL_SELECTION = f"If an agent is needed, select exactly one from:\n      {json.dumps(AGENT_NAMES + ['FINISH'])}."
+PARALLEL_SELECTION = (
+    f"If agents are needed, select every agent from {AGENT_NAMES} whose task can run now without "
+    "waiting for another agent, or FINISH."
+)
+SEQUENTIAL_FORMAT = """{
+        "selected_agent": "<agent_name or FINISH>",
+        "task": "<exact sub-query or instruction for that agent>",
+        "reasoning": "<brief reasoning behind your choice>"
+      }"""
+PARALLEL_FORMAT = """{
+        "dispatch": [
+          {"selected_agent": "<agent_name>", "task": "<exact sub-query or instruction for that agent>"}
+        ],
+        "reasoning": "<brief reasoning behind your choice>"
+      }
+      Use "dispatch": [] (or "selected_agent": "FINISH") to finish."""
+
+
 def supervisor_node(state: SupervisorState) -> SupervisorState:
     """Supervisor decides the next agent + task based on state so far."""
+    return _supervise(state, parallel=False)
+
+
+def fanout_supervisor_node(state: SupervisorState) -> SupervisorState:
+    """Supervisor for the fan-out graph: may pick several independent agents per step."""
+    return _supervise(state, parallel=True)
+
 
-    step = len(state.decisions) + 1
+def _supervise(state: SupervisorState, parallel: bool) -> SupervisorState:
+    step = len({d.step for d in state.decisions}) + 1
+
+    if parallel and state.deferred_tasks:
+        # A trade held back last step now has the analysis it was waiting for
+        deferred = state.deferred_tasks.pop(0)
+        return _dispatch(state, step, [{"selected_agent": deferred["agent"], "task": deferred["task"]}],
+                         f"Trade deferred until the analysis dispatched with it finished: {deferred['reasoning']}")
 
     system_prompt = f"""
 <system>
@@ -26,7 +83,7 @@ def supervisor_node(state: SupervisorState) -> SupervisorState:
   <core_principles>
     <principle>Focus on the user’s current intent above all else.</principle>
     <principle>Analyze the query semantically and contextually before deciding anything.</principle>
-    <principle>Never call multiple agents in parallel — handle one step at a time.</principle>
+    <principle>{PARALLEL_PRINCIPLE if parallel else SEQUENTIAL_PRINCIPLE}</principle>
     <principle>Always choose the minimal, most relevant agent to progress the task.</principle>
     <principle>Only forward a rewritten, minimal sub-query to agents — never the full original query.</principle>
     <principle>When possible, respond directly to the user using your own reasoning.</principle>
@@ -71,25 +128,20 @@ def supervisor_node(state: SupervisorState) -> SupervisorState:
       Check if you already have enough data to respond directly. If yes, do so — no agent needed.
     </step>
     <step number="3">
-      If an agent is needed, select exactly one from:
-      ["crypto_price_agent", "news_sentiment_agent", "websearch_agent", "trade_agent", "FINISH"].
+      {PARALLEL_SELECTION if parallel else SEQUENTIAL_SELECTION}
     </step>
     <step number="4">
-      Rewrite the query minimally for that agent (concise, actionable, context-aware).
+      Rewrite the query minimally for each chosen agent (concise, actionable, context-aware).
     </step>
     <step number="5">
-      Explain clearly why that agent and task were chosen.
+      Explain clearly why each agent and task were chosen.
     </step>
   </decision_process>
 
   <output_instructions>
     <format>
       Respond **strictly** in JSON as follows:
-      {{
-        "selected_agent": "<agent_name or FINISH>",
-        "task": "<exact sub-query or instruction for that agent>",
-        "reasoning": "<brief reasoning behind your choice>"
-      }}
+      {PARALLEL_FORMAT if parallel else SEQUENTIAL_FORMAT}
     </format>
   </output_instructions>
 </system>
@@ -116,21 +168,27 @@ def supervisor_node(state: SupervisorState) -> SupervisorState:
         json_str = raw_text[raw_text.find("{"): raw_text.rfind("}") + 1]
         parsed = json.loads(json_str)
 
-    selected_agent = parsed.get("selected_agent")
-    task = parsed.get("task")
     reasoning = parsed.get("reasoning")
-
-    # Ensure task is a string, not a dict or other type
-    if isinstance(task, dict):
-        task = json.dumps(task,default=str)
-    elif task is None:
-        task = ""
+    if "dispatch" in parsed:
+        dispatch = [d for d in parsed.get("dispatch") or [] if d.get("selected_agent") not in (None, "FINISH")]
     else:
-        task = str(task)
+        dispatch = [parsed]
+    if not parallel:
+        dispatch = dispatch[:1]
+    elif len(dispatch) > 1:
+        # Trades depend on the analysis dispatched alongside them and run alone:
+        # keep them for the next steps, one trade per step
+        trades = [d for d in dispatch if agent_node_name(d.get("selected_agent")) == "trade_agent"]
+        if trades:
+            dispatch = [d for d in dispatch if d not in trades] or trades[:1]
+            state.deferred_tasks.extend(
+                {"agent": d.get("selected_agent"), "task": _task_text(d.get("task")), "reasoning": str(reasoning or "")}
+                for d in trades if d not in dispatch
+            )
 
     print(system_prompt)
     # handle FINISH
-    if selected_agent == "FINISH":
+    if not dispatch or dispatch[0].get("selected_agent") == "FINISH":
         # Generate comprehensive final response based on all collected context
         final_response_prompt = f"""
 Be precise and to the point .Convey all message and action in less words so that user can understand easily. You have agents who worked to fulfill your guidance.
@@ -182,15 +240,32 @@ Provide your final response as plain text (not JSON).
         state.current_task = None
         return state
 
-    # record decision
-    decision = SupervisorDecision(
-        step=step,
-        selected_agent=selected_agent,
-        reasoning=reasoning,
-        task=task
-    )
-    state.decisions.append(decision)
-    state.current_task = task
+    return _dispatch(state, step, dispatch, reasoning)
+
+
+def _task_text(task) -> str:
+    # Ensure task is a string, not a dict or other type
+    if isinstance(task, dict):
+        return json.dumps(task, default=str)
+    if task is None:
+        return ""
+    return str(task)
+
+
+def _dispatch(state: SupervisorState, step: int, dispatch: list, reasoning) -> SupervisorState:
+    """Record one decision per dispatched agent, all with the same step."""
+    state.pending_tasks = []
+    for d in dispatch:
+        task = _task_text(d.get("task"))
+        decision = SupervisorDecision(
+            step=step,
+            selected_agent=d.get("selected_agent"),
+            reasoning=reasoning,
+            task=task
+        )
+        state.decisions.append(decision)
+        state.pending_tasks.append({"agent": decision.selected_agent, "task": task})
+    state.current_task = state.pending_tasks[0]["task"]
 
     return state
 
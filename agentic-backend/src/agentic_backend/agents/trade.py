@@ -1,7 +1,6 @@
 from ..models.state_models import SupervisorState, TradeExecution, TradeType
 from ..agents.base import build_agent_state
-from ..mcp.clients import init_clients
-from langgraph.prebuilt import create_react_agent
+from ..agents.registry import register_agent, invoke_agent
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
@@ -10,6 +9,7 @@ from ..api.users import get_user
 import json
 
 llm = init_chat_model("openai:gpt-4o")
+register_agent("trade_agent", llm, "trade_tools")
 
 
 async def trade_agent_node(state: SupervisorState) -> SupervisorState:
@@ -95,25 +95,13 @@ async def trade_agent_node(state: SupervisorState) -> SupervisorState:
 </system_prompt>
 """
 
-    
-    tools = await init_clients()
-    trade_tools = tools["trade_tools"]
-
-    trade_agent = create_react_agent(
-        llm.bind_tools(trade_tools, parallel_tool_calls=False),
-        tools=trade_tools,
-        prompt=sysprompt_trade_agent,
-        name="trade_agent",
-    )
-
     if not state.current_task:
         return state  # no task assigned, nothing to do
 
-    # Run the trade agent on the supervisor's current task
-    input_msg = {"messages": [{"role": "user", "content": state.current_task}]}
+    # Run the cached trade agent on the supervisor's current task
     print("Trade Agent Task:", state.current_task)
 
-    result = await trade_agent.ainvoke(input=input_msg)
+    result = await invoke_agent("trade_agent", state.current_task, sysprompt_trade_agent)
 
     # Convert the messages from the agent into AgentState
     agent_state = build_agent_state(result["messages"], agent_name="trade_agent")
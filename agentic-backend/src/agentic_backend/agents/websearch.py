@@ -1,9 +1,8 @@
 from ..models.state_models import SupervisorState
 from ..agents.base import build_agent_state
 # from ..tools.tool_wrappers import invoke_agent
-from ..mcp.clients import init_clients
+from ..agents.registry import register_agent, invoke_agent
 
-from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
@@ -11,6 +10,7 @@ load_dotenv(find_dotenv())
 from langchain.chat_models import init_chat_model
 
 llm=init_chat_model("openai:gpt-4o-mini")
+register_agent("websearch_agent", llm, "web_search_tools", parallel_tools=True)
 
 async def websearch_agent_node(state: SupervisorState) -> SupervisorState:
     """Run the web search agent with the current task and update state."""
@@ -31,23 +31,11 @@ Guidelines:
 
 Your goal: Deliver accurate, detailed, and useful search results from the web.
 """
-    tools = await init_clients()
-    web_search_tools=  tools["web_search_tools"]
-    websearch_agent = create_react_agent(
-        llm.bind_tools(web_search_tools, parallel_tool_calls=False),
-        tools=web_search_tools,
-        prompt=sysprompt_web_search,
-        name="websearch_agent",
-    )
     if not state.current_task:
         return state  # no task assigned
 
-    # Run the web search agent
-    # Ensure your agent is the ReAct agent created earlier
-    input= {
-        "messages": [{"role": "user", "content": state.current_task}]
-    }
-    result = await websearch_agent.ainvoke(input=input, context=state.context)
+    # Run the cached web search agent
+    result = await invoke_agent("websearch_agent", state.current_task, sysprompt_web_search, context=state.context)
 
     # Convert messages to structured AgentState
     agent_state = build_agent_state(result["messages"],agent_name="websearch_agent")
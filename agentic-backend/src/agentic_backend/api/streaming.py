@@ -0,0 +1,33 @@
+import json
+from fastapi import WebSocket
+from ..utils.json_util import make_json_patch
+
+
+async def send_counted(websocket: WebSocket, message: dict) -> int:
+    """Send a JSON message (same wire format as send_json) and return its size in bytes."""
+    text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    await websocket.send_text(text)
+    return len(text.encode("utf-8"))
+
+
+def build_stream_message(thread_id: str, chunk_data: dict, stream_mode: str, previous_state):
+    """
+    Build the websocket message for one graph chunk.
+
+    ``full`` mode sends the whole chunk every step. ``delta`` mode sends the
+    first chunk in full, then only a JSON Patch (RFC 6902) of the state against
+    the previous chunk, plus the node that produced it.
+    """
+    # app.astream yields {node_name: state}
+    if isinstance(chunk_data, dict) and len(chunk_data) == 1:
+        node, state = next(iter(chunk_data.items()))
+    else:
+        node, state = None, chunk_data
+    if stream_mode != "delta" or previous_state is None or node is None:
+        return {"type": "chunk", "thread_id": thread_id, "state": chunk_data}, state
+    return {
+        "type": "delta",
+        "thread_id": thread_id,
+        "node": node,
+        "patch": make_json_patch(previous_state, state),
+    }, state
@@ -2,12 +2,20 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from uuid import uuid4
 from ..models.state_models import SupervisorState
 from ..services.orchestrator import run_sync
-from ..services.persistence import get_thread_memory, update_thread_memory
+from ..services.async_persistence import thread_store
+from .streaming import send_counted, build_stream_message
 from fastapi.encoders import jsonable_encoder
 from typing import List, Dict
 import asyncio
 from ..api.xample import EXAMPLE_STRATEGY_CODE1 ,EXAMPLE_STRATEGY_CODE2 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from ..config import settings
+from ..services.backtest_executor import BacktestExecutor
+from ..services.ohlcv_store import OHLCVStore
+from ..services.strategy_cache import StrategyCache
+from ..services.backtest_service import BacktestService
+from ..models.backtest_models import BacktestRequest, BacktestResponse, SweepRequest, SweepResponse
+from ..utils.sqlite_cache import read_stats
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -17,9 +25,6 @@ import os
 from datetime import datetime
 import ast
 from datetime import datetime
-import subprocess
-import tempfile
-import sys
 from openai import OpenAI
 from dotenv import load_dotenv,find_dotenv
 load_dotenv(find_dotenv())
@@ -78,11 +83,13 @@ async def chat_endpoint(websocket: WebSocket):
             thread_id = msg.get("thread_id", "default")
             user_id = msg.get("user_id", "User")
             user_message = msg.get("message", "")
+            # "full" (default) resends the whole state per chunk; "delta" sends JSON Patches
+            stream_mode = msg.get("stream_mode", "full")
             print(f"Received message for thread {thread_id}: {user_message}")
 
             # Load existing memory for this thread
             print("==========================================",type(thread_id),type(user_id))
-            memory = get_thread_memory(user_id, thread_id)
+            memory = await thread_store.get_thread_memory(user_id, thread_id)
             print("=============================================================",memory)
             # Create state with memory context
             incoming_state = SupervisorState(
@@ -95,8 +102,12 @@ async def chat_endpoint(websocket: WebSocket):
 
             # Track only the final state
             final_state = None
+            previous_state = None
+            bytes_sent = 0
             kwargs={
                 "user_id":user_id,
+                # fan-out supervisor: independent agents run in parallel
+                "fanout": bool(msg.get("fanout", settings.SUPERVISOR_FANOUT)),
             }
             try:
                 async for chunk in run_sync(incoming_state, thread_id=thread_id, **kwargs):
@@ -105,11 +116,8 @@ async def chat_endpoint(websocket: WebSocket):
                     # Keep updating final_state (last one will have everything)
                     final_state = chunk_data
 
-                    await websocket.send_json({
-                        "type": "chunk",
-                        "thread_id": thread_id,
-                        "state": chunk_data
-                    })
+                    message, previous_state = build_stream_message(thread_id, chunk_data, stream_mode, previous_state)
+                    bytes_sent += await send_counted(websocket, message)
 
             except asyncio.CancelledError:
                 print(f"WebSocket task cancelled for thread {thread_id}")
@@ -142,8 +150,8 @@ async def chat_endpoint(websocket: WebSocket):
                     "final_response": final_output or "Processing...",
                 }
 
-                # Update memory with summaries and raw conversation
-                update_thread_memory(
+                # Queue memory update (write-behind; flushed in batches off the event loop)
+                await thread_store.update_thread_memory(
                     user_id=user_id,
                     thread_id=thread_id,
                     request_summary=f"{user_message}",
@@ -155,7 +163,9 @@ async def chat_endpoint(websocket: WebSocket):
             try:
                 await websocket.send_json({
                     "type": "final",
-                    "thread_id": thread_id
+                    "thread_id": thread_id,
+                    "stream_mode": stream_mode,
+                    "bytes_sent": bytes_sent
                 })
             except Exception:
                 # WebSocket might already be closed
@@ -188,32 +198,62 @@ async def health_check():
     return {"status": "ok"}
 
 
-@router.get("/threads/{user_id}")
-async def get_user_thread_list(user_id: str):
-    """Get all thread IDs for a user with their request summaries and last updated timestamps."""
-    from ..services.persistence import get_user_threads, get_thread_memory
-    thread_ids = get_user_threads(user_id)
+@router.get("/metrics/agents")
+async def get_agent_metrics():
+    """Graph construction vs inference time for the cached ReAct agents, plus fan-out latency saved."""
+    from ..agents.registry import agent_metrics
+    from ..services.orchestrator import fanout_metrics
+    return {"agents": agent_metrics(), "fanout": fanout_metrics()}
+
+
+@router.get("/metrics/indicator-cache")
+async def get_indicator_cache_metrics():
+    """Hit/miss counters of the candle-aware TAAPI indicator cache (owned by the financial MCP server)."""
+    path = str(settings.cache_path("indicator_cache"))
+    return {"indicator_cache": await asyncio.to_thread(read_stats, path, settings.INDICATOR_CACHE_MAX_BYTES)}
+
 
-    # Build thread list with summaries and timestamps
-    threads = []
-    for thread_id in thread_ids:
-        memory = get_thread_memory(user_id, thread_id)
-        threads.append({
-            "thread_id": thread_id,
-            "request_summary": memory.get("request_summary", "") if memory else "",
-            "last_updated": memory.get("last_updated", "") if memory else ""
-        })
+@router.get("/metrics/article-cache")
+async def get_article_cache_metrics():
+    """Hits, 304 revalidations and syndicated duplicates of the news article cache (owned by the sentiment MCP server)."""
+    path = str(settings.cache_path("article_cache"))
+    return {"article_cache": await asyncio.to_thread(read_stats, path, settings.ARTICLE_CACHE_MAX_BYTES)}
 
-    # Sort by last_updated descending (most recent first)
-    threads.sort(key=lambda x: x["last_updated"], reverse=True)
 
-    return {"user_id": user_id, "threads": threads}
+@router.get("/metrics/persistence")
+async def get_persistence_metrics():
+    """Write-behind queue depth, batch sizes and backpressure of the thread store."""
+    return {"persistence": thread_store.metrics()}
+
+
+@router.get("/metrics/backtests")
+async def get_backtest_metrics():
+    """Running and queued backtests on the shared executor, plus the local OHLCV store."""
+    return await backtest_service.stats()
+
+
+@router.get("/threads/{user_id}")
+async def get_user_thread_list(
+    user_id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
+    """
+    List a user's threads (most recent first) with a request summary preview and
+    last updated timestamp. Pass ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    try:
+        page = await thread_store.list_user_threads(user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"user_id": user_id, "threads": page["threads"], "next_cursor": page["next_cursor"]}
 
 
 @router.get("/threads/{user_id}/{thread_id}")
 async def get_thread_history(user_id: str, thread_id: str):
     """Get conversation history for a specific thread."""
-    memory = get_thread_memory(user_id, thread_id)
+    memory = await thread_store.get_thread_memory(user_id, thread_id)
     if not memory:
         return {"error": "Thread not found"}
     return {
@@ -226,22 +266,20 @@ async def get_thread_history(user_id: str, thread_id: str):
 @router.delete("/threads/{user_id}/{thread_id}")
 async def delete_thread(user_id: str, thread_id: str):
     """Delete a conversation thread."""
-    from ..services.persistence import clear_thread_memory
-    clear_thread_memory(user_id, thread_id)
+    await thread_store.clear_thread_memory(user_id, thread_id)
     return {"status": "deleted", "user_id": user_id, "thread_id": thread_id}
 
 
 @router.get("/threads/{user_id}/{thread_id}/report")
 async def generate_thread_report(user_id: str, thread_id: str):
     """Generate a markdown report for a specific thread using LLM."""
-    from ..services.persistence import get_thread_memory
     from langchain.chat_models import init_chat_model
     from dotenv import load_dotenv, find_dotenv
 
     load_dotenv(find_dotenv())
 
     # Get conversation history
-    memory = get_thread_memory(user_id, thread_id)
+    memory = await thread_store.get_thread_memory(user_id, thread_id)
     if not memory:
         return {"error": "Thread not found"}
 
@@ -324,136 +362,42 @@ Generate the markdown report now:
 
 
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Pydantic models
-class BacktestRequest(BaseModel):
-    strategy_description: str = Field(..., description="Natural language description of the trading strategy")
-    ticker: str = Field(default="ETH-USD", description="Stock/crypto ticker symbol")
-    days: int = Field(default=365, ge=1, le=3650, description="Number of historical days to backtest")
-
-class BacktestResponse(BaseModel):
-    status: str
-    strategy_description: str
-    ticker: str
-    days: int
-    backtest_results: Optional[dict] = None
-    generated_code: Optional[str] = None
-    error: Optional[str] = None
-    execution_time: Optional[float] = None
-
-def generate_strategy_code(strategy_description: str, ticker: str = "ETH-USD", days: int = 365) -> str:
-    """Generate backtesting code using GPT-4 Mini"""
-    
-    prompt = f"""
-You are an expert quantitative trading developer. Generate production-ready Python backtesting code using the Backtrader framework.
-
-CRITICAL REQUIREMENTS:
-1. Use the EXACT structure, imports, and coding style from the reference example code provided.
-2. Generate ONLY valid, error-free Python code.
-3. Output ONLY the complete Python script with NO explanations, markdown, or extra text.
-4. Use ticker: {ticker}
-5. Use historical days: {days} and interval: 1d
-6. All indicators used must be configurable via strategy params.
-7. Strategy trading logic must generate multiple trades.
-8. Use notify_trade() or notify_order() to log closed trades.
-9. Use only cerebro.broker.setcommission(commission=0.001).
-10. Set starting cash to 10000.
-11. Add all standard analyzers: TradeAnalyzer, SharpeRatio, DrawDown, Returns, SQN, AvgHoldPeriod.
-12. Output JSON report with markers __JSON_REPORT_START__ and __JSON_REPORT_END__.
-13. NEVER use emoji characters (🚀, 📊, etc.) in print statements - use ASCII text only.
-14. Ensure all code is compatible with Windows cp1252 and UTF-8 encoding.
-
-REFERENCE EXAMPLES:
-Example 1:
-{EXAMPLE_STRATEGY_CODE1}
-
-Example 2:
-{EXAMPLE_STRATEGY_CODE2}
-
-USER STRATEGY:
-{strategy_description}
-
-Generate complete backtesting code now. Output ONLY the code.
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a professional Python developer specializing in quantitative trading. Generate only valid, executable code."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=4000
-        )
-        
-        generated_code = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if generated_code.startswith("```"):
-            generated_code = generated_code.split("```")[1]
-            if generated_code.startswith("python"):
-                generated_code = generated_code[6:]
-        if generated_code.endswith("```"):
-            generated_code = generated_code[:-3]
-        
-        return generated_code.strip()
-    
-    except Exception as e:
-        raise Exception(f"Error generating code with OpenAI: {str(e)}")
-
-
-def run_backtest_subprocess(generated_code: str) -> dict:
-    """Run backtest in subprocess and return results"""
-
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as tmp_file:
-        tmp_file.write(generated_code)
-        tmp_file_path = tmp_file.name
-
-    try:
-        result = subprocess.run(
-            [sys.executable, tmp_file_path],
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-
-        output = result.stdout
-        error_output = result.stderr
-        json_report = None
-        error_message = None
-
-        if "__JSON_REPORT_START__" in output and "__JSON_REPORT_END__" in output:
-            try:
-                json_str = output.split("__JSON_REPORT_START__")[1].split("__JSON_REPORT_END__")[0].strip()
-                json_report = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                error_message = f"JSON parse error: {str(e)}"
-
-        # If execution failed, capture stderr as error message
-        if result.returncode != 0 and error_output:
-            error_message = error_output.strip()
-
-        return {
-            "status": "success" if result.returncode == 0 and json_report else "error",
-            "backtest_results": json_report,
-            "stdout": output,
-            "stderr": error_output,
-            "return_code": result.returncode,
-            "error": error_message
-        }
-
-    except subprocess.TimeoutExpired:
-        return {"status": "timeout", "error": "Backtest execution timed out", "return_code": -1}
-    except Exception as e:
-        return {"status": "error", "error": str(e), "return_code": -1}
-    finally:
-        try:
-            os.unlink(tmp_file_path)
-        except:
-            pass
+# Backtest endpoints: the request handling is shared with api/main.py
+backtest_service = BacktestService(
+    client=OpenAI(api_key=os.getenv("OPENAI_API_KEY")),
+    model="gpt-4o",
+    # Shared backtest executor: bounded concurrency, FIFO queue, cancellation, rlimits,
+    # pre-warmed worker processes (started from main.lifespan)
+    backtest_executor=BacktestExecutor(
+        max_concurrency=settings.BACKTEST_MAX_CONCURRENCY,
+        timeout=settings.BACKTEST_TIMEOUT,
+        cpu_seconds=settings.BACKTEST_CPU_SECONDS,
+        memory_mb=settings.BACKTEST_MEMORY_MB,
+        warm_workers=settings.BACKTEST_WARM_WORKERS,
+        worker_max_jobs=settings.BACKTEST_WORKER_MAX_JOBS,
+        worker_max_rss_mb=settings.BACKTEST_WORKER_MAX_RSS_MB,
+    ),
+    # Separate pool for parameter sweeps so a sweep doesn't starve single backtests
+    sweep_executor=BacktestExecutor(
+        max_concurrency=settings.BACKTEST_SWEEP_CONCURRENCY,
+        timeout=settings.BACKTEST_TIMEOUT,
+        cpu_seconds=settings.BACKTEST_CPU_SECONDS,
+        memory_mb=settings.BACKTEST_MEMORY_MB,
+        warm_workers=settings.BACKTEST_WARM_WORKERS,
+        worker_max_jobs=settings.BACKTEST_WORKER_MAX_JOBS,
+        worker_max_rss_mb=settings.BACKTEST_WORKER_MAX_RSS_MB,
+    ),
+    # Candles shared by all backtests; scripts read them instead of calling yfinance
+    ohlcv_store=OHLCVStore(str(settings.RUN_SAVE_DIR / "ohlcv")),
+    # Generated code and reports of repeated requests (TTL + size-capped LRU)
+    strategy_cache=StrategyCache(
+        str(settings.cache_path("strategy_cache")),
+        max_bytes=settings.STRATEGY_CACHE_MAX_BYTES,
+        ttl=settings.STRATEGY_CACHE_TTL,
+    ),
+    sweep_max_combinations=settings.BACKTEST_SWEEP_MAX_COMBINATIONS,
+    progress_samples=settings.BACKTEST_PROGRESS_SAMPLES,
+)
 
 
 # REST API Endpoints
@@ -463,7 +407,8 @@ async def root():
         "message": "Trading Strategy Backtest API",
         "endpoints": {
             "POST /backtest": "Run a backtest (synchronous)",
-            "WebSocket /ws/backtest": "Run a backtest with live updates"
+            "POST /backtest/sweep": "Run a parameter sweep of one strategy (synchronous)",
+            "WebSocket /ws/backtest": "Run a backtest with live updates (\"mode\": \"sweep\" for parameter sweeps)"
         }
     }
 
@@ -473,41 +418,26 @@ async def backtest_strategy(request: BacktestRequest):
     """
     Synchronous backtest endpoint - returns results after completion
     """
-    start_time = datetime.now()
-    
     try:
-        # Generate code
-        generated_code = generate_strategy_code(
-            request.strategy_description,
-            request.ticker,
-            request.days
-        )
-        
-        # Run backtest
-        backtest_result = run_backtest_subprocess(generated_code)
-        
-        execution_time = (datetime.now() - start_time).total_seconds()
-        
-        # Prepare error message with detailed info
-        error_msg = backtest_result.get("error")
-        if not error_msg and backtest_result["status"] == "error":
-            stderr = backtest_result.get("stderr", "")
-            if stderr:
-                error_msg = f"Execution error: {stderr[:500]}"  # Limit error message length
-            else:
-                error_msg = "Backtest failed with unknown error"
-
-        return BacktestResponse(
-            status=backtest_result["status"],
-            strategy_description=request.strategy_description,
-            ticker=request.ticker,
-            days=request.days,
-            backtest_results=backtest_result.get("backtest_results"),
-            generated_code=generated_code,
-            error=error_msg,
-            execution_time=execution_time
-        )
-    
+        backtest_service.validate(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await backtest_service.backtest(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/backtest/sweep", response_model=SweepResponse)
+async def backtest_sweep(request: SweepRequest):
+    """
+    Run the strategy once per combination of ``param_grid`` in parallel and
+    return the runs ranked by ``rank_by``.
+    """
+    try:
+        return await backtest_service.sweep(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -519,100 +449,4 @@ async def websocket_backtest(websocket: WebSocket):
     WebSocket endpoint - streams code generation and backtest results
     """
     await websocket.accept()
-    
-    try:
-        # Receive backtest request
-        data = await websocket.receive_json()
-        
-        strategy_description = data.get("strategy_description")
-        ticker = data.get("ticker", "ETH-USD")
-        days = data.get("days", 365)
-        
-        if not strategy_description:
-            await websocket.send_json({
-                "type": "error",
-                "message": "strategy_description is required"
-            })
-            await websocket.close()
-            return
-        
-        # Send acknowledgment
-        await websocket.send_json({
-            "type": "status",
-            "message": "Generating strategy code...",
-            "progress": 10
-        })
-        
-        # Generate code
-        try:
-            generated_code = generate_strategy_code(strategy_description, ticker, days)
-            
-            # Send generated code
-            await websocket.send_json({
-                "type": "code_generated",
-                "message": "Strategy code generated successfully",
-                "progress": 40,
-                "data": {
-                    "generated_code": generated_code,
-                    "code_length": len(generated_code)
-                }
-            })
-            
-        except Exception as e:
-            await websocket.send_json({
-                "type": "error",
-                "message": f"Code generation failed: {str(e)}"
-            })
-            await websocket.close()
-            return
-        
-        # Send backtest starting message
-        await websocket.send_json({
-            "type": "status",
-            "message": "Running backtest...",
-            "progress": 60
-        })
-        
-        # Run backtest
-        try:
-            backtest_result = run_backtest_subprocess(generated_code)
-
-            # Send backtest results
-            message_text = "Backtest completed successfully" if backtest_result["status"] == "success" else f"Backtest failed: {backtest_result.get('error', 'Unknown error')}"
-            await websocket.send_json({
-                "type": "backtest_complete",
-                "message": message_text,
-                "progress": 100,
-                "data": {
-                    "status": backtest_result["status"],
-                    "strategy_description": strategy_description,
-                    "ticker": ticker,
-                    "days": days,
-                    "backtest_results": backtest_result.get("backtest_results"),
-                    "error": backtest_result.get("error"),
-                    "stderr": backtest_result.get("stderr") if backtest_result.get("stderr") else None,
-                    "return_code": backtest_result.get("return_code")
-                }
-            })
-            
-        except Exception as e:
-            await websocket.send_json({
-                "type": "error",
-                "message": f"Backtest execution failed: {str(e)}"
-            })
-        
-        # Keep connection open briefly then close
-        await asyncio.sleep(1)
-        await websocket.close()
-        
-    except WebSocketDisconnect:
-        print("Client disconnected")
-    except Exception as e:
-        try:
-            await websocket.send_json({
-                "type": "error",
-                "message": f"Unexpected error: {str(e)}"
-            })
-            await websocket.close()
-        except:
-            pass
\ No newline at end of file
+    await backtest_service.stream(websocket)
@@ -1,4 +1,5 @@
 # src/agentic_backend/config.py
+import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
 
@@ -13,10 +14,46 @@ class Settings(BaseSettings):
 
     # Persistence
     RUN_SAVE_DIR: Path = Path("runs")  # default folder
+    PERSISTENCE_QUEUE_SIZE: int = 1000  # queued writes before callers block
+    PERSISTENCE_BATCH_SIZE: int = 50
+    PERSISTENCE_FLUSH_INTERVAL: float = 0.05  # seconds to gather a batch
+
+    # SQLite caches under RUN_SAVE_DIR, filled by the MCP servers (see cache_path)
+    INDICATOR_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    ARTICLE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # article text + sentiment scores
+    ARTICLE_CACHE_FRESH: float = 60 * 60  # seconds an article is used without revalidation
+
+    # Backtest executor
+    BACKTEST_MAX_CONCURRENCY: int = 2
+    BACKTEST_TIMEOUT: float = 300  # wall-clock seconds per run
+    BACKTEST_CPU_SECONDS: int = 300  # RLIMIT_CPU per run
+    BACKTEST_MEMORY_MB: int = 2048  # RLIMIT_AS per run
+    BACKTEST_WARM_WORKERS: bool = True  # reuse pre-imported worker processes
+    BACKTEST_WORKER_MAX_JOBS: int = 20  # runs before a worker is replaced
+    BACKTEST_WORKER_MAX_RSS_MB: int = 1024  # replace a worker once its RSS grows past this
+    BACKTEST_PROGRESS_SAMPLES: int = 50  # equity samples streamed per live run
+    BACKTEST_SWEEP_CONCURRENCY: int = os.cpu_count() or 2  # parallel runs per parameter sweep pool
+    BACKTEST_SWEEP_MAX_COMBINATIONS: int = 64
+    STRATEGY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # generated code + reports
+    STRATEGY_CACHE_TTL: float = 7 * 24 * 60 * 60  # seconds
+
+    # Agents
+    AGENT_PARALLEL_TOOL_CALLS: bool = False  # let agents with independent tools issue several calls per turn
+    AGENT_TOOL_CONCURRENCY: int = 4  # tool calls in flight per agent turn
+    SUPERVISOR_FANOUT: bool = False  # let the supervisor dispatch independent agents in parallel
+
+    # MCP client pool
+    MCP_START_TIMEOUT: float = 30.0  # seconds to wait for a server subprocess
+    MCP_PING_TIMEOUT: float = 5.0
+    MCP_HEALTH_CHECK_INTERVAL: float = 30.0
 
     class Config:
         env_file = ".env"
         extra = "ignore"
 
+    def cache_path(self, name: str) -> Path:
+        """SQLite file of a cache: the MCP servers write it, the metrics endpoints read it."""
+        return self.RUN_SAVE_DIR / f"{name}.sqlite"
+
 settings = Settings()
 
@@ -4,8 +4,11 @@ from collections.abc import AsyncGenerator
 import asyncio
 from .config import settings
 # from .api.routes import router as api_router
-from .api.ws_routes import router as ws_router
+from .api.ws_routes import router as ws_router, backtest_service
 from .services.orchestrator import build_graph
+from .mcp.clients import mcp_pool
+from .agents.registry import build_agents
+from .services.async_persistence import thread_store
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -16,16 +19,31 @@ async def lifespan(app: FastAPI):
     # --- Startup logic ---
     print("Building graph...")
     try:
-        build_graph()
+        build_graph(settings.SUPERVISOR_FANOUT)
         print("Graph built at startup")
     except Exception as e:
         print(f"Error building graph: {e}")
         raise
 
+    print("Starting MCP client pool...")
+    await mcp_pool.start()
+    print(f"MCP client pool ready: {mcp_pool.stats()}")
+    failed = await build_agents()
+    print(f"Agent graphs compiled at startup ({len(failed)} deferred to first use)")
+    await thread_store.start()
+    # Spawn pre-warmed backtest workers (they import backtrader & co. in the background)
+    await backtest_service.start()
+
     yield   # Application runs here
 
     # --- Shutdown logic ---
     print("Shutting down gracefully...")
+    # Close MCP sessions before the blanket cancel below so subprocesses exit cleanly
+    await mcp_pool.close()
+    # Flush queued thread-memory writes
+    await thread_store.close()
+    # Stop backtest workers
+    await backtest_service.close()
     # Cancel any pending tasks
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
     for task in tasks:
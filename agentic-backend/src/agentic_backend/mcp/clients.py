@@ -1,70 +1,262 @@
 import os
+import asyncio
+from typing import Dict, List, Optional
+from langchain_core.tools import BaseTool
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from ..config import settings
 
 # Base directory → src/agentic_backend/mcp
 BASE_DIR = os.path.dirname(__file__)
 SERVERS_DIR = os.path.join(BASE_DIR, "servers")
+# src/, so the servers (run as scripts) can import agentic_backend modules
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(BASE_DIR)))
+# The stdio client only passes a few variables (PATH, HOME, ...) through; the
+# servers read their cache paths from settings, so hand them ours
+SERVER_ENV = {"PYTHONPATH": SRC_DIR, "RUN_SAVE_DIR": str(settings.RUN_SAVE_DIR)}
 
-async def init_clients():
-    financial_mcp_client = MultiServerMCPClient(
+# Tool-set key → MCP server connection. Keys match what agents ask for.
+SERVERS = {
+    "financial_tools": (
+        "Client Portfolio Server",
         {
-            "Client Portfolio Server": {
-                "command": "python",
-                "args": [os.path.join(SERVERS_DIR, "financial_mcp.py")],
-                "transport": "stdio",
-            }
-        }
-    )
-    financial_tools = await financial_mcp_client.get_tools()
-
-    web_search_mcp_client = MultiServerMCPClient(
+            "command": "python",
+            "args": [os.path.join(SERVERS_DIR, "financial_mcp.py")],
+            "transport": "stdio",
+            "env": SERVER_ENV,
+        },
+    ),
+    "web_search_tools": (
+        "Web Search Server",
         {
-            "Web Search Server": {
-                "command": "python",
-                "args": [os.path.join(SERVERS_DIR, "web_search_mcp.py")],
-                "transport": "stdio",
-            }
-        }
-    )
-    web_search_tools = await web_search_mcp_client.get_tools()
-
-    # rag_mcp_client = MultiServerMCPClient(
+            "command": "python",
+            "args": [os.path.join(SERVERS_DIR, "web_search_mcp.py")],
+            "transport": "stdio",
+            "env": SERVER_ENV,
+        },
+    ),
+    # "rag_tools": (
+    #     "RAG Server",
     #     {
-    #         "RAG Server": {
-    #             "command": "python",
-    #             "args": [os.path.join(SERVERS_DIR, "rag_mcp.py")],
-    #             "transport": "stdio",
-    #         }
-    #     }
-    # )
-    # rag_tools = await rag_mcp_client.get_tools()
-
-    news_sentiment_client = MultiServerMCPClient(
+    #         "command": "python",
+    #         "args": [os.path.join(SERVERS_DIR, "rag_mcp.py")],
+    #         "transport": "stdio",
+    #         "env": SERVER_ENV,
+    #     },
+    # ),
+    "sentiment_tools": (
+        "Sentiment Analysis Server",
         {
-            "Sentiment Analysis Server": {
-                "command": "python",
-                "args": [os.path.join(SERVERS_DIR, "news_sentiment_mcp.py")],
-                "transport": "stdio",
-            }
+            "command": "python",
+            "args": [os.path.join(SERVERS_DIR, "news_sentiment_mcp.py")],
+            "transport": "stdio",
+            "env": SERVER_ENV,
+        },
+    ),
+    "trade_tools": (
+        "Crypto Trade Server",
+        {
+            "command": "python",
+            "args": [os.path.join(SERVERS_DIR, "trade_mcp.py")],
+            "transport": "stdio",
+            "env": SERVER_ENV,
+        },
+    ),
+}
+
+
+class _PooledServer:
+    """
+    One warm stdio MCP server subprocess and its ClientSession.
+
+    The session is owned by a dedicated task so that its anyio cancel scopes
+    are entered and exited in the same task, which lets us restart it from
+    any request handler.
+    """
+
+    def __init__(self, key: str, server_name: str, connection: dict):
+        self.key = key
+        self.server_name = server_name
+        self.client = MultiServerMCPClient({server_name: connection})
+        self.session = None
+        self.tools: Optional[List[BaseTool]] = None
+        self.restarts = 0
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def _run(self):
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self._ready.set()
+                await self._stop.wait()
+        except BaseException as e:
+            self._error = e
+            if not isinstance(e, asyncio.CancelledError):
+                print(f"[MCP pool] {self.server_name} session ended: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def start(self):
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self._task = asyncio.create_task(self._run(), name=f"mcp-{self.key}")
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=settings.MCP_START_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise RuntimeError(f"MCP server '{self.server_name}' did not start within {settings.MCP_START_TIMEOUT}s")
+        if self.session is None:
+            raise RuntimeError(f"MCP server '{self.server_name}' failed to start: {self._error}")
+        print(f"[MCP pool] {self.server_name} started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=settings.MCP_START_TIMEOUT)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.session = None
+
+    async def ensure_running(self):
+        """Return a live session, (re)starting the subprocess if it has died."""
+        if self.alive:
+            return self.session
+        async with self._lock:
+            if not self.alive:
+                if self._task is not None:
+                    self.restarts += 1
+                    print(f"[MCP pool] restarting {self.server_name} (restart #{self.restarts})")
+                    await self.stop()
+                await self.start()
+        return self.session
+
+    async def ping(self) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=settings.MCP_PING_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def restart(self):
+        async with self._lock:
+            self.restarts += 1
+            print(f"[MCP pool] restarting {self.server_name} (restart #{self.restarts})")
+            await self.stop()
+            await self.start()
+
+
+class _SessionProxy:
+    """
+    Stand-in session handed to ``load_mcp_tools``. Tool calls are routed to
+    whichever session is currently live, so tools keep working after a restart.
+    """
+
+    def __init__(self, server: _PooledServer):
+        self._server = server
+
+    async def list_tools(self, *args, **kwargs):
+        session = await self._server.ensure_running()
+        return await session.list_tools(*args, **kwargs)
+
+    async def call_tool(self, *args, **kwargs):
+        session = await self._server.ensure_running()
+        return await session.call_tool(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._server.session, name)
+
+
+class MCPClientPool:
+    """Process-wide pool of warm MCP server sessions, one per tool set."""
+
+    def __init__(self, servers: Dict[str, tuple]):
+        self.servers = {
+            key: _PooledServer(key, server_name, connection)
+            for key, (server_name, connection) in servers.items()
         }
-    )
-    sentiment_tools = await news_sentiment_client.get_tools()
+        self._health_task: Optional[asyncio.Task] = None
+        self.started = False
 
-    trade_mcp_client = MultiServerMCPClient(
-        {
-            "Crypto Trade Server": {
-                "command": "python",
-                "args": [os.path.join(SERVERS_DIR, "trade_mcp.py")],
-                "transport": "stdio",
-            }
+    async def start(self):
+        if self.started:
+            return
+        results = await asyncio.gather(
+            *(s.start() for s in self.servers.values()), return_exceptions=True
+        )
+        for server, result in zip(self.servers.values(), results):
+            if isinstance(result, Exception):
+                # Leave it for ensure_running() to retry on first use
+                print(f"[MCP pool] {server.server_name} not available at startup: {result}")
+        self._health_task = asyncio.create_task(self._health_loop(), name="mcp-health")
+        self.started = True
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(settings.MCP_HEALTH_CHECK_INTERVAL)
+            for server in self.servers.values():
+                if server._task is None:
+                    continue
+                if not await server.ping():
+                    try:
+                        await server.restart()
+                    except Exception as e:
+                        print(f"[MCP pool] health check restart failed for {server.server_name}: {e}")
+
+    async def get_tools(self, key: str) -> List[BaseTool]:
+        """Return the LangChain tools for one tool set, e.g. ``"financial_tools"``."""
+        if key not in self.servers:
+            raise ValueError(f"Unknown MCP tool set '{key}', expected one of {list(self.servers)}")
+        if not self.started:
+            await self.start()
+        server = self.servers[key]
+        if server.tools is None:
+            server.tools = await load_mcp_tools(
+                _SessionProxy(server), server_name=server.server_name
+            )
+        return server.tools
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await asyncio.gather(
+            *(s.stop() for s in self.servers.values()), return_exceptions=True
+        )
+        self.started = False
+        print("[MCP pool] all sessions closed")
+
+    def stats(self) -> dict:
+        return {
+            key: {"alive": s.alive, "restarts": s.restarts}
+            for key, s in self.servers.items()
         }
-    )
-    trade_tools = await trade_mcp_client.get_tools()
-
-    return {
-        "financial_tools": financial_tools,
-        "web_search_tools": web_search_tools,
-        # "rag_tools": rag_tools,
-        "sentiment_tools": sentiment_tools,
-        "trade_tools": trade_tools,
-    }
+
+
+# Global singleton, started from main.lifespan
+mcp_pool = MCPClientPool(SERVERS)
+
+
+async def get_tools(key: str) -> List[BaseTool]:
+    return await mcp_pool.get_tools(key)
+
+
+async def init_clients():
+    """Return every tool set from the shared pool (kept for older callers)."""
+    return {key: await mcp_pool.get_tools(key) for key in mcp_pool.servers}
@@ -0,0 +1,125 @@
+"""
+URL-keyed cache of extracted article text for news_sentiment_mcp.py.
+
+The same Coindesk/Reuters URL tends to show up in many sentiment queries, so
+the text pulled out of the page is kept in a SQLite file under RUN_SAVE_DIR.
+Within ``fresh_seconds`` of the last fetch an entry is served as is; after
+that it is revalidated with a conditional GET (If-None-Match /
+If-Modified-Since) and a 304 only refreshes the timestamp. The total payload
+size is capped; least recently used entries are evicted first.
+
+``simhash`` / ``is_near_duplicate`` detect syndicated copies of one story
+published under different URLs, so they are only summarized once.
+
+Per-article sentiment scores are cached in a second table keyed by a hash of
+the article text (plus prompt version and model), so an article is scored by
+the LLM once no matter how many queries surface it. Both tables share the
+size cap.
+
+The file path, ARTICLE_CACHE_MAX_BYTES (payload size cap, default 16 MB) and
+ARTICLE_CACHE_FRESH (seconds an entry is used without revalidation, default
+3600) come from agentic_backend.config, like the API's metrics endpoint.
+
+Configure with env vars:
+    ARTICLE_DEDUP_DISTANCE    max differing simhash bits for a duplicate (default: 3)
+"""
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Any, Dict, Optional
+
+from agentic_backend.config import settings
+from agentic_backend.utils.sqlite_cache import SQLiteLRUCache
+
+SIMHASH_BITS = 64
+DEDUP_DISTANCE = int(os.getenv("ARTICLE_DEDUP_DISTANCE", 3))
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit simhash over word shingles; near-identical texts differ in few bits."""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle:
+        words = words + [""] * (shingle - len(words))
+    weights = [0] * SIMHASH_BITS
+    for i in range(len(words) - shingle + 1):
+        digest = hashlib.blake2b(" ".join(words[i:i + shingle]).encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def is_near_duplicate(a: int, b: int, distance: int = DEDUP_DISTANCE) -> bool:
+    return bin(a ^ b).count("1") <= distance
+
+
+class ArticleCache(SQLiteLRUCache):
+    TABLES = {"article_cache": "url", "article_scores": "key"}
+
+    def __init__(self, path: str, max_bytes: int, fresh_seconds: float):
+        super().__init__(path, max_bytes, [
+            "CREATE TABLE IF NOT EXISTS article_cache ("
+            " url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " size INTEGER NOT NULL, fetched_at REAL NOT NULL, last_access REAL NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS article_scores ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)",
+        ])
+        self.fresh_seconds = fresh_seconds
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached entry with a ``fresh`` flag, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM article_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE article_cache SET last_access = ? WHERE url = ?", (now, url))
+        text, etag, last_modified, fetched_at = row
+        return {
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": now - fetched_at < self.fresh_seconds,
+        }
+
+    def validators(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for a stale entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str):
+        """The origin answered 304: the cached text is current again."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE article_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+
+    def set(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self._put("article_cache", {
+            "url": url, "text": text, "etag": etag, "last_modified": last_modified,
+            "size": len(text.encode("utf-8")), "fetched_at": time.time(),
+        })
+
+    # ---------- per-article sentiment scores ----------
+
+    def get_score(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._get_json("article_scores", key, counter="score_")
+
+    def set_score(self, key: str, score: Dict[str, Any]):
+        payload = json.dumps(score, default=str)
+        self._put("article_scores", {"key": key, "value": payload, "size": len(payload)})
+
+
+article_cache = ArticleCache(
+    str(settings.cache_path("article_cache")),
+    settings.ARTICLE_CACHE_MAX_BYTES,
+    settings.ARTICLE_CACHE_FRESH,
+)
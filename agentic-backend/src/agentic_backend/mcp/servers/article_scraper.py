@@ -0,0 +1,188 @@
+"""
+Concurrent article scraping for news_sentiment_mcp.py.
+
+Articles are downloaded on a small thread pool through one requests.Session,
+so connections to the same host are reused. A per-domain semaphore keeps us
+from hammering a single site, and the whole batch shares one deadline: when it
+passes, whatever has been scraped is returned and the remaining articles are
+reported as timed out instead of holding up the tool call.
+
+Extracted text is kept in the article cache (article_cache.py): fresh entries
+skip the network, stale ones are revalidated with ETag/Last-Modified.
+
+Configure with env vars:
+    SCRAPE_DEADLINE      seconds for a whole batch (default: 12)
+    SCRAPE_TIMEOUT       connect/read timeout per request (default: 8)
+    SCRAPE_MAX_WORKERS   downloads in flight (default: 8)
+    SCRAPE_PER_DOMAIN    downloads in flight per host (default: 2)
+"""
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+import charset_normalizer
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from article_cache import ArticleCache, article_cache
+
+MAX_CHARS = 3000  # text kept per article
+MAX_BYTES = 2 * 1024 * 1024  # stop reading huge pages
+
+
+def extract_text(html: str, max_chars: int = MAX_CHARS) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    text = " ".join(p.get_text() for p in soup.find_all("p"))
+    return text[:max_chars]  # trim to avoid overload
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    """
+    Text of a downloaded body. Without a declared charset the encoding is
+    detected from the bytes themselves: the streamed response is consumed, so
+    ``Response.apparent_encoding`` can't be used.
+    """
+    if not encoding:
+        match = charset_normalizer.from_bytes(body).best()
+        encoding = match.encoding if match is not None else "utf-8"
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:  # unknown charset name in the header
+        return body.decode("utf-8", errors="replace")
+
+
+class ArticleScraper:
+    def __init__(self, max_workers: int, per_domain: int, timeout: float, deadline: float,
+                 cache: Optional[ArticleCache] = None):
+        self.cache = cache
+        self.timeout = timeout
+        self.deadline = deadline
+        self.per_domain = per_domain
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0"
+        adapter = HTTPAdapter(pool_connections=max(max_workers, 10), pool_maxsize=max(per_domain, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape")
+        self._domains: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            if domain not in self._domains:
+                self._domains[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._domains[domain]
+
+    def _download(self, url: str, ends_at: float, headers: Optional[Dict[str, str]] = None):
+        """
+        (response, body text) for ``url``, giving up at ``ends_at`` (time.monotonic).
+        The body is None when the server answers 304 Not Modified.
+        """
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("deadline passed before the request started")
+        with self.session.get(url, headers=headers, timeout=min(self.timeout, remaining), stream=True) as r:
+            if r.status_code == 304:
+                return r, None
+            r.raise_for_status()
+            chunks, size = [], 0
+            for chunk in r.iter_content(chunk_size=16384):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= MAX_BYTES:
+                    break
+                if time.monotonic() >= ends_at:
+                    raise TimeoutError("deadline passed while reading the response")
+            return r, decode_body(b"".join(chunks), r.encoding)
+
+    def _fetch(self, url: str, ends_at: float):
+        """(text, source) where source is "cache", "revalidated" or "network"."""
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None and entry["fresh"]:
+            self.cache.bump("hits")
+            return entry["text"], "cache"
+
+        slot = self._slot(url)
+        if not slot.acquire(timeout=max(ends_at - time.monotonic(), 0)):
+            raise TimeoutError(f"no free connection slot for {urlparse(url).netloc}")
+        try:
+            headers = self.cache.validators(entry) if self.cache is not None else None
+            response, html = self._download(url, ends_at, headers)
+        finally:
+            slot.release()
+
+        if html is None:
+            if entry is None:
+                raise requests.HTTPError(f"304 Not Modified without a cached copy for url: {url}")
+            self.cache.touch(url)
+            self.cache.bump("revalidated")
+            return entry["text"], "revalidated"
+
+        text = extract_text(html)
+        if self.cache is not None:
+            self.cache.bump("misses")
+            if text:
+                self.cache.set(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return text, "network"
+
+    def fetch(self, url: str, ends_at: Optional[float] = None) -> str:
+        """Extracted text of one article; raises on HTTP errors and timeouts."""
+        ends_at = ends_at if ends_at is not None else time.monotonic() + self.deadline
+        return self._fetch(url, ends_at)[0]
+
+    def _timed_fetch(self, url: str, ends_at: float) -> dict:
+        start = time.perf_counter()
+        source = None
+        try:
+            text, source = self._fetch(url, ends_at)
+            status, error = "ok", None
+        except (TimeoutError, requests.Timeout) as e:
+            text, status, error = "", "timeout", str(e)
+        except Exception as e:
+            text, status, error = "", "error", str(e)
+        return {"url": url, "status": status, "text": text, "error": error, "source": source,
+                "seconds": round(time.perf_counter() - start, 3)}
+
+    def scrape_many(self, urls: List[str], deadline: Optional[float] = None) -> List[dict]:
+        """
+        Scrape ``urls`` concurrently. Always returns one entry per url, in order:
+        {"url", "status": "ok" | "error" | "timeout", "text", "error", "source", "seconds"}.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        start = time.monotonic()
+        ends_at = start + deadline
+        futures = [self._pool.submit(self._timed_fetch, url, ends_at) for url in urls]
+        # Small grace period so requests that hit the deadline can report it themselves
+        wait(futures, timeout=deadline + 0.5)
+
+        results = []
+        for url, future in zip(urls, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append({"url": url, "status": "timeout", "text": "", "source": None,
+                                "error": f"not scraped within {deadline:.1f}s",
+                                "seconds": round(time.monotonic() - start, 3)})
+        ok = sum(1 for r in results if r["status"] == "ok")
+        print(f"[scraper] {ok}/{len(urls)} articles in {time.monotonic() - start:.2f}s", file=sys.stderr, flush=True)
+        return results
+
+
+def build_scraper() -> ArticleScraper:
+    return ArticleScraper(
+        max_workers=int(os.getenv("SCRAPE_MAX_WORKERS", 8)),
+        per_domain=int(os.getenv("SCRAPE_PER_DOMAIN", 2)),
+        timeout=float(os.getenv("SCRAPE_TIMEOUT", 8)),
+        deadline=float(os.getenv("SCRAPE_DEADLINE", 12)),
+        cache=article_cache,
+    )
+
+
+article_scraper = build_scraper()
@@ -1,7 +1,6 @@
 from mcp.server.fastmcp import FastMCP
 import httpx
 import os
-import time
 import json
 
 # TAAPI_SECRET = os.getenv("TAAPI_SECRET")  # store securely in .env
@@ -11,8 +10,12 @@ load_dotenv(find_dotenv())
 TAAPI_SECRET = os.getenv("TAAPI_KEY")
 mcp = FastMCP("Financial MCP Server")
 
-# Rate limiting: 17 second delay between API calls
-RATE_LIMIT_DELAY = 17
+# Rate limiting: token bucket shared with trade_mcp.py (see taapi_limiter.py)
+from taapi_limiter import taapi_limiter
+# Indicator results are cached until the next candle close (see indicator_cache.py)
+from indicator_cache import indicator_cache, make_key
+# Blocking tools run on a thread so concurrent calls overlap (see threaded_tool.py)
+from threaded_tool import threaded
 
 # Load Indicator Metadata from JSON file
 def load_indicator_metadata():
@@ -32,7 +35,29 @@ def load_indicator_metadata():
         return {}
 
 INDICATOR_METADATA = load_indicator_metadata()
+
+# Max indicator calculations TAAPI accepts in one bulk construct (plan dependent)
+BULK_MAX_INDICATORS = int(os.getenv("TAAPI_BULK_MAX_INDICATORS", 20))
+
+
+def build_interpretation(endpoint: str, metadata: dict, symbol: str, interval: str, results: int) -> str:
+    """Build the LLM-ready interpretation string for an indicator from its metadata."""
+    interpretation_parts = [
+        f"Indicator: {metadata['name']} ({endpoint})",
+        f"Category: {metadata['category']}",
+        f"Symbol: {symbol} | Interval: {interval} | Results: {results} candles",
+        f"\nDescription: {metadata['description']}",
+        f"\nSignal Meaning: {metadata['signal']}",
+        f"\nBenefits: {', '.join(metadata['benefits'])}",
+        f"\nTimeframe Reliability: {metadata['timeframe']}",
+        f"Risk Level: {metadata['risk_level']}",
+        f"Use Case: {metadata['use_case']}",
+        f"\nValue Inference Guide:\n" + "\n".join([f"  • {k}: {v}" for k, v in metadata['inference'].items()])
+    ]
+    return "\n".join(interpretation_parts)
+
 @mcp.tool()
+@threaded
 def get_indicator(
     endpoint: str,
     symbol: str = "BTC/USDT",
@@ -89,6 +114,8 @@ def get_indicator(
         - metadata: dict (indicator details - category, meaning, inference, benefits)
         - data: list or dict (actual indicator values for past X candles)
         - interpretation: str (LLM-ready interpretation of the data)
+        - queued_seconds: float (time spent waiting on the TAAPI rate limiter)
+        - cached: bool (served from the candle-aware cache)
 
     Examples:
     ─────────
@@ -105,9 +132,6 @@ def get_indicator(
     get_indicator("morningstar", symbol="BTC/USDT", interval="1d", results=20)
     """
 
-    # Rate limiting: wait before API call
-    time.sleep(RATE_LIMIT_DELAY)
-
     # Validate endpoint is not empty
     if not endpoint or not isinstance(endpoint, str):
         return {
@@ -157,31 +181,32 @@ def get_indicator(
         if value is not None:
             params[key] = value
 
+    # Serve from cache while the current candle is still open
+    cache_key = make_key(endpoint_lower, symbol, interval, exchange, params)
+    cached = indicator_cache.get(cache_key)
+    if cached is not None:
+        return {
+            "data": cached,
+            "queued_seconds": 0.0,
+            "cached": True,
+        }
+
     try:
+        # Rate limiting: only waits when the TAAPI quota is used up
+        queued_seconds = taapi_limiter.acquire()
         with httpx.Client() as client:
             r = client.get(BASE_URL, params=params, timeout=30.0)
             r.raise_for_status()
             data = r.json()
+        indicator_cache.set(cache_key, data, interval)
 
         # Build interpretation string for LLM
-        interpretation_parts = [
-            f"Indicator: {metadata['name']} ({endpoint_lower})",
-            f"Category: {metadata['category']}",
-            f"Symbol: {symbol} | Interval: {interval} | Results: {results} candles",
-            f"\nDescription: {metadata['description']}",
-            f"\nSignal Meaning: {metadata['signal']}",
-            f"\nBenefits: {', '.join(metadata['benefits'])}",
-            f"\nTimeframe Reliability: {metadata['timeframe']}",
-            f"Risk Level: {metadata['risk_level']}",
-            f"Use Case: {metadata['use_case']}",
-            f"\nValue Inference Guide:\n" + "\n".join([f"  • {k}: {v}" for k, v in metadata['inference'].items()])
-        ]
-
-        interpretation = "\n".join(interpretation_parts)
+        interpretation = build_interpretation(endpoint_lower, metadata, symbol, interval, results)
 
         return {
             "data": data,
-            
+            "queued_seconds": round(queued_seconds, 3),
+            "cached": False,
         }
 
     except httpx.HTTPStatusError as e:
@@ -203,6 +228,139 @@ def get_indicator(
         }
 
 
+@mcp.tool()
+@threaded
+def get_indicators_bulk(
+    indicators: list[dict],
+    symbol: str = "BTC/USDT",
+    interval: str = "1d",
+    exchange: str = "binance",
+    chart: str = "candles",
+) -> dict:
+    """
+    Fetch several TAAPI indicators for the same symbol and interval in one bulk request.
+    Prefer this over repeated get_indicator calls (e.g. RSI + MACD + EMA together).
+
+    Parameters:
+    ───────────
+    indicators: list[dict] (Required)
+        Indicator specs. Each needs "endpoint" and may set "results", "backtrack"
+        and any endpoint-specific parameter (e.g. "period").
+        Example: [{"endpoint": "rsi"}, {"endpoint": "macd"}, {"endpoint": "ema", "period": 50}]
+    symbol: str
+        Trading pair (e.g., 'BTC/USDT'). Default: 'BTC/USDT'
+    interval: str
+        Timeframe: 1m, 5m, 15m, 30m, 1h, 2h, 4h, 12h, 1d, 1w. Default: '1d'
+    exchange: str
+        Exchange name. Default: 'binance'
+    chart: str
+        'candles' or 'heikinashi'. Default: 'candles'
+
+    Returns:
+    ────────
+    dict containing:
+        - status: "success", "partial" or "error"
+        - symbol, interval, exchange
+        - results: list of {id, endpoint, status, data, interpretation, errors, cached}
+        - queued_seconds: float (time spent waiting on the TAAPI rate limiter)
+    """
+    if not indicators or not isinstance(indicators, list):
+        return {
+            "status": "error",
+            "message": "indicators must be a non-empty list of specs like {\"endpoint\": \"rsi\"}",
+        }
+
+    results = []
+    constructs = []
+    for i, spec in enumerate(indicators):
+        spec = dict(spec or {})
+        endpoint_lower = str(spec.pop("endpoint", spec.pop("indicator", ""))).lower().strip()
+        metadata = INDICATOR_METADATA.get(endpoint_lower)
+        spec_id = f"{i}_{endpoint_lower}"
+        if not metadata:
+            results.append({
+                "id": spec_id,
+                "endpoint": endpoint_lower,
+                "status": "error",
+                "errors": [f"Indicator '{endpoint_lower}' not found in indicators_full.json"],
+            })
+            continue
+        construct = {"id": spec_id, "indicator": endpoint_lower}
+        construct.update({k: v for k, v in spec.items() if v is not None})
+        constructs.append((construct, metadata))
+
+    def construct_key(construct):
+        params = {k: v for k, v in construct.items() if k not in ("id", "indicator")}
+        params["chart"] = chart
+        return make_key(construct["indicator"], symbol, interval, exchange, params)
+
+    queued_seconds = 0.0
+    by_id = {}
+    # Only send indicators whose current candle is not cached yet
+    to_fetch = []
+    for construct, metadata in constructs:
+        cached = indicator_cache.get(construct_key(construct))
+        if cached is not None:
+            by_id[construct["id"]] = {"result": cached, "errors": [], "cached": True}
+        else:
+            to_fetch.append((construct, metadata))
+    constructs_by_id = {c["id"]: c for c, _ in constructs}
+    # One bulk request (and one rate-limiter token) per chunk of indicators
+    for start in range(0, len(to_fetch), BULK_MAX_INDICATORS):
+        chunk = to_fetch[start:start + BULK_MAX_INDICATORS]
+        payload = {
+            "secret": TAAPI_SECRET,
+            "construct": {
+                "exchange": exchange,
+                "symbol": symbol,
+                "interval": interval,
+                "chart": chart,
+                "indicators": [c for c, _ in chunk],
+            },
+        }
+        try:
+            queued_seconds += taapi_limiter.acquire()
+            with httpx.Client() as client:
+                r = client.post("https://api.taapi.io/bulk", json=payload, timeout=30.0)
+                r.raise_for_status()
+                for item in r.json().get("data", []):
+                    by_id[item.get("id")] = item
+                    construct = constructs_by_id.get(item.get("id"))
+                    if construct is not None and not item.get("errors") and item.get("result") is not None:
+                        indicator_cache.set(construct_key(construct), item["result"], interval)
+        except Exception as e:
+            for c, _ in chunk:
+                by_id[c["id"]] = {"errors": [f"Bulk request failed: {e}"]}
+
+    for construct, metadata in constructs:
+        item = by_id.get(construct["id"], {"errors": ["No result returned by TAAPI"]})
+        errors = item.get("errors") or []
+        results.append({
+            "id": construct["id"],
+            "endpoint": construct["indicator"],
+            "status": "error" if errors else "success",
+            "data": item.get("result"),
+            "interpretation": build_interpretation(
+                construct["indicator"], metadata, symbol, interval, construct.get("results", 1)
+            ),
+            "errors": errors,
+            "cached": item.get("cached", False),
+        })
+
+    # Keep the caller's spec order
+    results.sort(key=lambda r: int(r["id"].split("_", 1)[0]))
+
+    failed = sum(1 for r in results if r["status"] == "error")
+    return {
+        "status": "success" if failed == 0 else ("error" if failed == len(results) else "partial"),
+        "symbol": symbol,
+        "interval": interval,
+        "exchange": exchange,
+        "results": results,
+        "queued_seconds": round(queued_seconds, 3),
+    }
+
+
 if __name__ == "__main__":
     print("[SERVER] Starting Financial MCP...", flush=True)
     mcp.run()
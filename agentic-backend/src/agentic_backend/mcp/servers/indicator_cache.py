@@ -0,0 +1,77 @@
+"""
+Candle-aware cache for TAAPI indicator results.
+
+An indicator value for a given (endpoint, symbol, interval, exchange, params)
+cannot change until the current candle closes, so entries expire at the next
+candle close for their interval. Entries live in a SQLite file under
+RUN_SAVE_DIR so they survive MCP server restarts and are shared between server
+processes. The total payload size is capped; least recently used entries are
+evicted first.
+
+The file path and INDICATOR_CACHE_MAX_BYTES (payload size cap, default 32 MB)
+come from agentic_backend.config, like the API's metrics endpoint.
+"""
+import json
+import time
+import hashlib
+from typing import Any, Optional
+
+from agentic_backend.config import settings
+from agentic_backend.utils.sqlite_cache import SQLiteLRUCache
+
+# Interval → candle length in seconds
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "12h": 12 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+}
+# Exchange weeks open on Monday 00:00 UTC; the Unix epoch was a Thursday.
+WEEK_OFFSET = 4 * 24 * 60 * 60
+
+
+def next_candle_close(interval: str, now: Optional[float] = None) -> Optional[float]:
+    """Unix time at which the candle open at ``now`` closes, or None for unknown intervals."""
+    length = INTERVAL_SECONDS.get(interval)
+    if length is None:
+        return None
+    now = time.time() if now is None else now
+    offset = WEEK_OFFSET if interval == "1w" else 0
+    return ((now - offset) // length + 1) * length + offset
+
+
+def make_key(endpoint: str, symbol: str, interval: str, exchange: str, params: dict) -> str:
+    params = {k: v for k, v in params.items() if k != "secret"}
+    raw = json.dumps([endpoint, symbol, interval, exchange, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IndicatorCache(SQLiteLRUCache):
+    TABLES = {"indicator_cache": "key"}
+    EXPIRING = ("indicator_cache",)
+
+    def __init__(self, path: str, max_bytes: int):
+        super().__init__(path, max_bytes, [
+            "CREATE TABLE IF NOT EXISTS indicator_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        ])
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._get_json("indicator_cache", key)
+
+    def set(self, key: str, value: Any, interval: str):
+        expires_at = next_candle_close(interval)
+        if expires_at is None:
+            return
+        payload = json.dumps(value, default=str)
+        self._put("indicator_cache", {"key": key, "value": payload, "size": len(payload), "expires_at": expires_at})
+
+
+indicator_cache = IndicatorCache(str(settings.cache_path("indicator_cache")), settings.INDICATOR_CACHE_MAX_BYTES)
@@ -2,11 +2,11 @@ import os
 # import dotenv
 import requests
 import json
-from bs4 import BeautifulSoup
 from fastmcp import FastMCP
 from dotenv import load_dotenv, find_dotenv
 from langchain_openai import ChatOpenAI
 import sys
+import functools
 import importlib.util
 # Pass the absolute path of the prompt module
 prompt_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "prompt.py")
@@ -14,6 +14,14 @@ spec = importlib.util.spec_from_file_location("prompt", prompt_path)
 prompt_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(prompt_module)
 sentiment_prompt = prompt_module.sentiment_prompt
+article_sentiment_prompt = prompt_module.article_sentiment_prompt
+
+# Articles are scraped concurrently under one deadline (see article_scraper.py)
+from article_scraper import article_scraper
+# Syndicated copies of one story are summarized once (see article_cache.py)
+from article_cache import article_cache, simhash, is_near_duplicate
+# Articles are scored once and cached; query results are aggregated (see sentiment_aggregate.py)
+from sentiment_aggregate import score_key, parse_json, normalize_score, aggregate_scores
 
 load_dotenv(find_dotenv())
 
@@ -21,17 +29,51 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your_openai_api_key_here")
 SERPER_API_KEY = os.getenv("SERPAPI_API_KEY", "your_api_key_here")
 # print(f"Using SERPER_API_KEY: {OPENAI_API_KEY}")
 
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "gpt-4o-mini")
+SENTIMENT_CONCURRENCY = int(os.getenv("SENTIMENT_CONCURRENCY", 5))
+
 app = FastMCP("market-sentiment-mcp")
 
 
+@functools.lru_cache(maxsize=1)
+def get_sentiment_model() -> ChatOpenAI:
+    """One client (and HTTP connection pool) for every call."""
+    return ChatOpenAI(model=SENTIMENT_MODEL, temperature=0.3)
+
+
+def score_articles(articles: list) -> tuple:
+    """
+    Map step: sentiment score per {"title", "text"} article, scoring only the
+    ones not cached yet (concurrently). Returns (scores, cached flags, LLM calls);
+    a score is None when the model reply could not be used.
+    """
+    keys = [score_key(a["text"], SENTIMENT_MODEL) for a in articles]
+    scores = [article_cache.get_score(key) for key in keys]
+    cached = [score is not None for score in scores]
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        replies = get_sentiment_model().batch(
+            [[{"role": "user", "content": article_sentiment_prompt(articles[i]["title"], articles[i]["text"])}] for i in missing],
+            config={"max_concurrency": SENTIMENT_CONCURRENCY},
+            return_exceptions=True,
+        )
+        for i, reply in zip(missing, replies):
+            try:
+                if isinstance(reply, Exception):
+                    raise reply
+                score = normalize_score(parse_json(reply.content))
+            except Exception as e:
+                print(f"[sentiment] could not score {articles[i]['title']!r}: {e}", file=sys.stderr, flush=True)
+                continue
+            article_cache.set_score(keys[i], score)
+            scores[i] = score
+    return scores, cached, len(missing)
+
+
 def scrape_article(url: str) -> str:
     """Scrape text content from a news article."""
     try:
-        r = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(r.text, "html.parser")
-        paragraphs = soup.find_all("p")
-        text = " ".join([p.get_text() for p in paragraphs])
-        return text[:3000]  # trim to avoid overload
+        return article_scraper.fetch(url)
     except Exception as e:
         return f"Error scraping {url}: {e}"
 
@@ -44,7 +86,6 @@ def fetch_news_sentiment(query: str, gl: str = "us") -> dict:
     """
     Fetch latest market news and give detailed news for sentiment analysis .
     """
-    summerise_model= ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
     url = "https://google.serper.dev/news"
     headers = {
         "X-API-KEY": SERPER_API_KEY,
@@ -56,16 +97,23 @@ def fetch_news_sentiment(query: str, gl: str = "us") -> dict:
     resp.raise_for_status()
     data = resp.json()
 
+    articles = data.get("news", [])[:5]
+    # Scrape all articles at once; slow sites time out instead of blocking the rest
+    scraped = article_scraper.scrape_many([article.get("link") for article in articles])
+
     enriched_articles = []
-    content=""
-    for article in data.get("news", [])[:5]:
+    to_score = []  # (index in enriched_articles, {"title", "text"})
+    kept_hashes = []  # (simhash, link) of articles already in the summary
+    for article, page in zip(articles, scraped):
         title = article.get("title")
         link = article.get("link")
         snippet = article.get("snippet")
         date = article.get("date")
         source = article.get("source")
 
-        indepth_text = scrape_article(link)
+        indepth_text = page["text"] if page["status"] == "ok" and page["text"] else (snippet or "")
+        fingerprint = simhash(indepth_text)
+        duplicate_of = next((l for h, l in kept_hashes if indepth_text and is_near_duplicate(fingerprint, h)), None)
 
         enriched_articles.append({
             "title": title,
@@ -73,21 +121,45 @@ def fetch_news_sentiment(query: str, gl: str = "us") -> dict:
             "snippet": snippet,
             "date": date,
             "source": source,
+            "scrape_status": page["status"],
+            "duplicate_of": duplicate_of,
         })
+        if duplicate_of is not None:
+            article_cache.bump("duplicates")
+            continue
+        kept_hashes.append((fingerprint, link))
         
-    #  append all indepth research to summary
+    #  score the indepth research, falling back to the snippet
         
-        content+=indepth_text+"\n"
-    # want to  sumerise this using open ai  call 
-    
-    analysis_prompt=sentiment_prompt(content)
-    analysis= summerise_model.invoke([{"role":"user","content":analysis_prompt}])
+        if indepth_text:
+            to_score.append((len(enriched_articles) - 1, {"title": title, "text": indepth_text}))
+
+    # Map: one (cached) score per article
+    scores, cached, llm_calls = score_articles([a for _, a in to_score])
+    for (index, _), score, hit in zip(to_score, scores, cached):
+        enriched_articles[index]["sentiment_score"] = score["sentiment_score"] if score else None
+        enriched_articles[index]["score_cached"] = hit
+    scored = [score for score in scores if score is not None]
+
+    # Reduce: without an LLM when every score came from the cache
+    summary = json.dumps(aggregate_scores(scored))
+    if llm_calls and scored:
+        content = "\n".join(
+            f"- [{score['sentiment_score']:+.2f}, {score['confidence']} confidence] {score['summary']}" for score in scored
+        )
+        try:
+            summary = get_sentiment_model().invoke([{"role": "user", "content": sentiment_prompt(content)}]).content
+            llm_calls += 1
+        except Exception as e:
+            print(f"[sentiment] reduce call failed, using aggregated scores: {e}", file=sys.stderr, flush=True)
     
     return {
         "query": query,
         "results": enriched_articles,
         "count": len(enriched_articles),
-        "summary":analysis.content
+        "scraped": sum(1 for page in scraped if page["status"] == "ok"),
+        "llm_calls": llm_calls,
+        "summary": summary
     }
 
 
@@ -0,0 +1,209 @@
+"""
+Embedding backends and the query embedding cache for rag_mcp.py.
+
+Two backends produce the vectors stored in Chroma and used for search:
+
+    openai   OpenAI embeddings API (default, text-embedding-ada-002). Inputs are
+             batched per request with a bounded number of requests in flight.
+    local    a sentence-transformers model on CPU, for offline deployments and
+             queries without a network round trip
+             (needs ``pip install sentence-transformers``).
+
+Vectors from different models cannot be mixed, so rag_mcp.py records the model
+in the collection metadata and refuses to search or ingest with another one.
+
+Query embeddings are cached: an in-memory LRU in front of a SQLite file next to
+the Chroma directory, so repeated agent queries skip the embedding call even
+across server restarts. Whitespace in queries is normalized before lookup.
+
+Configure with env vars:
+    EMBED_BACKEND        openai | local (default: openai)
+    EMBED_MODEL          OpenAI embeddings model (default: text-embedding-ada-002)
+    LOCAL_EMBED_MODEL    sentence-transformers model (default: all-MiniLM-L6-v2)
+    EMBED_BATCH_SIZE     inputs per embeddings request / local batch (default: 128)
+    EMBED_CONCURRENCY    embeddings requests in flight (default: 4)
+    EMBED_RETRIES        attempts per request before giving up (default: 4)
+    QUERY_CACHE_SIZE     query embeddings kept (default: 2048)
+"""
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "openai").lower()
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-ada-002")
+LOCAL_EMBED_MODEL = os.getenv("LOCAL_EMBED_MODEL", "all-MiniLM-L6-v2")
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class OpenAIEmbedder:
+    """Embeds many texts with few requests: batched inputs, a bounded number in flight."""
+
+    def __init__(self, client, model: str, batch_size: int, concurrency: int, retries: int):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.retries = retries
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self.requests = 0
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.retries):
+            try:
+                response = self.client.embeddings.create(model=self.model, input=texts)
+                return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+            except Exception as e:
+                if attempt == self.retries - 1:
+                    raise
+                delay = 2 ** attempt
+                print(f"[embed] embeddings request failed ({e}), retrying in {delay}s", file=sys.stderr, flush=True)
+                time.sleep(delay)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for ``texts``, in order."""
+        batches = list(batched(texts, self.batch_size))
+        self.requests += len(batches)
+        return [vector for batch in self._pool.map(self._request, batches) for vector in batch]
+
+
+class LocalEmbedder:
+    """sentence-transformers model on CPU; ``requests`` counts local batches."""
+
+    def __init__(self, model: str, batch_size: int):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("EMBED_BACKEND=local needs: pip install sentence-transformers") from e
+        self.model = model
+        self.batch_size = batch_size
+        self._model = SentenceTransformer(model, device="cpu")
+        # encode() is not safe to call from several threads at once
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.requests += -(-len(texts) // self.batch_size)
+            vectors = self._model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                         show_progress_bar=False)
+        return vectors.tolist()
+
+
+def build_embedder(client=None, backend: str = EMBED_BACKEND):
+    batch_size = int(os.getenv("EMBED_BATCH_SIZE", 128))
+    if backend == "local":
+        return LocalEmbedder(LOCAL_EMBED_MODEL, batch_size)
+    if backend != "openai":
+        raise ValueError(f"unknown EMBED_BACKEND {backend!r} (expected openai or local)")
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI()
+    return OpenAIEmbedder(
+        client,
+        model=EMBED_MODEL,
+        batch_size=batch_size,
+        concurrency=int(os.getenv("EMBED_CONCURRENCY", 4)),
+        retries=int(os.getenv("EMBED_RETRIES", 4)),
+    )
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """LRU of query embeddings, kept in memory and persisted to SQLite."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_access ON query_embeddings(last_access)")
+
+    @staticmethod
+    def key(query: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\0{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._conn.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE query_embeddings SET last_access = ? WHERE key = ?", (time.time(), key))
+            return vector
+
+    def set(self, key: str, vector: List[float]):
+        with self._lock:
+            self._remember(key, vector)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings(key, vector, last_access) VALUES (?, ?, ?)",
+                (key, array("f", vector).tobytes(), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM query_embeddings WHERE key IN ("
+                " SELECT key FROM query_embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def embed_query(self, query: str, embedder) -> List[float]:
+        """Cached embedding of ``query`` with ``embedder``'s model."""
+        key = self.key(query, embedder.model)
+        vector = self.get(key)
+        if vector is None:
+            vector = embedder.embed([normalize_query(query)])[0]
+            self.set(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "in_memory": len(self._memory),
+                "stored": stored,
+                "max_entries": self.max_entries,
+            }
+
+
+def build_query_cache(chroma_path: str) -> QueryEmbeddingCache:
+    """Cache file next to the Chroma directory (``../chroma_db`` -> ``../query_embeddings.sqlite``)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(chroma_path)), "query_embeddings.sqlite")
+    return QueryEmbeddingCache(path, int(os.getenv("QUERY_CACHE_SIZE", 2048)))
@@ -0,0 +1,209 @@
+"""
+Hybrid retrieval for rag_mcp.py: BM25 over the chunk text fused with the
+Chroma vector search.
+
+Dense search is good at paraphrases but often misses exact tokens such as
+policy clause numbers ("4.2.1") or tickers ("ETH-USD"). ``BM25Index`` is an
+in-process inverted index over the same chunks, keyed by the same chunk ids.
+It is built from the collection on first use, updated by ingestion
+(rag_ingest.ingest adds and removes chunks as it writes them) and rebuilt when
+the collection changed behind its back, e.g. after another process ingested.
+Every ingest run that adds or removes chunks stores a new ``ingest_version``
+in the collection metadata (``mark_changed``); the index remembers the version
+and chunk count it was built from, so checking it before a search costs a
+count and no id or document reads.
+
+``hybrid_search`` takes the top candidates of both rankers and orders them by
+reciprocal rank fusion: score = sum of 1 / (rrf_k + rank) over the rankers
+that returned the chunk, so agreement between the two wins and neither score
+scale has to be calibrated against the other.
+
+Configure with env vars:
+    RAG_RETRIEVAL        hybrid | dense (default: hybrid)
+    RAG_CANDIDATES       candidates taken from each ranker (default: 20)
+    RRF_K                rank constant of the fusion (default: 60)
+"""
+import os
+import re
+import sys
+import math
+import time
+import uuid
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RAG_RETRIEVAL = os.getenv("RAG_RETRIEVAL", "hybrid").lower()
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", 20))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# Words, numbers and compounds like 4.2.1, eth-usd or 10-k
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_PARTS = re.compile(r"[.\-/]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; compounds are kept whole and also split into their parts."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = _PARTS.split(token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+
+# Collection metadata key rag_ingest bumps whenever chunks are added or removed
+VERSION_KEY = "ingest_version"
+
+
+def collection_state(collection) -> Tuple[Optional[str], int]:
+    """(ingest version, chunk count) of a collection; both are cheap to read."""
+    return (collection.metadata or {}).get(VERSION_KEY), collection.count()
+
+
+def mark_changed(collection):
+    """Store a new ingest version so BM25 indexes in other processes rebuild."""
+    collection.modify(metadata={**(collection.metadata or {}), VERSION_KEY: uuid.uuid4().hex})
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total = 0
+        # collection_state() the index was built from or kept in step with
+        self._state: Optional[Tuple[Optional[str], int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def _remove(self, ids: set):
+        # One pass over the postings instead of one per removed chunk
+        ids = ids & self._lengths.keys()
+        if not ids:
+            return
+        for doc_id in ids:
+            self._total -= self._lengths.pop(doc_id)
+        for term in list(self._postings):
+            postings = self._postings[term]
+            for doc_id in ids & postings.keys():
+                del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        with self._lock:
+            docs = dict(zip(ids, texts))
+            self._remove(set(docs))
+            for doc_id, text in docs.items():
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                length = sum(counts.values())
+                self._lengths[doc_id] = length
+                self._total += length
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            self._remove(set(ids))
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """(chunk id, BM25 score) of the best ``top_k`` chunks, best first."""
+        with self._lock:
+            n = len(self._lengths)
+            if not n:
+                return []
+            avg = self._total / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def in_sync(self, collection) -> bool:
+        with self._lock:
+            return self._state == collection_state(collection)
+
+    def mark_synced(self, collection):
+        """Record that the index now matches the collection (ingestion kept it in step)."""
+        with self._lock:
+            self._state = collection_state(collection)
+
+    def sync(self, collection, page_size: int = 1000):
+        """Rebuild from the collection when its ingest version or chunk count changed."""
+        state = collection_state(collection)
+        with self._lock:
+            if state == self._state:
+                return
+        start = time.perf_counter()
+        ids, texts = [], []
+        for offset in range(0, state[1], page_size):
+            page = collection.get(include=["documents"], limit=page_size, offset=offset)
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+        fresh = BM25Index(self.k1, self.b)
+        fresh.add(ids, texts)
+        with self._lock:
+            self._postings, self._lengths, self._total, self._state = (
+                fresh._postings, fresh._lengths, fresh._total, state)
+        print(f"[rag] BM25 index over {len(ids)} chunks built in {time.perf_counter() - start:.2f}s",
+              file=sys.stderr, flush=True)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists; (id, score) best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(collection, index: Optional[BM25Index], query: str, query_embedding: List[float],
+                  top_k: int, candidates: int = RAG_CANDIDATES, rrf_k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Top ``top_k`` chunks as {"id", "content", "metadata", "distance", "score",
+    "dense_rank", "lexical_rank"}. ``distance`` is None for chunks only BM25
+    found; without an index this is a plain vector search. BM25 hits the
+    collection no longer has (deleted by another process since the last sync)
+    are skipped and the next fused candidates take their place.
+    """
+    n = max(top_k, candidates) if index is not None else top_k
+    dense = collection.query(query_embeddings=[query_embedding], n_results=n,
+                             include=["documents", "metadatas", "distances"])
+    found = {
+        doc_id: {"id": doc_id, "content": doc, "metadata": meta or {}, "distance": dist}
+        for doc_id, doc, meta, dist in zip(dense["ids"][0], dense["documents"][0],
+                                           dense["metadatas"][0], dense["distances"][0])
+    }
+    dense_ids = dense["ids"][0]
+    lexical_ids = [doc_id for doc_id, _ in index.search(query, n)] if index is not None else []
+
+    fused = reciprocal_rank_fusion([dense_ids, lexical_ids], rrf_k)
+    ranked, position = [], 0
+    while len(ranked) < top_k and position < len(fused):
+        window = fused[position:position + top_k - len(ranked)]
+        position += len(window)
+        missing = [doc_id for doc_id, _ in window if doc_id not in found]
+        if missing:
+            extra = collection.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, doc, meta in zip(extra["ids"], extra["documents"], extra["metadatas"]):
+                found[doc_id] = {"id": doc_id, "content": doc, "metadata": meta or {}, "distance": None}
+        ranked.extend((doc_id, score) for doc_id, score in window if doc_id in found)
+
+    dense_rank = {doc_id: rank for rank, doc_id in enumerate(dense_ids, 1)}
+    lexical_rank = {doc_id: rank for rank, doc_id in enumerate(lexical_ids, 1)}
+    return [
+        {**found[doc_id], "score": round(score, 5),
+         "dense_rank": dense_rank.get(doc_id), "lexical_rank": lexical_rank.get(doc_id)}
+        for doc_id, score in ranked
+    ]
@@ -0,0 +1,150 @@
+"""
+Streaming document ingestion for rag_mcp.py.
+
+Documents flow through the pipeline one window at a time, so a 500-page PDF is
+never held in memory or embedded in a single pass:
+
+    PDF pages (lazy) -> text splitter -> window of UPSERT_BATCH_SIZE chunks
+        -> drop chunks already in the collection (id = hash of source + text)
+        -> embeddings, EMBED_BATCH_SIZE inputs per request, EMBED_CONCURRENCY in flight
+        -> one Chroma upsert per window
+
+Each window is written before the next one is embedded. If ingestion fails
+halfway (rate limit, network), running it again skips every chunk that already
+made it into the collection and carries on from there.
+
+Chunk ids only depend on the document source and the chunk text, so
+re-ingesting a corpus is incremental: unchanged chunks cost nothing, chunks
+that only moved (another page) get a metadata update without a new embedding,
+and only new or edited text is embedded. With ``reindex=True`` the chunks of
+an ingested source that are no longer produced by it are deleted afterwards.
+The BM25 index of rag_hybrid.py, when passed in, gets the same additions and
+deletions; runs that add or remove chunks store a new ingest version in the
+collection metadata so indexes in other processes know to rebuild.
+
+Embeddings come from rag_embeddings.py (OpenAI or a local model).
+
+Configure with env vars:
+    UPSERT_BATCH_SIZE    chunks per Chroma write (default: 512)
+    CHUNK_SIZE           characters per chunk (default: 1000)
+    CHUNK_OVERLAP        characters shared by neighbouring chunks (default: 150)
+"""
+import os
+import sys
+import time
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from langchain.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from rag_embeddings import batched
+from rag_hybrid import mark_changed
+
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 512))
+
+
+def chunk_id(text: str, source: Optional[str] = None) -> str:
+    """Stable id: the same text from the same source always maps to the same chunk."""
+    return hashlib.sha256(f"{source or ''}\0{text}".encode("utf-8")).hexdigest()
+
+
+def clean_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Metadata Chroma can store: scalar values only."""
+    return {k: v for k, v in (metadata or {}).items() if isinstance(v, (str, int, float, bool))}
+
+
+def build_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=int(os.getenv("CHUNK_SIZE", 1000)),
+        chunk_overlap=int(os.getenv("CHUNK_OVERLAP", 150)),
+    )
+
+
+def load_pdf_chunks(path: str, splitter: RecursiveCharacterTextSplitter) -> Iterator[Dict[str, Any]]:
+    """Chunks of a PDF as {"text", "metadata"} dicts, one page at a time."""
+    source = os.path.abspath(path)  # the same file gets the same chunk ids from any cwd
+    for page in PyPDFLoader(path).lazy_load():
+        for chunk in splitter.split_documents([page]):
+            if chunk.page_content.strip():
+                yield {"text": chunk.page_content, "metadata": {**chunk.metadata, "source": source}}
+
+
+def ingest(collection, documents: Iterable[Dict[str, Any]], embedder,
+           batch_size: int = UPSERT_BATCH_SIZE, reindex: bool = False, lexical=None) -> dict:
+    """
+    Embed and upsert ``documents`` ({"text", optional "metadata"} dicts, where
+    metadata["source"] names the document) in windows of ``batch_size``.
+
+    Chunks already in the collection are not embedded again; if their metadata
+    changed (e.g. the page number) only the metadata is updated. Repeated text
+    keeps the metadata of its first occurrence in the run. With
+    ``reindex`` the chunks of every source seen here that were not produced
+    this time are deleted once all documents went through, so a failed run
+    never prunes anything. ``lexical`` (a rag_hybrid.BM25Index) is kept in
+    step with every write.
+    """
+    # Only an index that matched the collection before the run matches it after
+    synced = lexical is not None and lexical.in_sync(collection)
+    start = time.perf_counter()
+    requests_before = embedder.requests
+    stats = {"chunks": 0, "added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    seen: Dict[str, set] = {}
+    written = set()
+    for window in batched(documents, batch_size):
+        stats["chunks"] += len(window)
+        chunks = {}
+        for doc in window:
+            metadata = clean_metadata(doc.get("metadata"))
+            key = chunk_id(doc["text"], metadata.get("source"))
+            # Text repeated in a document (headers, disclaimers) is one chunk
+            # with the metadata of its first occurrence, in any window
+            if key not in written:
+                written.add(key)
+                chunks[key] = (doc["text"], metadata)
+            if "source" in metadata:
+                seen.setdefault(metadata["source"], set()).add(key)
+
+        stored = collection.get(ids=list(chunks), include=["metadatas"])
+        stored = dict(zip(stored["ids"], stored["metadatas"]))
+        new = {key: chunk for key, chunk in chunks.items() if key not in stored}
+        moved = {key: chunk for key, chunk in chunks.items()
+                 if key in stored and (stored[key] or {}) != chunk[1]}
+        stats["unchanged"] += len(window) - len(new) - len(moved)
+
+        if moved:
+            # Chroma rejects empty metadata dicts
+            collection.update(ids=list(moved), metadatas=[meta or None for _, meta in moved.values()])
+            stats["updated"] += len(moved)
+        if new:
+            texts = [text for text, _ in new.values()]
+            collection.upsert(
+                ids=list(new),
+                documents=texts,
+                embeddings=embedder.embed(texts),
+                metadatas=[meta or None for _, meta in new.values()],
+            )
+            if lexical is not None:
+                lexical.add(list(new), texts)
+            stats["added"] += len(new)
+        if new or moved:
+            print(f"[ingest] {stats['added']} added, {stats['updated']} updated, {stats['unchanged']} unchanged "
+                  f"of {stats['chunks']} chunks so far", file=sys.stderr, flush=True)
+
+    if reindex:
+        for source, keys in seen.items():
+            stale = [key for key in collection.get(where={"source": source}, include=[])["ids"] if key not in keys]
+            for batch in batched(stale, batch_size):
+                collection.delete(ids=batch)
+            if lexical is not None:
+                lexical.remove(stale)
+            stats["removed"] += len(stale)
+
+    if stats["added"] or stats["removed"]:
+        mark_changed(collection)
+        if synced:
+            lexical.mark_synced(collection)
+
+    stats["embedding_requests"] = embedder.requests - requests_before
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
@@ -3,95 +3,114 @@ import os
 import sys
 import glob
 import chromadb
-from openai import OpenAI
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from dotenv import load_dotenv
 load_dotenv()
 
-# Set your OpenAI API key
-client = OpenAI()
+from rag_ingest import UPSERT_BATCH_SIZE, build_splitter, ingest, load_pdf_chunks
+from rag_embeddings import build_embedder, build_query_cache
+from rag_hybrid import RAG_RETRIEVAL, BM25Index, hybrid_search
+
+CHROMA_PATH = "../chroma_db"
+# Collections created before the model was recorded were embedded with ada
+LEGACY_EMBED_MODEL = "text-embedding-ada-002"
+
 mcp = FastMCP("RAG Search MCP Server")
 # Initialize ChromaDB persistent client
-chroma_client = chromadb.PersistentClient(path="../chroma_db")
+chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+# OpenAI (set your OpenAI API key) or local model, picked with EMBED_BACKEND
+embedder = build_embedder()
+# Query embeddings, persisted next to the Chroma directory
+query_cache = build_query_cache(CHROMA_PATH)
+# In-process BM25 index per collection, built on first search
+lexical_indexes = {}
 
 def get_embedding(text):
-    """Get OpenAI embedding for given text."""
-    response = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=text
-    )
-    return response.data[0].embedding
+    """Get the embedding for a search query (cached per model)."""
+    return query_cache.embed_query(text, embedder)
 
 # -------------------- Collection Setup --------------------
 
+def check_embed_model(collection):
+    """Vectors of different models can't be compared: refuse to mix them in one collection."""
+    model = (collection.metadata or {}).get("embed_model", LEGACY_EMBED_MODEL)
+    if model != embedder.model:
+        raise ValueError(
+            f"collection '{collection.name}' holds {model} embeddings but the server uses {embedder.model}; "
+            f"switch EMBED_BACKEND/EMBED_MODEL back or ingest into another collection"
+        )
+    return collection
+
 def setup_collection(collection_name="documents"):
     """Create or retrieve a ChromaDB collection."""
     try:
         collection = chroma_client.get_collection(name=collection_name)
         print(f"Using existing collection: {collection_name}", file=sys.stderr, flush=True)
     except:
-        collection = chroma_client.create_collection(name=collection_name)
+        collection = chroma_client.create_collection(name=collection_name, metadata={"embed_model": embedder.model})
         print(f"Created new collection: {collection_name}", file=sys.stderr, flush=True)
-    return collection
+    return check_embed_model(collection)
+
+def get_lexical_index(collection):
+    """BM25 index of the collection, (re)built when it is out of step."""
+    index = lexical_indexes.setdefault(collection.name, BM25Index())
+    index.sync(collection)
+    return index
 
 # -------------------- Add Documents --------------------
 
-def add_documents(documents, collection_name="documents"):
+def add_documents(documents, collection_name="documents", reindex=False):
     """
     Add documents to ChromaDB collection.
-    Each document must be a dict with 'text' and optional 'metadata'.
+    Each document must be a dict with 'text' and optional 'metadata'
+    (metadata['source'] names the file it came from).
+    Documents may be any iterable (e.g. a generator); they are embedded in
+    batches and chunks already in the collection are skipped. With reindex,
+    chunks of the ingested sources that are gone from them are deleted.
     """
     collection = setup_collection(collection_name)
-    
-    texts = []
-    embeddings = []
-    metadatas = []
-    ids = []
-    
-    for i, doc in enumerate(documents):
-        text = doc['text']
-        metadata = doc.get('metadata', {})
-        
-        embedding = get_embedding(text)
-        
-        texts.append(text)
-        embeddings.append(embedding)
-        metadatas.append(metadata)
-        ids.append(f"doc_{i}")
-    
-    collection.add(
-        documents=texts,
-        embeddings=embeddings,
-        metadatas=metadatas,
-        ids=ids
-    )
-
-    print(f"Added {len(documents)} documents to collection '{collection_name}'.", file=sys.stderr, flush=True)
-    return collection
+    stats = ingest(collection, documents, embedder,
+                   batch_size=min(UPSERT_BATCH_SIZE, chroma_client.get_max_batch_size()), reindex=reindex,
+                   lexical=lexical_indexes.get(collection_name))
+
+    print(f"Indexed collection '{collection_name}': {stats['added']} added, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed "
+          f"({stats['embedding_requests']} embedding requests, {stats['seconds']}s).", file=sys.stderr, flush=True)
+    return stats
+
+def add_pdfs(path, collection_name="documents", reindex=True):
+    """Load, split and add a PDF file, or every PDF in a folder. Re-indexes changed files by default."""
+    paths = sorted(glob.glob(os.path.join(path, "*.pdf"))) if os.path.isdir(path) else [path]
+    splitter = build_splitter()
+    chunks = (chunk for pdf in paths for chunk in load_pdf_chunks(pdf, splitter))
+    stats = add_documents(chunks, collection_name, reindex)
+    stats["files"] = len(paths)
+    return stats
 
 # -------------------- Semantic Search --------------------
 
 def semantic_search(query, top_k=5, collection_name="documents"):
-    """Perform semantic search against the ChromaDB collection."""
+    """
+    Search the ChromaDB collection: vector search fused with BM25
+    (RAG_RETRIEVAL=hybrid, default) or vector search only (dense).
+    """
     try:
-        collection = chroma_client.get_collection(name=collection_name)
+        collection = check_embed_model(chroma_client.get_collection(name=collection_name))
         query_embedding = get_embedding(query)
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            include=['documents', 'metadatas', 'distances']
-        )
-        
+        index = get_lexical_index(collection) if RAG_RETRIEVAL == "hybrid" else None
+        results = hybrid_search(collection, index, query, query_embedding, top_k)
+
         formatted_results = []
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                formatted_results.append({
-                    'content': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i] if results['metadatas'][0] else {},
-                    'distance': results['distances'][0][i],
-                    'similarity': 1 - results['distances'][0][i]
-                })
+        for result in results:
+            distance = result['distance']
+            formatted_results.append({
+                'content': result['content'],
+                'metadata': result['metadata'],
+                'distance': distance,
+                'similarity': 1 - distance if distance is not None else None,
+                'score': result['score'],
+                'dense_rank': result['dense_rank'],
+                'lexical_rank': result['lexical_rank'],
+            })
         return formatted_results
     except Exception as e:
         print(f"Error during semantic search: {e}", file=sys.stderr, flush=True)
@@ -110,7 +129,9 @@ def query_documents(query, top_k=5, collection_name="documents"):
 
     for i, result in enumerate(results):
         print(f"Result {i+1}:", file=sys.stderr, flush=True)
-        print(f"Similarity: {result['similarity']:.4f}", file=sys.stderr, flush=True)
+        similarity = f"{result['similarity']:.4f}" if result['similarity'] is not None else "-"
+        print(f"Score: {result['score']:.4f} (similarity {similarity}, vector rank {result['dense_rank']}, "
+              f"BM25 rank {result['lexical_rank']})", file=sys.stderr, flush=True)
         print(f"Content: {result['content'][:300]}...", file=sys.stderr, flush=True)
         print(f"Metadata: {result['metadata']}", file=sys.stderr, flush=True)
         print("-" * 30, file=sys.stderr, flush=True)
@@ -123,4 +144,8 @@ def search(query:str)->dict:
     return query_documents(query,5, "documents")
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    # python rag_mcp.py ingest <pdf or folder>: index documents; otherwise serve MCP
+    if len(sys.argv) == 3 and sys.argv[1] == "ingest":
+        print(add_pdfs(sys.argv[2], "documents"))
+    else:
+        mcp.run()
\ No newline at end of file
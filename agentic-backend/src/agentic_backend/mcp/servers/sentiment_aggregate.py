@@ -0,0 +1,107 @@
+"""
+Map-reduce helpers for news_sentiment_mcp.py.
+
+Each article is scored on its own (map) with ``article_sentiment_prompt`` and
+the score is cached by a hash of the article text (see article_cache.py). The
+per-query result (reduce) combines the article scores into the same JSON shape
+``sentiment_prompt`` produces; ``aggregate_scores`` does that without an LLM,
+which is all a query needs when every article score is already cached.
+"""
+import json
+import hashlib
+from collections import Counter
+from typing import Any, Dict, List
+
+# Bump when article_sentiment_prompt changes so old scores are not reused
+SCORE_VERSION = "1"
+
+CONFIDENCE_WEIGHT = {"low": 0.5, "medium": 1.0, "high": 1.5}
+RISK_ORDER = ["Low", "Medium", "High"]
+# (upper bound, label) for the aggregated sentiment score
+LABELS = [
+    (-0.6, "Very Negative"),
+    (-0.3, "Negative"),
+    (-0.1, "Slightly Negative"),
+    (0.1, "Neutral"),
+    (0.3, "Slightly Positive"),
+    (0.6, "Positive"),
+    (float("inf"), "Very Positive"),
+]
+
+
+def score_key(text: str, model: str) -> str:
+    raw = json.dumps([SCORE_VERSION, model, text])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def parse_json(raw: str) -> Dict[str, Any]:
+    """JSON object from an LLM reply, tolerating code fences and surrounding text."""
+    try:
+        return json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        start, end = raw.find("{"), raw.rfind("}")
+        if start < 0 or end <= start:
+            raise ValueError(f"no JSON object in reply: {raw[:200]!r}")
+        return json.loads(raw[start:end + 1])
+
+
+def normalize_score(score: Dict[str, Any]) -> Dict[str, Any]:
+    """Clamp the numeric score and fill the fields aggregation relies on."""
+    try:
+        value = float(score.get("sentiment_score", 0))
+    except (TypeError, ValueError):
+        value = 0.0
+    score["sentiment_score"] = max(-1.0, min(1.0, value))
+    score.setdefault("summary", "")
+    score.setdefault("emotions", [])
+    score.setdefault("event_sentiment", {})
+    score.setdefault("trading_signals", {})
+    score["confidence"] = str(score.get("confidence", "medium")).strip().lower()
+    return score
+
+
+def label_for(value: float) -> str:
+    return next(label for bound, label in LABELS if value <= bound)
+
+
+def _majority(values: List[Any], default: Any) -> Any:
+    values = [v for v in values if v]
+    return Counter(values).most_common(1)[0][0] if values else default
+
+
+def _majority_by_key(dicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    keys = {k for d in dicts for k in d}
+    return {k: _majority([d.get(k) for d in dicts], "Neutral") for k in sorted(keys)}
+
+
+def aggregate_scores(scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine article scores into one query-level sentiment without an LLM."""
+    if not scores:
+        return {
+            "summary": "No article could be scored.",
+            "sentiment_score": 0.0,
+            "sentiment_label": "Neutral",
+            "recommendation": "hold",
+            "confidence": "low",
+            "articles": 0,
+        }
+    weights = [CONFIDENCE_WEIGHT.get(s["confidence"], 1.0) for s in scores]
+    value = sum(w * s["sentiment_score"] for w, s in zip(weights, scores)) / sum(weights)
+    emotions = Counter(e for s in scores for e in s.get("emotions") or [])
+    risks = Counter(str(s.get("risk_level", "")).strip().title() for s in scores)
+    top = max(risks.values())
+    return {
+        "summary": " ".join(s["summary"] for s in scores if s["summary"]),
+        "sentiment_score": round(value, 3),
+        "sentiment_label": label_for(value),
+        "emotions": [e for e, _ in emotions.most_common(4)],
+        "event_sentiment": _majority_by_key([s["event_sentiment"] for s in scores]),
+        # ties go to the higher risk
+        "risk_level": max((r for r, n in risks.items() if n == top and r in RISK_ORDER),
+                          key=RISK_ORDER.index, default="Medium"),
+        "time_orientation": _majority([s.get("time_orientation") for s in scores], "Backward-looking"),
+        "trading_signals": _majority_by_key([s["trading_signals"] for s in scores]),
+        "recommendation": "buy" if value >= 0.3 else ("sell" if value <= -0.3 else "hold"),
+        "confidence": _majority([s["confidence"] for s in scores], "medium"),
+        "articles": len(scores),
+    }
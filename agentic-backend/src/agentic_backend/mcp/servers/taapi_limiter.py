@@ -0,0 +1,104 @@
+"""
+Token-bucket rate limiter for TAAPI calls, shared by every MCP server process.
+
+financial_mcp.py and trade_mcp.py run as separate stdio subprocesses but spend
+the same TAAPI key, so the bucket state lives in a small JSON file guarded by
+an exclusive file lock. Callers only wait when the bucket is actually empty.
+
+Configure with env vars:
+    TAAPI_PLAN          free | basic | pro | expert   (default: free)
+    TAAPI_RATE_LIMIT    requests per window, overrides the plan
+    TAAPI_RATE_WINDOW   window length in seconds, overrides the plan
+"""
+import os
+import sys
+import json
+import time
+import threading
+
+from agentic_backend.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process bucket
+    fcntl = None
+
+# TAAPI plan quotas: (requests, window seconds)
+TAAPI_PLANS = {
+    "free": (1, 15.0),
+    "basic": (5, 15.0),
+    "pro": (30, 15.0),
+    "expert": (75, 15.0),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: int, per: float, state_path: str):
+        # A zero rate would never refill and make acquire() divide by zero
+        if rate < 1:
+            raise ValueError(f"TAAPI rate limit must be at least 1 request per window, got {rate}")
+        if per <= 0:
+            raise ValueError(f"TAAPI rate window must be positive, got {per}")
+        self.capacity = float(rate)
+        self.refill_per_second = rate / per
+        self.state_path = state_path
+        self._local_lock = threading.Lock()
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+
+    def _take(self) -> float:
+        """Try to take one token. Returns 0 on success, else seconds until one is available."""
+        with open(self.state_path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except json.JSONDecodeError:
+                    state = {}
+
+                now = time.time()
+                tokens = state.get("tokens", self.capacity)
+                updated = state.get("updated", now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.refill_per_second)
+
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.refill_per_second
+
+                f.seek(0)
+                f.truncate()
+                json.dump({"tokens": tokens, "updated": now}, f)
+                f.flush()
+                return wait
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the seconds spent queued."""
+        start = time.monotonic()
+        with self._local_lock:
+            while True:
+                wait = self._take()
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+        queued = time.monotonic() - start
+        if queued > 0.01:
+            print(f"[TAAPI limiter] queued {queued:.2f}s", file=sys.stderr, flush=True)
+        return queued
+
+
+def build_limiter() -> TokenBucket:
+    plan = os.getenv("TAAPI_PLAN", "free").lower()
+    rate, per = TAAPI_PLANS.get(plan, TAAPI_PLANS["free"])
+    rate = int(os.getenv("TAAPI_RATE_LIMIT", rate))
+    per = float(os.getenv("TAAPI_RATE_WINDOW", per))
+    return TokenBucket(rate, per, str(settings.RUN_SAVE_DIR / "taapi_bucket.json"))
+
+
+taapi_limiter = build_limiter()
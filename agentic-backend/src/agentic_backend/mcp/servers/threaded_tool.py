@@ -0,0 +1,23 @@
+"""
+Run blocking MCP tools on a worker thread.
+
+mcp's FastMCP calls plain ``def`` tools directly on the server's event loop,
+so one slow HTTP request holds up every other call on the same stdio session
+and an agent's concurrent tool calls end up serialized inside the server.
+Tools decorated with ``@threaded`` (below ``@mcp.tool()``) run in anyio's
+thread pool instead. The signature and docstring are kept, so the tool schema
+does not change.
+
+Shared state the tools touch is already thread-safe: the TAAPI token bucket
+(taapi_limiter.py) and the indicator cache (indicator_cache.py) take locks.
+"""
+import functools
+
+import anyio
+
+
+def threaded(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+    return wrapper
@@ -2,10 +2,11 @@ from mcp.server.fastmcp import FastMCP
 import requests
 import json
 from datetime import datetime
-import time 
 import os
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
+# Rate limiting: token bucket shared with financial_mcp.py (see taapi_limiter.py)
+from taapi_limiter import taapi_limiter
 mcp = FastMCP("Crypto Trade MCP Server")
 
 # Base URLs
@@ -44,12 +45,13 @@ def analyze_market(coin: str, interval: str = "1h"):
                 "sl": str or None,  # Suggested stop-loss for sell
                 "tp": str or None,  # Suggested take-profit for sell
                 "reason": str         # Reason if trade not recommended
-            }
+            },
+            "queued_seconds": float  # Time spent waiting on the TAAPI rate limiter
         }
     """
     try:
         # Fetch current price
-        time.sleep(17)
+        queued_seconds = taapi_limiter.acquire()
         price_params = {
             
             "exchange": "binance",
@@ -61,7 +63,7 @@ def analyze_market(coin: str, interval: str = "1h"):
         current_price = float(price_response.json()["value"])
 
         # Fetch pivot points
-        time.sleep(17)
+        queued_seconds += taapi_limiter.acquire()
         pivot_params = {
             
             "exchange": "binance",
@@ -120,7 +122,7 @@ def analyze_market(coin: str, interval: str = "1h"):
             "sell": calc_levels("sell")
         }
 
-        return {"success": True, "analysis": analysis}
+        return {"success": True, "analysis": analysis, "queued_seconds": round(queued_seconds, 3)}
 
     except requests.exceptions.RequestException as e:
         return {"success": False, "error": str(e)}
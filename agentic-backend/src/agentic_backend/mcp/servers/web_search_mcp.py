@@ -4,6 +4,9 @@ from dotenv import load_dotenv
 import os
 import sys
 
+# Blocking tools run on a thread so concurrent calls overlap (see threaded_tool.py)
+from threaded_tool import threaded
+
 # Load environment variables
 load_dotenv()
 
@@ -12,6 +15,7 @@ mcp = FastMCP("Web Search MCP Server")
 print("loaded environment variables", file=sys.stderr, flush=True)
 
 @mcp.tool()
+@threaded
 def web_search(query: str) -> dict:
     """
     use this when you whant to search some information on web only if you do not have tools and knowledge to answer the question.
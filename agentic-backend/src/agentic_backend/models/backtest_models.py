@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+
+class BacktestRequest(BaseModel):
+    strategy_description: str = Field(..., description="Natural language description of the trading strategy")
+    ticker: str = Field(default="ETH-USD", description="Stock/crypto ticker symbol")
+    days: int = Field(default=365, ge=1, le=3650, description="Number of historical days to backtest")
+    use_cache: bool = Field(default=True, description="Reuse code/report of an identical earlier request")
+    strategy_spec: Optional[dict] = Field(
+        default=None,
+        description="Declarative indicator strategy for the vectorized engine (see services/vector_backtest.py); "
+                    "generated Backtrader code is used when absent; an invalid spec is rejected with a 400"
+    )
+
+
+class SweepRequest(BaseModel):
+    strategy_description: Optional[str] = Field(default=None, description="Strategy to generate code for (ignored if generated_code is given)")
+    generated_code: Optional[str] = Field(default=None, description="Script from an earlier /backtest run, reused without another GPT call")
+    ticker: str = Field(default="ETH-USD", description="Stock/crypto ticker symbol")
+    days: int = Field(default=365, ge=1, le=3650, description="Number of historical days to backtest")
+    param_grid: Dict[str, Any] = Field(..., description='Values per strategy param, e.g. {"ema_fast": [5, 9, 12], "ema_slow": {"start": 20, "stop": 40, "step": 5}}')
+    rank_by: str = Field(default="total_return_pct", description="Summary field used to rank the runs")
+
+
+class SweepResponse(BaseModel):
+    status: str
+    ticker: str
+    days: int
+    rank_by: str
+    combinations: int
+    succeeded: int
+    wall_seconds: float
+    run_seconds_total: float
+    speedup: Optional[float] = None
+    results: List[dict]
+    generated_code: Optional[str] = None
+
+
+class BacktestResponse(BaseModel):
+    status: str
+    strategy_description: str
+    ticker: str
+    days: int
+    backtest_results: Optional[dict] = None
+    generated_code: Optional[str] = None
+    error: Optional[str] = None
+    execution_time: Optional[float] = None
+    engine: str = "backtrader"
+    cached: bool = False  # backtest report served from the strategy cache
+    code_cached: bool = False  # generated code served from the strategy cache
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Annotated
 from datetime import datetime
 from enum import Enum
 
@@ -28,6 +28,7 @@ class AgentState(BaseModel):
     agent_input: str = ""
     tool_call_response_pair: List[Dict[str, Any]] = Field(default_factory=list)
     agent_output: str = ""
+    tool_timing: Dict[str, Any] = Field(default_factory=dict)  # wall-clock vs summed tool seconds
 
 
 class SupervisorDecision(BaseModel):
@@ -38,6 +39,20 @@ class SupervisorDecision(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+def merge_branch_results(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reducer for results of agents dispatched in parallel (fan-out graph).
+
+    Nodes that return the whole state write the list back unchanged, so
+    entries are merged by ``branch_id`` instead of concatenated. The join node
+    writes None to clear it once the results are folded into the state.
+    """
+    if right is None:
+        return []
+    seen = {r["branch_id"] for r in left}
+    return left + [r for r in (right or []) if r["branch_id"] not in seen]
+
+
 class SupervisorState(BaseModel):
     run_id: Optional[str] = None
     user_query: str
@@ -50,6 +65,12 @@ class SupervisorState(BaseModel):
     final_output: Optional[str] = None
     user_detail: str
     trade_executions: List[TradeExecution] = Field(default_factory=list)  # Track all trades
+    # Fan-out graph only: agents dispatched together in the current step
+    pending_tasks: List[Dict[str, str]] = Field(default_factory=list)
+    # Trade tasks held back from a multi-agent step; dispatched one per step next
+    deferred_tasks: List[Dict[str, str]] = Field(default_factory=list)
+    branch_results: Annotated[List[Dict[str, Any]], merge_branch_results] = Field(default_factory=list)
+    parallel_steps: List[Dict[str, Any]] = Field(default_factory=list)  # wall vs summed agent seconds per step
 
     def add_decision(self, step: int, agent: str, reasoning: str, task: str):
         d = SupervisorDecision(step=step, selected_agent=agent, reasoning=reasoning, task=task)
@@ -72,9 +93,16 @@ class SupervisorState(BaseModel):
         for i, d in enumerate(self.decisions):
             # Find corresponding agent state
             agent_output = ""
+            tools = ""
             if i < len(self.agent_states):
                 agent_output = self.agent_states[i].agent_output
-            parts.append(f"Step {d.step}: {d.selected_agent} -> {d.task}\n Reasoning: {d.reasoning}\n Output: {agent_output}\n")
+                timing = self.agent_states[i].tool_timing
+                if timing.get("tool_calls"):
+                    tools = (
+                        f" Tools: {timing['tool_calls']} calls in {timing['rounds']} rounds, "
+                        f"{timing['wall_seconds']:.2f}s wall vs {timing['tool_seconds']:.2f}s summed\n"
+                    )
+            parts.append(f"Step {d.step}: {d.selected_agent} -> {d.task}\n Reasoning: {d.reasoning}\n{tools} Output: {agent_output}\n")
         parts.append(f"Final: {self.final_output}")
         return "\n".join(parts)
     def dump_json(self, **kwargs) -> str:
@@ -213,4 +213,42 @@ Required JSON structure:
     return prompt
 
 
+def article_sentiment_prompt(title: str, content: str) -> str:
+    """Map step: score one article. Scores are cached per article and aggregated per query."""
+    prompt = f"""
+You are a financial sentiment analysis engine.
+Analyze this single news article and return STRICT JSON ONLY.
+No explanations or text outside JSON.
+
+Title: {title}
+Article:
+{content}
+
+Required JSON structure:
+{{
+  "summary": "1-2 sentences with the market-relevant facts of this article",
+  "sentiment_score": "float between -1 (very negative) and +1 (very positive)",
+  "emotions": ["fear","optimism","uncertainty","greed","excitement","skepticism","panic"],
+  "event_sentiment": {{
+    "regulation": "Positive/Negative/Neutral",
+    "adoption": "Positive/Negative/Neutral",
+    "technology": "Positive/Negative/Neutral",
+    "security": "Positive/Negative/Neutral",
+    "macroeconomics": "Positive/Negative/Neutral",
+    "market_sentiment": "Positive/Negative/Neutral"
+  }},
+  "risk_level": "Low / Medium / High",
+  "time_orientation": "Backward-looking / Forward-looking",
+  "trading_signals": {{
+    "momentum": "bullish / bearish / neutral",
+    "volatility_outlook": "low / medium / high",
+    "liquidity_outlook": "positive / negative / neutral",
+    "whale_activity": "supportive / selling pressure / neutral"
+  }},
+  "confidence": "low / medium / high"
+}}
+"""
+    return prompt
+
+
 news_sentiment_prompt= """You are a expert market news sentiment analysis agent. Analyze the sentiment of the news article and provide a summary of its sentiment impact on the market."""
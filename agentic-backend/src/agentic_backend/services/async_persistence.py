@@ -0,0 +1,246 @@
+# src/agentic_backend/services/async_persistence.py
+"""
+Async front end for services/persistence.py.
+
+Writes are queued and flushed in batches by a background task (write-behind),
+so the WebSocket loop never blocks on SQLite. Reads and deletes run in a worker
+thread and first wait for any queued writes to the same thread, so callers
+always read their own writes.
+
+Every queued write has a future that is resolved or failed exactly once: if
+the flusher stops, the writes it still held fail with FlusherStopped and the
+next write starts a new flusher.
+"""
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+from ..config import settings
+from . import persistence
+
+
+class FlusherStopped(RuntimeError):
+    """The background flusher stopped before the write was committed."""
+
+
+class AsyncThreadStore:
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # (user_id, thread_id) → futures of writes not yet committed
+        self._pending: Dict[Tuple[str, str], List[asyncio.Future]] = {}
+        self._metrics = {
+            "enqueued": 0,
+            "flushed": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+            "backpressure_waits": 0,
+            "backpressure_seconds": 0.0,
+            "last_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+            "flusher_restarts": 0,
+            "last_flusher_error": None,
+        }
+
+    async def start(self):
+        if self._flusher is not None and not self._flusher.done():
+            return
+        if self._flusher is not None:
+            self._metrics["flusher_restarts"] += 1
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._flusher = asyncio.create_task(self._flush_loop(), name="persistence-flusher")
+
+    async def close(self):
+        """Flush everything still queued, then stop the flusher."""
+        if self._flusher is None:
+            return
+        await self.flush()
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+
+    async def flush(self):
+        """Wait until every write queued so far is committed."""
+        pending = [f for futures in self._pending.values() for f in futures]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _flush_loop(self):
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    # Write errors are handled in _write_batch, so this is a bug
+                    # in the bookkeeping: fail what is left of the batch, keep flushing
+                    print(f"[persistence] batch of {len(batch)} writes aborted: {e!r}")
+                    self._fail([future for _, future in batch], e)
+        except Exception as e:
+            error = e
+            print(f"[persistence] flusher died: {e!r}")
+            self._metrics["last_flusher_error"] = repr(e)
+            raise
+        finally:
+            # Whatever stopped the loop (close() or an error), no caller may wait
+            # forever: fail the writes still held and drop the dead queue.
+            # Writers blocked on a full queue get through once it's drained.
+            stopped = FlusherStopped(f"persistence flusher stopped: {error!r}" if error else "persistence flusher stopped")
+            stopped.__cause__ = error
+            self._fail([future for futures in self._pending.values() for future in futures], stopped)
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    def _fail(self, futures: List[asyncio.Future], error: BaseException):
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+                self._metrics["failed"] += 1
+        for key in list(self._pending):
+            remaining = [f for f in self._pending[key] if not f.done()]
+            if remaining:
+                self._pending[key] = remaining
+            else:
+                del self._pending[key]
+
+    @staticmethod
+    def _write_each(updates: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        """Commit updates one by one; the error of each write, or None."""
+        errors = []
+        for update in updates:
+            try:
+                persistence.update_thread_memory_batch([update])
+                errors.append(None)
+            except Exception as e:
+                print(f"[persistence] dropped write for {update['user_id']}/{update['thread_id']}: {e}")
+                errors.append(e)
+        return errors
+
+    async def _write_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        start = time.perf_counter()
+        updates = [u for u, _ in batch]
+        try:
+            await asyncio.to_thread(persistence.update_thread_memory_batch, updates)
+            errors = [None] * len(batch)
+        except Exception as e:
+            # The batch is one transaction: nothing was written. Retry the
+            # updates separately so only the bad ones fail.
+            print(f"[persistence] batch of {len(batch)} writes failed ({e}), retrying one by one")
+            errors = await asyncio.to_thread(self._write_each, updates)
+        elapsed = time.perf_counter() - start
+
+        m = self._metrics
+        m["batches"] += 1
+        m["last_flush_seconds"] = elapsed
+        m["total_flush_seconds"] += elapsed
+        failed = sum(1 for error in errors if error is not None)
+        m["failed"] += failed
+        m["flushed"] += len(batch) - failed
+
+        for (update, future), error in zip(batch, errors):
+            key = (update["user_id"], update["thread_id"])
+            if not future.done():
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+            futures = self._pending.get(key)
+            if futures is not None:
+                futures.remove(future)
+                if not futures:
+                    del self._pending[key]
+            self._queue.task_done()
+
+    async def _wait_thread(self, user_id: str, thread_id: str):
+        pending = list(self._pending.get((user_id, thread_id), []))
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def update_thread_memory(
+        self,
+        user_id: str,
+        thread_id: str,
+        request_summary: Optional[str] = None,
+        response_summary: Optional[str] = None,
+        conversation_entry: Optional[Dict[str, Any]] = None,
+        wait: bool = False,
+    ) -> asyncio.Future:
+        """
+        Queue an update_thread_memory() write.
+
+        Returns a future that resolves once the write is committed; pass
+        ``wait=True`` (or await the future) when durability is needed. Blocks
+        only when the queue is full (backpressure).
+        """
+        await self.start()
+        update = {
+            "user_id": user_id,
+            "thread_id": thread_id,
+            "request_summary": request_summary,
+            "response_summary": response_summary,
+            "conversation_entry": conversation_entry,
+        }
+        future = asyncio.get_running_loop().create_future()
+        # Write errors are logged by the flusher; don't warn if nobody awaits
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending.setdefault((user_id, thread_id), []).append(future)
+
+        if self._queue.full():
+            self._metrics["backpressure_waits"] += 1
+            start = time.perf_counter()
+            await self._queue.put((update, future))
+            self._metrics["backpressure_seconds"] += time.perf_counter() - start
+        else:
+            self._queue.put_nowait((update, future))
+
+        self._metrics["enqueued"] += 1
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], self._queue.qsize())
+
+        if wait:
+            await future
+        return future
+
+    async def get_thread_memory(self, user_id: str, thread_id: str) -> Optional[Dict[str, Any]]:
+        await self._wait_thread(user_id, thread_id)
+        return await asyncio.to_thread(persistence.get_thread_memory, user_id, thread_id)
+
+    async def clear_thread_memory(self, user_id: str, thread_id: str):
+        await self._wait_thread(user_id, thread_id)
+        await asyncio.to_thread(persistence.clear_thread_memory, user_id, thread_id)
+
+    async def get_user_threads(self, user_id: str) -> List[str]:
+        await self.flush()
+        return await asyncio.to_thread(persistence.get_user_threads, user_id)
+
+    async def list_user_threads(self, user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        await self.flush()
+        return await asyncio.to_thread(persistence.list_user_threads, user_id, limit, cursor)
+
+    def metrics(self) -> Dict[str, Any]:
+        m = dict(self._metrics)
+        m["queue_depth"] = self._queue.qsize() if self._queue else 0
+        m["max_queue"] = self.max_queue
+        m["avg_batch_size"] = (m["flushed"] + m["failed"]) / m["batches"] if m["batches"] else 0.0
+        return m
+
+
+# Global singleton, started from main.lifespan
+thread_store = AsyncThreadStore(
+    max_queue=settings.PERSISTENCE_QUEUE_SIZE,
+    batch_size=settings.PERSISTENCE_BATCH_SIZE,
+    flush_interval=settings.PERSISTENCE_FLUSH_INTERVAL,
+)
@@ -0,0 +1,454 @@
+# src/agentic_backend/services/backtest_executor.py
+"""
+Async executor for generated backtest scripts.
+
+Backtests run outside the event loop in Python subprocesses. At most
+``max_concurrency`` jobs run at once; the rest wait in a FIFO queue and get
+notified of their queue position. Jobs can be cancelled while queued or
+running, and every subprocess runs under CPU-time and address-space rlimits.
+
+With ``warm_workers`` (the default, POSIX only) scripts are sent over a pipe
+to long-lived backtest_worker.py processes that have already imported numpy,
+pandas, yfinance and backtrader, instead of paying those imports in a fresh
+interpreter per run. The worker forks a fresh child per script, so jobs keep
+the isolation of one process per run (own globals, CPU rlimit, process group)
+without the import cost. A worker is replaced after ``worker_max_jobs`` runs,
+when its RSS exceeds ``worker_max_rss_mb``, or when it dies, times out or is
+cancelled (its running job's process group is killed with it); replacements
+are spawned right away so the next job finds a warm worker. stats() reports
+cold and warm run latency side by side.
+
+Events a running script streams (progress, closed trades; see the progress
+prelude in services/backtest_harness.py) are put on ``job.events`` next to the
+queued/started/done events.
+
+This module only depends on the standard library so both the main app
+(api/ws_routes.py) and the standalone backtest app (api/main.py) can use it.
+"""
+import os
+import sys
+import json
+import signal
+import time
+import uuid
+import asyncio
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits
+    resource = None
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backtest_worker.py")
+PRELOAD_MODULES = ("numpy", "pandas", "yfinance", "backtrader")
+# Worker replies carry the full stdout/stderr of a run on one line
+PROTOCOL_LIMIT = 64 * 1024 * 1024
+# Prefix of event lines printed by the progress prelude in a plain subprocess
+EVENT_MARKER = "__BACKTEST_EVENT__"
+
+
+def parse_backtest_output(output: str, error_output: str, return_code: int) -> dict:
+    """Extract the __JSON_REPORT_START__/__JSON_REPORT_END__ block from a backtest run."""
+    json_report = None
+    error_message = None
+
+    if "__JSON_REPORT_START__" in output and "__JSON_REPORT_END__" in output:
+        try:
+            json_str = output.split("__JSON_REPORT_START__")[1].split("__JSON_REPORT_END__")[0].strip()
+            json_report = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            error_message = f"JSON parse error: {str(e)}"
+
+    # If execution failed, capture stderr as error message
+    if return_code != 0 and error_output:
+        error_message = error_output.strip()
+
+    return {
+        "status": "success" if return_code == 0 and json_report else "error",
+        "backtest_results": json_report,
+        "stdout": output,
+        "stderr": error_output,
+        "return_code": return_code,
+        "error": error_message
+    }
+
+
+class WorkerDied(Exception):
+    def __init__(self, return_code: int):
+        super().__init__(f"Backtest worker died (exit code {return_code})")
+        self.return_code = return_code
+
+
+class _Worker:
+    """A pre-warmed backtest_worker.py process; spawning starts on creation."""
+
+    def __init__(self, executor: "BacktestExecutor"):
+        self.jobs = 0
+        self.rss_mb = 0.0
+        self.import_seconds: Optional[float] = None
+        self.job_pid: Optional[int] = None  # forked child running the current job
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.ready = asyncio.create_task(self._spawn(executor), name="backtest-worker-spawn")
+
+    async def _spawn(self, executor: "BacktestExecutor"):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT, *executor.preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            preexec_fn=executor._worker_limits if resource is not None else None,
+            limit=PROTOCOL_LIMIT,
+        )
+        line = await self.process.stdout.readline()
+        if not line:
+            raise WorkerDied(await self.process.wait())
+        self.import_seconds = json.loads(line)["import_seconds"]
+
+    async def run(self, code: str, cpu_seconds: Optional[int], on_event: Callable[[dict], None]) -> dict:
+        """Run one script; events streamed by the script are passed to ``on_event``."""
+        self.jobs += 1
+        self.process.stdin.write((json.dumps({"code": code, "cpu_seconds": cpu_seconds}) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise WorkerDied(await self.process.wait())
+            reply = json.loads(line)
+            if reply["type"] == "event":
+                on_event(reply["event"])
+                continue
+            if reply["type"] == "started":
+                self.job_pid = reply["pid"]
+                continue
+            self.job_pid = None
+            self.rss_mb = reply.get("rss_mb", 0.0)
+            return reply
+
+    async def kill(self):
+        if not self.ready.done():
+            self.ready.cancel()
+            await asyncio.gather(self.ready, return_exceptions=True)
+        if self.job_pid is not None:
+            try:
+                os.killpg(self.job_pid, signal.SIGKILL)
+            except OSError:
+                pass
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+class BacktestJob:
+    """One queued or running backtest. Consume ``events`` for status updates."""
+
+    def __init__(self, executor: "BacktestExecutor", code: str):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.status = "queued"  # queued, running, success, error, timeout, cancelled
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self._executor = executor
+        self._result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def position(self) -> int:
+        """1-based position in the wait queue; 0 once running or finished."""
+        return self._executor.position(self)
+
+    def emit(self, event: Dict[str, Any]):
+        self.events.put_nowait({"job_id": self.id, **event})
+
+    async def result(self) -> dict:
+        return await asyncio.shield(self._result)
+
+    def done(self) -> bool:
+        return self._result.done()
+
+    def cancel(self):
+        self._executor.cancel(self)
+
+    def _finish(self, result: dict):
+        if self._result.done():
+            return
+        self.status = result["status"]
+        self._result.set_result(result)
+        self.emit({"type": "done", "status": self.status})
+
+
+class BacktestExecutor:
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        timeout: float = 300,
+        cpu_seconds: Optional[int] = 300,
+        memory_mb: Optional[int] = 2048,
+        warm_workers: bool = True,
+        worker_max_jobs: int = 20,
+        worker_max_rss_mb: Optional[int] = 1024,
+        preload: tuple = PRELOAD_MODULES,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.warm_workers = warm_workers and hasattr(os, "fork")
+        self.worker_max_jobs = worker_max_jobs
+        self.worker_max_rss_mb = worker_max_rss_mb
+        self.preload = preload
+        self._waiting: List[BacktestJob] = []
+        self._running: Dict[str, BacktestJob] = {}
+        self._idle: List[_Worker] = []
+        self._reaping = set()  # kill tasks of retired workers
+        self._closed = False
+        self._worker_stats = {"spawned": 0, "import_seconds_total": 0.0, "recycled": {}}
+        # "cold": fresh interpreter (subprocess mode or a worker still importing), "warm": ready worker
+        self._latency = {"cold": [0, 0.0], "warm": [0, 0.0]}
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        """Pre-spawn workers up to max_concurrency so the first jobs start warm."""
+        self._closed = False
+        if not self.warm_workers:
+            return
+        while len(self._idle) + len(self._running) < self.max_concurrency:
+            self._idle.append(self._new_worker())
+
+    async def close(self):
+        """Cancel queued and running jobs and stop every worker."""
+        self._closed = True
+        running = [job._task for job in self._running.values() if job._task is not None]
+        for job in list(self._waiting) + list(self._running.values()):
+            job.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(worker.kill() for worker in idle), *self._reaping, return_exceptions=True)
+
+    # ---------- queue ----------
+
+    def submit(self, code: str) -> BacktestJob:
+        """Queue a backtest script. Must be called from the event loop."""
+        job = BacktestJob(self, code)
+        self._waiting.append(job)
+        job.emit({"type": "queued", "position": len(self._waiting)})
+        self._dispatch()
+        return job
+
+    async def run(self, code: str) -> dict:
+        """Submit and wait for the result (drop-in for the old run_backtest_subprocess)."""
+        job = self.submit(code)
+        try:
+            return await job.result()
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    def position(self, job: BacktestJob) -> int:
+        try:
+            return self._waiting.index(job) + 1
+        except ValueError:
+            return 0
+
+    def cancel(self, job: BacktestJob):
+        if job in self._waiting:
+            self._waiting.remove(job)
+            job._finish({"status": "cancelled", "error": "Backtest cancelled", "return_code": -1})
+            self._notify_positions()
+        elif job._task is not None and not job._task.done():
+            job._task.cancel()
+
+    def stats(self) -> dict:
+        latency = {
+            kind: {"runs": count, "avg_run_seconds": round(total / count, 3) if count else None}
+            for kind, (count, total) in self._latency.items()
+        }
+        spawned = self._worker_stats["spawned"]
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": len(self._running),
+            "queued": len(self._waiting),
+            "latency": latency,
+            "workers": {
+                "enabled": self.warm_workers,
+                "idle": sum(1 for w in self._idle if w.ready.done()),
+                "starting": sum(1 for w in self._idle if not w.ready.done()),
+                "spawned": spawned,
+                "avg_import_seconds": round(self._worker_stats["import_seconds_total"] / spawned, 3) if spawned else None,
+                "recycled": dict(self._worker_stats["recycled"]),
+                "max_jobs": self.worker_max_jobs,
+                "max_rss_mb": self.worker_max_rss_mb,
+            },
+        }
+
+    def _dispatch(self):
+        started = False
+        while self._waiting and len(self._running) < self.max_concurrency:
+            job = self._waiting.pop(0)
+            self._running[job.id] = job
+            job._task = asyncio.create_task(self._run_job(job), name=f"backtest-{job.id}")
+            started = True
+        if started:
+            self._notify_positions()
+
+    def _notify_positions(self):
+        for i, job in enumerate(self._waiting, start=1):
+            job.emit({"type": "queued", "position": i})
+
+    # ---------- execution ----------
+
+    def _limits(self):
+        """preexec_fn: runs in the child before exec."""
+        if self.cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (self.cpu_seconds, self.cpu_seconds))
+        if self.memory_mb:
+            limit = self.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    def _worker_limits(self):
+        """preexec_fn for workers: each forked job sets its own CPU limit."""
+        if self.memory_mb:
+            limit = self.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    async def _run_job(self, job: BacktestJob):
+        job.status = "running"
+        job.started_at = time.monotonic()
+        job.emit({"type": "started", "queued_seconds": round(job.started_at - job.submitted_at, 3)})
+        try:
+            result = await self._execute(job)
+        except asyncio.CancelledError:
+            result = {"status": "cancelled", "error": "Backtest cancelled", "return_code": -1}
+        except Exception as e:
+            result = {"status": "error", "error": str(e), "return_code": -1}
+        finally:
+            self._running.pop(job.id, None)
+            self._dispatch()
+        result["queued_seconds"] = round(job.started_at - job.submitted_at, 3)
+        result["run_seconds"] = round(time.monotonic() - job.started_at, 3)
+        if result["status"] in ("success", "error") and "startup" in result:
+            count_total = self._latency[result["startup"]]
+            count_total[0] += 1
+            count_total[1] += result["run_seconds"]
+        job._finish(result)
+
+    # ---------- warm workers ----------
+
+    def _new_worker(self) -> _Worker:
+        worker = _Worker(self)
+        self._worker_stats["spawned"] += 1
+
+        def spawned(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is None:
+                self._worker_stats["import_seconds_total"] += worker.import_seconds
+        worker.ready.add_done_callback(spawned)
+        return worker
+
+    def _recycle(self, worker: _Worker, reason: str):
+        """Retire a worker and start its replacement in the background."""
+        recycled = self._worker_stats["recycled"]
+        recycled[reason] = recycled.get(reason, 0) + 1
+        task = asyncio.create_task(worker.kill())
+        self._reaping.add(task)
+        task.add_done_callback(self._reaping.discard)
+        if not self._closed:
+            self._idle.append(self._new_worker())
+
+    def _release(self, worker: _Worker, reply: dict):
+        if worker.jobs >= self.worker_max_jobs:
+            self._recycle(worker, "max_jobs")
+        elif self.worker_max_rss_mb and worker.rss_mb > self.worker_max_rss_mb:
+            self._recycle(worker, "memory")
+        else:
+            self._idle.append(worker)
+
+    async def _execute(self, job: BacktestJob) -> dict:
+        if not self.warm_workers:
+            return {**await self._execute_subprocess(job), "startup": "cold"}
+
+        worker = self._idle.pop(0) if self._idle else self._new_worker()
+        startup = "warm" if worker.ready.done() else "cold"
+        try:
+            await worker.ready
+        except asyncio.CancelledError:
+            self._recycle(worker, "cancelled")
+            raise
+        except Exception as e:
+            print(f"[backtest] worker failed to start ({e}), running in a fresh subprocess")
+            self._recycle(worker, "died")
+            return {**await self._execute_subprocess(job), "startup": "cold"}
+
+        try:
+            reply = await asyncio.wait_for(worker.run(job.code, self.cpu_seconds, job.emit), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._recycle(worker, "timeout")
+            return {"status": "timeout", "error": "Backtest execution timed out", "return_code": -1}
+        except WorkerDied as e:
+            self._recycle(worker, "died")
+            return {"status": "error", "error": str(e), "return_code": e.return_code, "startup": startup}
+        except BaseException:
+            self._recycle(worker, "cancelled")
+            raise
+
+        self._release(worker, reply)
+        result = parse_backtest_output(reply["stdout"], reply["stderr"], reply["return_code"])
+        result["startup"] = startup
+        return result
+
+    # ---------- one interpreter per run ----------
+
+    async def _read_stdout(self, job: BacktestJob) -> str:
+        """Collect stdout, turning EVENT_MARKER lines into job events as they arrive."""
+        lines = []
+        async for raw in job._process.stdout:
+            line = raw.decode("utf-8", errors="replace")
+            if line.startswith(EVENT_MARKER):
+                try:
+                    job.emit(json.loads(line[len(EVENT_MARKER):]))
+                    continue
+                except json.JSONDecodeError:
+                    pass
+            lines.append(line)
+        return "".join(lines)
+
+    async def _communicate(self, job: BacktestJob):
+        stdout, stderr, _ = await asyncio.gather(
+            self._read_stdout(job),
+            job._process.stderr.read(),
+            job._process.wait(),
+        )
+        return stdout, stderr
+
+    async def _execute_subprocess(self, job: BacktestJob) -> dict:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as tmp_file:
+            tmp_file.write(job.code)
+            tmp_file_path = tmp_file.name
+
+        try:
+            job._process = await asyncio.create_subprocess_exec(
+                sys.executable, tmp_file_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                preexec_fn=self._limits if resource is not None else None,
+                limit=PROTOCOL_LIMIT,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(self._communicate(job), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                return {"status": "timeout", "error": "Backtest execution timed out", "return_code": -1}
+
+            return parse_backtest_output(
+                stdout,
+                stderr.decode("utf-8", errors="replace"),
+                job._process.returncode,
+            )
+        finally:
+            if job._process is not None and job._process.returncode is None:
+                job._process.kill()
+                await job._process.wait()
+            try:
+                os.unlink(tmp_file_path)
+            except OSError:
+                pass
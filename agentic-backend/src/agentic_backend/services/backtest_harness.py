@@ -0,0 +1,180 @@
+# src/agentic_backend/services/backtest_harness.py
+"""
+Harness that runs generated backtest scripts against the local OHLCV store.
+
+Generated strategies (see api/xample.py) fetch their own data with
+``yf.download(ticker, start=..., end=..., interval=...)``. Instead of rewriting
+that code, a short prelude is prepended to the script: it replaces
+``yfinance.download`` with a function that slices the memory-mapped store file
+and returns a DataFrame in the same layout yfinance uses (auto-adjusted
+Close/High/Low/Open/Volume columns under a Price/Ticker MultiIndex, index named
+"Date"). Requests the store cannot answer fall through to the real download.
+
+For parameter sweeps a second prelude patches ``bt.Cerebro.addstrategy`` so
+the strategy is added with overridden ``params`` values.
+
+For live runs a third prelude patches ``bt.Cerebro.run`` to add an analyzer
+that reports bar progress with equity samples and every closed trade while the
+strategy runs. Events go to ``__backtest_emit__`` when the script runs in a
+warm worker (services/backtest_worker.py puts it in the script globals), or to
+stdout as ``__BACKTEST_EVENT__ {json}`` lines in a plain subprocess.
+"""
+import time
+from typing import Any, Dict, Tuple
+
+from .backtest_executor import EVENT_MARKER
+from .ohlcv_store import OHLCVStore
+
+PRELUDE_TEMPLATE = '''# --- backtest harness: serve yfinance.download from the local OHLCV store ---
+def _harness_install(files):
+    import numpy as np
+    import pandas as pd
+    import yfinance
+
+    real_download = yfinance.download
+
+    def download(tickers=None, start=None, end=None, interval="1d", **kwargs):
+        path = files.get((str(tickers).upper(), interval))
+        if (
+            path is None
+            or kwargs.get("period") is not None
+            or not kwargs.get("auto_adjust", True)
+            or kwargs.get("group_by", "column") != "column"
+        ):
+            return real_download(tickers, start=start, end=end, interval=interval, **kwargs)
+
+        candles = np.load(path, mmap_mode="r")
+        ts = candles[:, 0]
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).timestamp(), side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).timestamp(), side="left"))
+        rows = np.asarray(candles[lo:hi])
+
+        index = pd.DatetimeIndex(pd.to_datetime(rows[:, 0], unit="s"), name="Date")
+        values = rows[:, [4, 2, 3, 1, 5]]  # Close, High, Low, Open, Volume
+        names = ["Close", "High", "Low", "Open", "Volume"]
+        if kwargs.get("multi_level_index", True):
+            columns = pd.MultiIndex.from_product([names, [str(tickers)]], names=["Price", "Ticker"])
+        else:
+            columns = pd.Index(names, name="Price")
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    yfinance.download = download
+
+
+_harness_install({files!r})
+del _harness_install
+# --- end of harness ---
+'''
+
+PARAMS_PRELUDE_TEMPLATE = '''# --- backtest harness: override strategy params ---
+def _harness_params(overrides):
+    import backtrader as bt
+
+    real_addstrategy = bt.Cerebro.addstrategy
+
+    def addstrategy(self, strategy, *args, **kwargs):
+        unknown = sorted(set(overrides) - set(strategy.params._getkeys()))
+        if unknown:
+            raise ValueError(f"{{strategy.__name__}} has no params {{unknown}}")
+        kwargs.update(overrides)
+        return real_addstrategy(self, strategy, *args, **kwargs)
+
+    bt.Cerebro.addstrategy = addstrategy
+
+
+_harness_params({params!r})
+del _harness_params
+# --- end of harness ---
+'''
+
+PROGRESS_PRELUDE_TEMPLATE = '''# --- backtest harness: stream progress, equity and closed trades ---
+def _harness_progress(emit, samples):
+    import sys
+    import json
+    import backtrader as bt
+
+    if emit is None:
+        def emit(event):
+            sys.__stdout__.write("{marker} " + json.dumps(event, default=str) + "\\n")
+            sys.__stdout__.flush()
+
+    class HarnessProgress(bt.Analyzer):
+        def start(self):
+            self.bar = 0
+            self.total = self.strategy.data.buflen()
+            self.every = max(1, self.total // samples)
+
+        def next(self):
+            self.bar += 1
+            if self.bar % self.every == 0 or self.bar == self.total:
+                broker = self.strategy.broker
+                emit({{
+                    "type": "progress",
+                    "bar": self.bar,
+                    "total": self.total,
+                    "date": self.strategy.data.datetime.date(0).isoformat(),
+                    "value": round(broker.getvalue(), 2),
+                    "cash": round(broker.getcash(), 2),
+                }})
+
+        def notify_trade(self, trade):
+            if trade.isclosed:
+                emit({{
+                    "type": "trade",
+                    "entry_date": bt.num2date(trade.dtopen).date().isoformat(),
+                    "exit_date": bt.num2date(trade.dtclose).date().isoformat(),
+                    "entry_price": round(trade.price, 4),
+                    "pnl": round(trade.pnl, 2),
+                    "pnl_net": round(trade.pnlcomm, 2),
+                    "bars": trade.barlen,
+                }})
+
+    real_run = bt.Cerebro.run
+
+    def run(self, *args, **kwargs):
+        self.addanalyzer(HarnessProgress, _name="_harness_progress")
+        return real_run(self, *args, **kwargs)
+
+    bt.Cerebro.run = run
+
+
+_harness_progress(globals().get("__backtest_emit__"), {samples})
+del _harness_progress
+# --- end of harness ---
+'''
+
+
+def build_prelude(files: Dict[Tuple[str, str], str]) -> str:
+    """Prelude serving ``yf.download`` from ``{(TICKER, interval): store path}``."""
+    return PRELUDE_TEMPLATE.format(files={(t.upper(), i): p for (t, i), p in files.items()})
+
+
+def with_params(code: str, params: Dict[str, Any]) -> str:
+    """Prepend a prelude that runs the script's strategy with ``params`` overridden."""
+    return PARAMS_PRELUDE_TEMPLATE.format(params=dict(params)) + "\n" + code
+
+
+def with_progress(code: str, samples: int = 50) -> str:
+    """Prepend a prelude that streams about ``samples`` progress events plus closed trades."""
+    return PROGRESS_PRELUDE_TEMPLATE.format(marker=EVENT_MARKER, samples=int(samples)) + "\n" + code
+
+
+def inject_local_data(code: str, store: OHLCVStore, ticker: str, days: int, interval: str = "1d") -> str:
+    """
+    Refresh the store for ticker/interval and prepend the data prelude to ``code``.
+
+    Blocking (may download missing candles); run it in a worker thread. If the
+    store cannot be refreshed the script is returned unchanged, so it downloads
+    its own data as before.
+    """
+    start = time.perf_counter()
+    try:
+        path = store.update(ticker, interval, days)
+        candles = store.load(ticker, interval)
+        if candles is None or len(candles) == 0:
+            raise ValueError(f"no candles stored for {ticker} {interval}")
+    except Exception as e:
+        print(f"[backtest] OHLCV store unavailable for {ticker} {interval}, script will download: {e}")
+        return code
+    print(f"[backtest] {ticker} {interval}: {len(candles)} local candles ready in {time.perf_counter() - start:.3f}s")
+    return build_prelude({(ticker, interval): path}) + "\n" + code
@@ -0,0 +1,619 @@
+# src/agentic_backend/services/backtest_service.py
+"""
+Backtest request handling shared by the chat backend (api/ws_routes.py) and
+the standalone backtest app (api/main.py).
+
+Both apps serve the same /backtest, /backtest/sweep and /ws/backtest
+endpoints; each builds one BacktestService from its own configuration
+(executors, OHLCV store, strategy cache, OpenAI client) and its endpoints only
+map the results to HTTP. Requests are validated with the same models on every
+path, so a WebSocket client gets the checks a REST client gets.
+
+A backtest request runs on the vectorized engine when it carries a valid
+strategy_spec (falling back to Backtrader only when the data or the engine
+fails), otherwise on generated Backtrader code, cached by request hash
+(services/strategy_cache.py) and run on the bounded executor with progress
+streamed over the websocket. Sweeps run on their own executor so they don't
+starve single backtests.
+"""
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from .backtest_executor import BacktestExecutor, BacktestJob
+from .backtest_harness import inject_local_data, with_progress
+from .backtest_sweep import check_rank_by, expand_grid, run_sweep
+from .ohlcv_store import OHLCVStore
+from .strategy_cache import StrategyCache, make_code_key, current_window
+from .vector_backtest import run_spec_backtest, validate_spec
+
+try:
+    from ..api.xample import EXAMPLE_STRATEGY_CODE1, EXAMPLE_STRATEGY_CODE2
+    from ..models.backtest_models import BacktestRequest, BacktestResponse, SweepRequest, SweepResponse
+except ImportError:  # standalone app (api/main.py): services, api and models are top-level packages
+    from api.xample import EXAMPLE_STRATEGY_CODE1, EXAMPLE_STRATEGY_CODE2
+    from models.backtest_models import BacktestRequest, BacktestResponse, SweepRequest, SweepResponse
+
+
+def describe_errors(error: ValidationError) -> str:
+    """One line per invalid field, e.g. ``days: Input should be less than or equal to 3650``."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'request'}: {e['msg']}" for e in error.errors()
+    )
+
+
+class BacktestService:
+    def __init__(
+        self,
+        client,
+        model: str,
+        backtest_executor: BacktestExecutor,
+        sweep_executor: BacktestExecutor,
+        ohlcv_store: OHLCVStore,
+        strategy_cache: StrategyCache,
+        sweep_max_combinations: int = 64,
+        progress_samples: int = 50,
+    ):
+        self.client = client
+        self.model = model
+        self.backtest_executor = backtest_executor
+        self.sweep_executor = sweep_executor
+        self.ohlcv_store = ohlcv_store
+        self.strategy_cache = strategy_cache
+        self.sweep_max_combinations = sweep_max_combinations
+        self.progress_samples = progress_samples
+        # Part of the code cache key: changing the model or reference examples regenerates code
+        self.prompt_version = f"{model}:" + hashlib.sha256(
+            (EXAMPLE_STRATEGY_CODE1 + EXAMPLE_STRATEGY_CODE2).encode("utf-8")
+        ).hexdigest()[:16]
+
+    async def start(self):
+        # Pre-import backtrader & co. in the worker processes before the first request
+        await self.backtest_executor.start()
+
+    async def close(self):
+        await self.backtest_executor.close()
+        await self.sweep_executor.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backtests": self.backtest_executor.stats(),
+            "ohlcv_store": await asyncio.to_thread(self.ohlcv_store.stats),
+            "strategy_cache": await asyncio.to_thread(self.strategy_cache.stats),
+        }
+
+    # ---------- strategy code ----------
+
+    def generate_strategy_code(self, strategy_description: str, ticker: str = "ETH-USD", days: int = 365) -> str:
+        """Generate Backtrader code for the strategy with the OpenAI model"""
+
+        prompt = f"""
+You are an expert quantitative trading developer. Generate production-ready Python backtesting code using the Backtrader framework.
+
+CRITICAL REQUIREMENTS:
+1. Use the EXACT structure, imports, and coding style from the reference example code provided.
+2. Generate ONLY valid, error-free Python code.
+3. Output ONLY the complete Python script with NO explanations, markdown, or extra text.
+4. Use ticker: {ticker}
+5. Use historical days: {days} and interval: 1d
+6. All indicators used must be configurable via strategy params.
+7. Strategy trading logic must generate multiple trades.
+8. Use notify_trade() or notify_order() to log closed trades.
+9. Use only cerebro.broker.setcommission(commission=0.001).
+10. Set starting cash to 10000.
+11. Add all standard analyzers: TradeAnalyzer, SharpeRatio, DrawDown, Returns, SQN, AvgHoldPeriod.
+12. Output JSON report with markers __JSON_REPORT_START__ and __JSON_REPORT_END__.
+13. NEVER use emoji characters (🚀, 📊, etc.) in print statements - use ASCII text only.
+14. Ensure all code is compatible with Windows cp1252 and UTF-8 encoding.
+
+REFERENCE EXAMPLES:
+Example 1:
+{EXAMPLE_STRATEGY_CODE1}
+
+Example 2:
+{EXAMPLE_STRATEGY_CODE2}
+
+USER STRATEGY:
+{strategy_description}
+
+Generate complete backtesting code now. Output ONLY the code.
+"""
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a professional Python developer specializing in quantitative trading. Generate only valid, executable code."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.2,
+                max_tokens=4000
+            )
+
+            generated_code = response.choices[0].message.content.strip()
+
+            # Remove markdown code blocks if present
+            if generated_code.startswith("```"):
+                generated_code = generated_code.split("```")[1]
+                if generated_code.startswith("python"):
+                    generated_code = generated_code[6:]
+            if generated_code.endswith("```"):
+                generated_code = generated_code[:-3]
+
+            return generated_code.strip()
+
+        except Exception as e:
+            raise Exception(f"Error generating code with OpenAI: {str(e)}")
+
+    async def get_strategy_code(self, strategy_description: str, ticker: str, days: int, use_cache: bool = True):
+        """
+        Generated code for the request as (cache key, code, served from cache).
+        The OpenAI call runs in a worker thread so it doesn't block the event loop.
+        New code is not cached here: see record_strategy_run.
+        """
+        key = make_code_key(strategy_description, ticker, days, self.prompt_version)
+        if use_cache:
+            code = await asyncio.to_thread(self.strategy_cache.get_code, key)
+            if code is not None:
+                return key, code, True
+        code = await asyncio.to_thread(self.generate_strategy_code, strategy_description, ticker, days)
+        return key, code, False
+
+    async def record_strategy_run(self, key: str, code: str, code_cached: bool, window: str, result: dict):
+        """
+        Cache generated code only once it has backtested successfully (with its
+        report). Cached code that fails is dropped, so the next identical request
+        generates it again instead of replaying the failure until the TTL expires.
+        """
+        if result["status"] == "success":
+            if not code_cached:
+                await asyncio.to_thread(self.strategy_cache.set_code, key, code)
+            await asyncio.to_thread(self.strategy_cache.set_report, key, window, result["backtest_results"])
+        elif result["status"] == "error" and code_cached:
+            await asyncio.to_thread(self.strategy_cache.delete_code, key)
+
+    # ---------- single backtests ----------
+
+    @staticmethod
+    def validate(request: BacktestRequest):
+        """A malformed strategy_spec is the caller's error, not a reason to generate code: ValueError."""
+        if request.strategy_spec is not None:
+            try:
+                validate_spec(request.strategy_spec)
+            except ValueError as e:
+                raise ValueError(f"Invalid strategy_spec: {e}") from e
+
+    async def run_spec(self, request: BacktestRequest) -> dict:
+        """
+        Vectorized engine report for a validated strategy_spec. Raises when the
+        data or the engine fails; callers fall back to Backtrader, which may
+        still manage.
+        """
+        return await asyncio.to_thread(
+            run_spec_backtest, request.strategy_spec, self.ohlcv_store, request.ticker, request.days
+        )
+
+    async def backtest(self, request: BacktestRequest) -> BacktestResponse:
+        """Run a validated request to completion (POST /backtest)."""
+        start_time = datetime.now()
+
+        # Simple indicator strategies: vectorized engine, no LLM call or subprocess
+        if request.strategy_spec is not None:
+            try:
+                report = await self.run_spec(request)
+                return BacktestResponse(
+                    status="success",
+                    strategy_description=request.strategy_description,
+                    ticker=request.ticker,
+                    days=request.days,
+                    backtest_results=report,
+                    execution_time=(datetime.now() - start_time).total_seconds(),
+                    engine="vectorized"
+                )
+            except Exception as e:
+                print(f"[backtest] vectorized engine failed, falling back to Backtrader: {e}")
+
+        # Generate code (or reuse it for an identical request)
+        key, generated_code, code_cached = await self.get_strategy_code(
+            request.strategy_description,
+            request.ticker,
+            request.days,
+            request.use_cache
+        )
+
+        # Same code over the same data window: the previous report still holds
+        window = current_window()
+        if request.use_cache and code_cached:
+            report = await asyncio.to_thread(self.strategy_cache.get_report, key, window)
+            if report is not None:
+                return BacktestResponse(
+                    status="success",
+                    strategy_description=request.strategy_description,
+                    ticker=request.ticker,
+                    days=request.days,
+                    backtest_results=report,
+                    generated_code=generated_code,
+                    execution_time=(datetime.now() - start_time).total_seconds(),
+                    cached=True,
+                    code_cached=True
+                )
+
+        # Serve the script's yf.download() from the local OHLCV store
+        backtest_code = await asyncio.to_thread(
+            inject_local_data, generated_code, self.ohlcv_store, request.ticker, request.days
+        )
+
+        # Run backtest (queued on the shared executor, off the event loop)
+        backtest_result = await self.backtest_executor.run(backtest_code)
+
+        execution_time = (datetime.now() - start_time).total_seconds()
+        await self.record_strategy_run(key, generated_code, code_cached, window, backtest_result)
+
+        # Prepare error message with detailed info
+        error_msg = backtest_result.get("error")
+        if not error_msg and backtest_result["status"] == "error":
+            stderr = backtest_result.get("stderr", "")
+            if stderr:
+                error_msg = f"Execution error: {stderr[:500]}"  # Limit error message length
+            else:
+                error_msg = "Backtest failed with unknown error"
+
+        return BacktestResponse(
+            status=backtest_result["status"],
+            strategy_description=request.strategy_description,
+            ticker=request.ticker,
+            days=request.days,
+            backtest_results=backtest_result.get("backtest_results"),
+            generated_code=generated_code,
+            error=error_msg,
+            execution_time=execution_time,
+            code_cached=code_cached
+        )
+
+    # ---------- parameter sweeps ----------
+
+    async def prepare_sweep(self, request: SweepRequest):
+        """
+        Validate the request and expand the grid, then generate the script if
+        needed and point it at the local OHLCV store. Invalid requests raise
+        ValueError before any code is generated.
+        """
+        check_rank_by(request.rank_by)
+        combinations = expand_grid(request.param_grid, self.sweep_max_combinations)
+        generated_code = request.generated_code
+        if not generated_code:
+            if not request.strategy_description:
+                raise ValueError("strategy_description or generated_code is required")
+            _, generated_code, _ = await self.get_strategy_code(request.strategy_description, request.ticker,
+                                                                request.days)
+        # One store refresh for the whole sweep; every run maps the same file
+        backtest_code = await asyncio.to_thread(
+            inject_local_data, generated_code, self.ohlcv_store, request.ticker, request.days
+        )
+        return combinations, generated_code, backtest_code
+
+    async def sweep(self, request: SweepRequest) -> SweepResponse:
+        """
+        Run the strategy once per combination of ``param_grid`` in parallel
+        (POST /backtest/sweep). Invalid requests raise ValueError.
+        """
+        combinations, generated_code, backtest_code = await self.prepare_sweep(request)
+        summary = await run_sweep(self.sweep_executor, backtest_code, combinations, request.rank_by)
+        return SweepResponse(
+            status="success" if summary["succeeded"] else "error",
+            ticker=request.ticker,
+            days=request.days,
+            generated_code=generated_code,
+            **summary
+        )
+
+    # ---------- /ws/backtest ----------
+
+    async def stream(self, websocket: WebSocket):
+        """
+        /ws/backtest on an accepted websocket: streams code generation and
+        backtest results, or sweep results with ``"mode": "sweep"``.
+        """
+        try:
+            # Receive backtest request
+            data = await websocket.receive_json()
+
+            if isinstance(data, dict) and data.get("mode") == "sweep":
+                await self.stream_sweep(websocket, data)
+                return
+
+            try:
+                request = BacktestRequest.model_validate(data)
+                self.validate(request)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "message": f"Invalid request: {describe_errors(e)}"})
+                await websocket.close()
+                return
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                await websocket.close()
+                return
+
+            await self.stream_backtest(websocket, request)
+
+            # Keep connection open briefly then close
+            await asyncio.sleep(1)
+            await websocket.close()
+
+        except WebSocketDisconnect:
+            print("Client disconnected")
+        except Exception as e:
+            try:
+                await websocket.send_json({
+                    "type": "error",
+                    "message": f"Unexpected error: {str(e)}"
+                })
+                await websocket.close()
+            except:
+                pass
+
+    async def stream_backtest(self, websocket: WebSocket, request: BacktestRequest):
+        # Simple indicator strategies: vectorized engine, no LLM call or subprocess
+        if request.strategy_spec is not None:
+            try:
+                report = await self.run_spec(request)
+                await websocket.send_json({
+                    "type": "backtest_complete",
+                    "message": "Backtest completed successfully",
+                    "progress": 100,
+                    "data": {
+                        "status": "success",
+                        "strategy_description": request.strategy_description,
+                        "ticker": request.ticker,
+                        "days": request.days,
+                        "backtest_results": report,
+                        "engine": "vectorized",
+                        "run_seconds": report["engine"]["seconds"]
+                    }
+                })
+                return
+            except Exception as e:
+                print(f"[backtest] vectorized engine failed, falling back to Backtrader: {e}")
+                await websocket.send_json({
+                    "type": "status",
+                    "message": f"Vectorized engine failed ({e}), using Backtrader",
+                    "progress": 5
+                })
+
+        # Send acknowledgment
+        await websocket.send_json({
+            "type": "status",
+            "message": "Generating strategy code...",
+            "progress": 10
+        })
+
+        # Generate code (or reuse it for an identical request)
+        try:
+            key, generated_code, code_cached = await self.get_strategy_code(
+                request.strategy_description, request.ticker, request.days, request.use_cache
+            )
+
+            # Send generated code
+            await websocket.send_json({
+                "type": "code_generated",
+                "message": "Strategy code loaded from cache" if code_cached else "Strategy code generated successfully",
+                "progress": 40,
+                "data": {
+                    "generated_code": generated_code,
+                    "code_length": len(generated_code),
+                    "cached": code_cached
+                }
+            })
+
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Code generation failed: {str(e)}"
+            })
+            return
+
+        # Same code over the same data window: the previous report still holds
+        window = current_window()
+        report = None
+        if request.use_cache and code_cached:
+            report = await asyncio.to_thread(self.strategy_cache.get_report, key, window)
+        if report is not None:
+            await websocket.send_json({
+                "type": "backtest_complete",
+                "message": "Backtest loaded from cache",
+                "progress": 100,
+                "data": {
+                    "status": "success",
+                    "strategy_description": request.strategy_description,
+                    "ticker": request.ticker,
+                    "days": request.days,
+                    "backtest_results": report,
+                    "engine": "backtrader",
+                    "cached": True
+                }
+            })
+            return
+
+        # Run backtest: queue position and start are streamed until it finishes
+        try:
+            backtest_code = await asyncio.to_thread(
+                inject_local_data, generated_code, self.ohlcv_store, request.ticker, request.days
+            )
+            job = self.backtest_executor.submit(with_progress(backtest_code, self.progress_samples))
+            backtest_result = await self.stream_backtest_job(websocket, job)
+
+            await self.record_strategy_run(key, generated_code, code_cached, window, backtest_result)
+
+            # Send backtest results
+            if backtest_result["status"] == "success":
+                message_text = "Backtest completed successfully"
+            elif backtest_result["status"] == "cancelled":
+                message_text = "Backtest cancelled"
+            else:
+                message_text = f"Backtest failed: {backtest_result.get('error', 'Unknown error')}"
+            await websocket.send_json({
+                "type": "backtest_complete",
+                "message": message_text,
+                "progress": 100,
+                "data": {
+                    "status": backtest_result["status"],
+                    "strategy_description": request.strategy_description,
+                    "ticker": request.ticker,
+                    "days": request.days,
+                    "backtest_results": backtest_result.get("backtest_results"),
+                    "error": backtest_result.get("error"),
+                    "stderr": backtest_result.get("stderr") if backtest_result.get("stderr") else None,
+                    "return_code": backtest_result.get("return_code"),
+                    "queued_seconds": backtest_result.get("queued_seconds"),
+                    "run_seconds": backtest_result.get("run_seconds"),
+                    "equity_curve": backtest_result.get("equity_curve"),
+                    "engine": "backtrader",
+                    "cached": False
+                }
+            })
+
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Backtest execution failed: {str(e)}"
+            })
+
+    async def stream_backtest_job(self, websocket: WebSocket, job: BacktestJob) -> dict:
+        """
+        Forward queue/run events of a backtest job to the websocket until it finishes.
+        The client may send {"action": "cancel"} at any time to cancel the job.
+
+        Scripts run with the progress prelude also stream bar progress and closed
+        trades; the progress samples are returned as ``equity_curve`` in the result.
+        """
+        async def listen_for_cancel():
+            try:
+                while True:
+                    msg = await websocket.receive_json()
+                    if isinstance(msg, dict) and msg.get("action") == "cancel":
+                        job.cancel()
+                        return
+            except WebSocketDisconnect:
+                # Nobody is waiting for the result any more; free the worker
+                job.cancel()
+            except Exception:
+                pass
+
+        listener = asyncio.create_task(listen_for_cancel())
+        equity_curve = []
+        try:
+            while True:
+                event = await job.events.get()
+                if event["type"] == "done":
+                    break
+                if event["type"] == "queued":
+                    await websocket.send_json({
+                        "type": "queued",
+                        "message": f"Waiting for a backtest worker (position {event['position']})",
+                        "job_id": job.id,
+                        "position": event["position"],
+                        "progress": 60
+                    })
+                elif event["type"] == "started":
+                    await websocket.send_json({
+                        "type": "status",
+                        "message": "Running backtest...",
+                        "job_id": job.id,
+                        "progress": 60
+                    })
+                elif event["type"] == "progress":
+                    equity_curve.append({"date": event["date"], "value": event["value"]})
+                    await websocket.send_json({
+                        "type": "progress",
+                        "message": f"Backtest bar {event['bar']}/{event['total']}",
+                        "job_id": job.id,
+                        "progress": 60 + int(35 * event["bar"] / max(event["total"], 1)),
+                        "data": {k: event[k] for k in ("bar", "total", "date", "value", "cash")}
+                    })
+                elif event["type"] == "trade":
+                    await websocket.send_json({
+                        "type": "trade",
+                        "job_id": job.id,
+                        "data": {k: v for k, v in event.items() if k not in ("type", "job_id")}
+                    })
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+        result = await job.result()
+        result["equity_curve"] = equity_curve
+        return result
+
+    async def stream_sweep(self, websocket: WebSocket, data: dict):
+        """
+        Sweep mode of /ws/backtest: stream every finished run with the ranking so
+        far, then the final ranking. {"action": "cancel"} stops the sweep.
+        """
+        try:
+            request = SweepRequest.model_validate(data)
+            combinations, generated_code, backtest_code = await self.prepare_sweep(request)
+        except ValidationError as e:
+            await websocket.send_json({"type": "error", "message": f"Sweep setup failed: {describe_errors(e)}"})
+            await websocket.close()
+            return
+        except Exception as e:
+            await websocket.send_json({"type": "error", "message": f"Sweep setup failed: {str(e)}"})
+            await websocket.close()
+            return
+
+        await websocket.send_json({
+            "type": "sweep_started",
+            "message": f"Running {len(combinations)} parameter combinations...",
+            "progress": 40,
+            "data": {"combinations": len(combinations), "generated_code": generated_code}
+        })
+
+        async def on_result(entry, ranking):
+            done = len(ranking)
+            await websocket.send_json({
+                "type": "sweep_result",
+                "message": f"Finished {done}/{len(combinations)}",
+                "progress": 40 + int(60 * done / len(combinations)),
+                "data": {"result": entry, "completed": done, "total": len(combinations), "top": ranking[:10]}
+            })
+
+        sweep = asyncio.create_task(
+            run_sweep(self.sweep_executor, backtest_code, combinations, request.rank_by, on_result)
+        )
+
+        async def listen_for_cancel():
+            try:
+                while True:
+                    msg = await websocket.receive_json()
+                    if isinstance(msg, dict) and msg.get("action") == "cancel":
+                        sweep.cancel()
+                        return
+            except WebSocketDisconnect:
+                sweep.cancel()
+            except Exception:
+                pass
+
+        listener = asyncio.create_task(listen_for_cancel())
+        try:
+            summary = await sweep
+            await websocket.send_json({
+                "type": "sweep_complete",
+                "message": f"Sweep completed: {summary['succeeded']}/{summary['combinations']} runs succeeded",
+                "progress": 100,
+                "data": {"ticker": request.ticker, "days": request.days, **summary}
+            })
+        except asyncio.CancelledError:
+            if not sweep.cancelled():
+                raise
+            await websocket.send_json({"type": "sweep_cancelled", "message": "Sweep cancelled"})
+        except Exception as e:
+            await websocket.send_json({"type": "error", "message": f"Sweep failed: {str(e)}"})
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+
+        await asyncio.sleep(1)
+        await websocket.close()
@@ -0,0 +1,142 @@
+# src/agentic_backend/services/backtest_sweep.py
+"""
+Parameter sweeps over one generated backtest script.
+
+Every generated strategy exposes its knobs through the Backtrader ``params``
+tuple. A sweep expands a grid of values for those params, runs the same script
+once per combination on a BacktestExecutor (one subprocess per combination, up
+to the executor's concurrency) and ranks the reports as they come in. All runs
+read the same memory-mapped OHLCV store file, so the data is downloaded once
+and shared through the page cache.
+
+Only depends on the standard library and sibling services so the standalone
+backtest app (api/main.py) can use it.
+"""
+import asyncio
+import itertools
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .backtest_executor import BacktestExecutor
+from .backtest_harness import with_params
+
+# Summary fields where a smaller value ranks higher
+LOWER_IS_BETTER = {"max_drawdown"}
+RANKABLE = {
+    "final_value", "total_return_pct", "sharpe_ratio", "max_drawdown",
+    "cumulative_returns", "winning_trades", "sqn",
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def check_rank_by(rank_by: str):
+    if rank_by not in RANKABLE:
+        raise ValueError(f"rank_by must be one of {sorted(RANKABLE)}")
+
+
+def _values(spec) -> List[Any]:
+    """A list of values, or {"start", "stop", "step"} with an inclusive stop."""
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError("Parameter value lists must not be empty")
+        return spec
+    if isinstance(spec, dict) and "start" in spec and "stop" in spec:
+        start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+        if not all(_is_number(v) for v in (start, stop, step)):
+            raise ValueError(f"Range start, stop and step must be numbers: {spec}")
+        if step <= 0 or stop < start:
+            raise ValueError(f"Invalid range: {spec}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [start + i * step for i in range(count)]
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return values
+        return [round(v, 10) for v in values]
+    raise ValueError(f"Parameter values must be a list or a start/stop/step range, got {spec!r}")
+
+
+def expand_grid(param_grid: Dict[str, Any], max_combinations: int) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of a params grid, e.g.
+    {"ema_fast": [5, 9], "ema_slow": {"start": 20, "stop": 40, "step": 10}}.
+    """
+    if not isinstance(param_grid, dict) or not param_grid:
+        raise ValueError("param_grid must map at least one strategy param to its values")
+    names = list(param_grid)
+    axes = [_values(param_grid[name]) for name in names]
+    total = math.prod(len(axis) for axis in axes)
+    if total > max_combinations:
+        raise ValueError(f"param_grid expands to {total} combinations (max {max_combinations})")
+    return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+
+def _score(entry: Dict[str, Any], rank_by: str) -> float:
+    value = (entry.get("summary") or {}).get(rank_by)
+    if entry["status"] != "success" or value is None:
+        return float("-inf")
+    return -value if rank_by in LOWER_IS_BETTER else value
+
+
+def rank_results(results: List[Dict[str, Any]], rank_by: str) -> List[Dict[str, Any]]:
+    """Best first; failed runs and runs without the metric go last."""
+    ranked = sorted(results, key=lambda entry: _score(entry, rank_by), reverse=True)
+    for rank, entry in enumerate(ranked, start=1):
+        entry["rank"] = rank
+    return ranked
+
+
+async def run_sweep(
+    executor: BacktestExecutor,
+    code: str,
+    combinations: List[Dict[str, Any]],
+    rank_by: str = "total_return_pct",
+    on_result: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Run ``code`` once per params combination and rank the results.
+
+    ``on_result(entry, ranking)`` is awaited after every finished run with the
+    ranking so far. Cancelling the caller cancels every queued/running job.
+    """
+    check_rank_by(rank_by)
+    start = time.perf_counter()
+    jobs = {executor.submit(with_params(code, params)): params for params in combinations}
+    results: List[Dict[str, Any]] = []
+
+    async def wait(job):
+        return job, await job.result()
+
+    try:
+        for finished in asyncio.as_completed([wait(job) for job in jobs]):
+            job, result = await finished
+            report = result.get("backtest_results") or {}
+            entry = {
+                "params": jobs[job],
+                "status": result["status"],
+                "summary": report.get("summary"),
+                "error": result.get("error"),
+                "run_seconds": result.get("run_seconds"),
+            }
+            results.append(entry)
+            ranking = rank_results(results, rank_by)
+            if on_result is not None:
+                await on_result(entry, ranking)
+    finally:
+        for job in jobs:
+            if not job.done():
+                job.cancel()
+
+    wall = time.perf_counter() - start
+    run_total = sum(entry["run_seconds"] or 0 for entry in results)
+    return {
+        "rank_by": rank_by,
+        "combinations": len(combinations),
+        "succeeded": sum(1 for entry in results if entry["status"] == "success"),
+        "wall_seconds": round(wall, 3),
+        "run_seconds_total": round(run_total, 3),
+        "speedup": round(run_total / wall, 2) if wall > 0 else None,
+        "results": rank_results(results, rank_by),
+    }
@@ -0,0 +1,182 @@
+# src/agentic_backend/services/backtest_worker.py
+"""
+Pre-warmed backtest worker, started by BacktestExecutor as
+``python backtest_worker.py <module> ...``.
+
+The worker imports the heavy libraries once, reports how long that took, then
+forks one child per backtest script sent by the parent. The child inherits the
+imported modules (copy-on-write), runs the script and exits; the worker itself
+never executes script code, so every job starts from the same clean state and
+nothing a script does (monkeypatching, threads, open files, globals, child
+processes) outlives it. Protocol: one JSON object per line.
+
+    worker → parent  {"type": "ready", "import_seconds": 2.4}
+    parent → worker  {"code": "...", "cpu_seconds": 300}
+    worker → parent  {"type": "started", "pid": 4242}
+    worker → parent  {"type": "event", "event": {...}}     (zero or more)
+    worker → parent  {"type": "result", "stdout": "...", "stderr": "...",
+                      "return_code": 0, "rss_mb": 212.5}
+
+Each job child runs in its own process group under a fresh CPU-time rlimit of
+``cpu_seconds`` (the address-space limit is inherited from the worker) and
+hands its result back through a temporary file. When it exits, the worker
+kills whatever is left in its process group and sends the result, or an error
+result if the child died first (CPU limit, out of memory, a signal).
+``rss_mb`` is the worker's own memory, which only changes with the preloads.
+
+Scripts run in fresh globals with stdout/stderr captured, so the output looks
+like a subprocess run to parse_backtest_output(). Scripts can stream events
+through ``__backtest_emit__(event)`` in their globals (see the progress prelude
+in services/backtest_harness.py). The protocol stream is a private duplicate
+of fd 1; fd 1 itself is pointed at stderr so stray C-level writes cannot
+corrupt it. Standard library only; runs as a plain script on POSIX (fork).
+"""
+import io
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import linecache
+import importlib
+import traceback
+import contextlib
+
+try:
+    import resource
+except ImportError:  # no rlimits
+    resource = None
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0.0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _limit_cpu(seconds):
+    """
+    Cap the CPU time of this freshly forked process (a child starts at zero):
+    SIGXCPU past ``seconds``, SIGKILL a second later if the script ignores it.
+    """
+    if resource is None or not seconds:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(seconds) + 1 if hard == resource.RLIM_INFINITY else min(int(seconds) + 1, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (min(int(seconds), limit), limit))
+
+
+def run_job(code: str, job_number: int, emit) -> dict:
+    filename = f"<backtest-{job_number}>"
+    # Let tracebacks show source lines of the script
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    return_code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(
+                compile(code, filename, "exec"),
+                {"__name__": "__main__", "__file__": filename, "__backtest_emit__": emit},
+            )
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                return_code = e.code
+            elif e.code is not None:
+                print(e.code, file=sys.stderr)
+                return_code = 1
+        except BaseException:
+            traceback.print_exc()
+            return_code = 1
+    return {
+        "type": "result",
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "return_code": return_code,
+    }
+
+
+def _died(status: int) -> dict:
+    """Result for a job child that exited without reporting."""
+    if os.WIFSIGNALED(status):
+        return_code = -os.WTERMSIG(status)
+        if return_code == -getattr(signal, "SIGXCPU", 0):
+            error = "Backtest exceeded its CPU time limit"
+        else:
+            error = f"Backtest process killed by signal {-return_code}"
+    else:
+        return_code = os.WEXITSTATUS(status) or 1
+        error = f"Backtest process exited with code {return_code} without a report"
+    return {"type": "result", "stdout": "", "stderr": error, "return_code": return_code}
+
+
+def fork_job(request: dict, job_number: int, send) -> dict:
+    """Run one job in a forked child and return its result."""
+    fd, result_path = tempfile.mkstemp(prefix="backtest-result-", suffix=".json")
+    os.close(fd)
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.setpgid(0, 0)
+            # The worker stays silent until this child exits, so only one process writes
+            send({"type": "started", "pid": os.getpid()})
+            _limit_cpu(request.get("cpu_seconds"))
+            result = run_job(request["code"], job_number, lambda event: send({"type": "event", "event": event}))
+            with open(result_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, default=str)
+            status = 0
+        finally:
+            os._exit(status)
+
+    try:
+        os.setpgid(pid, pid)  # also set here, so the kill below cannot miss it
+    except OSError:
+        pass
+    try:
+        _, status = os.waitpid(pid, 0)
+        try:
+            os.killpg(pid, signal.SIGKILL)  # processes the script left behind
+        except OSError:
+            pass
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+            with open(result_path, encoding="utf-8") as f:
+                return json.load(f)
+        return _died(status)
+    finally:
+        os.unlink(result_path)
+
+
+def main():
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    start = time.perf_counter()
+    for name in sys.argv[1:]:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[backtest-worker] could not preload {name}: {e}", file=sys.stderr)
+
+    def send(message: dict):
+        protocol.write(json.dumps(message, default=str) + "\n")
+        protocol.flush()
+
+    send({"type": "ready", "import_seconds": round(time.perf_counter() - start, 3)})
+
+    job_number = 0
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job_number += 1
+        result = fork_job(json.loads(line), job_number, send)
+        send({**result, "rss_mb": round(_rss_mb(), 1)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# src/agentic_backend/services/ohlcv_store.py
+"""
+Local OHLCV store for backtests.
+
+Candles are kept as one NumPy ``.npy`` file per (ticker, interval) with rows of
+``[timestamp, open, high, low, close, volume]`` (timestamp = candle open, Unix
+seconds UTC). Files are opened memory-mapped, so a backtest subprocess reads
+only the pages it touches. ``update()`` downloads from yfinance only the
+candles that are missing at the head or tail of the stored range and appends
+them; the file is swapped in atomically so running readers keep their mapping.
+
+Only depends on numpy/pandas (yfinance is imported lazily for refreshes) so
+both the main app and the standalone backtest app (api/main.py) can use it.
+"""
+import os
+import re
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# yfinance interval → candle length in seconds
+INTERVAL_SECONDS = {
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1wk": 7 * 24 * 60 * 60,
+}
+
+
+def _today() -> datetime:
+    now = datetime.now(timezone.utc)
+    return datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+
+
+class OHLCVStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._stats = {"refreshes": 0, "up_to_date": 0, "candles_fetched": 0, "fetch_seconds": 0.0}
+
+    def path(self, ticker: str, interval: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper())
+        return os.path.join(self.root, f"{safe}_{interval}.npy")
+
+    def _lock(self, ticker: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((ticker.upper(), interval), threading.Lock())
+
+    def load(self, ticker: str, interval: str = "1d") -> Optional[np.ndarray]:
+        """Memory-mapped candles for ticker/interval, or None if nothing is stored."""
+        path = self.path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def window(self, ticker: str, interval: str = "1d", days: int = 365) -> np.ndarray:
+        """Stored candles from ``days`` days ago up to (not including) today, as the scripts request them."""
+        candles = self.load(ticker, interval)
+        if candles is None:
+            return np.empty((0, 6))
+        end = _today()
+        start = end - timedelta(days=days)
+        lo, hi = np.searchsorted(candles[:, 0], [start.timestamp(), end.timestamp()])
+        return np.asarray(candles[lo:hi])
+
+    def update(self, ticker: str, interval: str = "1d", days: int = 365) -> str:
+        """
+        Make sure the store covers the last ``days`` days of closed candles and
+        return the file path. Blocking (network); run it in a worker thread.
+        """
+        step = INTERVAL_SECONDS.get(interval)
+        if step is None:
+            raise ValueError(f"Unsupported interval for the OHLCV store: {interval}")
+
+        end = _today()
+        start = end - timedelta(days=days)
+        with self._lock(ticker, interval):
+            stored = self.load(ticker, interval)
+            parts = []
+            if stored is None or len(stored) == 0:
+                parts.append(self._fetch(ticker, interval, start, end))
+            else:
+                first, last = stored[0, 0], stored[-1, 0]
+                # Calendar gaps (weekends for equities) are fine: only refetch when
+                # the requested window starts at least one candle before the data.
+                if start.timestamp() < first - step:
+                    parts.append(self._fetch(ticker, interval, start, datetime.fromtimestamp(first, timezone.utc)))
+                parts.append(np.asarray(stored))
+                if last + 2 * step <= end.timestamp():
+                    parts.append(self._fetch(ticker, interval, datetime.fromtimestamp(last + step, timezone.utc), end))
+
+            if stored is not None and len(stored) and len(parts) == 1:
+                self._stats["up_to_date"] += 1
+                return self.path(ticker, interval)
+
+            merged = np.concatenate(parts)
+            # Drop overlapping candles and keep rows sorted by timestamp
+            _, keep = np.unique(merged[:, 0], return_index=True)
+            self._write(ticker, interval, merged[keep])
+        return self.path(ticker, interval)
+
+    def _fetch(self, ticker: str, interval: str, start: datetime, end: datetime) -> np.ndarray:
+        import yfinance as yf
+
+        t0 = time.perf_counter()
+        df = yf.download(
+            ticker,
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+            interval=interval,
+            auto_adjust=True,
+            progress=False,
+        )
+        self._stats["refreshes"] += 1
+        self._stats["fetch_seconds"] += time.perf_counter() - t0
+        if df is None or df.empty:
+            return np.empty((0, 6))
+        if df.columns.nlevels > 1:
+            df = df.xs(df.columns.get_level_values(1)[0], axis=1, level=1)
+
+        index = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+        candles = np.column_stack([
+            index.asi8 // 10**9,
+            df["Open"].to_numpy(),
+            df["High"].to_numpy(),
+            df["Low"].to_numpy(),
+            df["Close"].to_numpy(),
+            df["Volume"].to_numpy(),
+        ]).astype(np.float64)
+        candles = candles[~np.isnan(candles[:, 1:5]).any(axis=1)]
+        self._stats["candles_fetched"] += len(candles)
+        return candles
+
+    def _write(self, ticker: str, interval: str, candles: np.ndarray):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(ticker, interval)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(candles, dtype=np.float64))
+        os.replace(tmp, path)
+
+    def stats(self) -> dict:
+        files = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                if not name.endswith(".npy"):
+                    continue
+                arr = np.load(os.path.join(self.root, name), mmap_mode="r")
+                files.append({
+                    "file": name,
+                    "candles": int(arr.shape[0]),
+                    "first": datetime.fromtimestamp(arr[0, 0], timezone.utc).isoformat() if len(arr) else None,
+                    "last": datetime.fromtimestamp(arr[-1, 0], timezone.utc).isoformat() if len(arr) else None,
+                })
+        return {**self._stats, "root": self.root, "files": files}
@@ -1,7 +1,12 @@
+import time
+import uuid
 import asyncio
+from typing import Any, Dict, List
 from langgraph.graph import StateGraph, END
-from ..models.state_models import SupervisorState
-from ..agents.supervisor import supervisor_node
+from langgraph.types import Send
+from ..config import settings
+from ..models.state_models import SupervisorState, AgentState, TradeExecution
+from ..agents.supervisor import supervisor_node, fanout_supervisor_node, agent_node_name
 from ..agents.finance import financial_agent_node
 from ..agents.websearch import websearch_agent_node
 from ..agents.news_sentiment import news_sentiment_agent_node
@@ -12,28 +17,165 @@ checkpointer = InMemorySaver()
 
 _graph: StateGraph = None
 _app = None
+_fanout_app = None
+
+AGENT_NODES = {
+    "finance_agent": financial_agent_node,
+    "websearch_agent": websearch_agent_node,
+    "sentiment_agent": news_sentiment_agent_node,
+    "trade_agent": trade_agent_node,
+}
+
+# Latency saved by dispatching agents together (fan-out graph)
+_fanout_metrics: Dict[str, float] = {
+    "parallel_steps": 0,
+    "agents_dispatched": 0,
+    "agent_seconds": 0.0,
+    "wall_seconds": 0.0,
+    "supervisor_calls_saved": 0,
+}
+
 
 # Router function
 def router(state: SupervisorState):
     if state.current_task is None:
         return "END"
-    sel = state.decisions[-1].selected_agent.lower().replace(" ", "_")
-    if sel in ("finance_agent", "financeagent", "finance", "crypto_price_agent", "cryptopriceagent", "crypto"):
-        return "finance_agent"
-    if sel in ("websearch_agent", "websearch", "websearchagent"):
-        return "websearch_agent"
-    if sel in ("sentiment_agent", "news_sentiment_agent", "sentimentagent", "newsentiment"):
-        return "sentiment_agent"
-    if sel in ("trade_agent", "tradeagent", "trade", "trading"):
-        return "trade_agent"
-    return "END"
-
-
-def build_graph():
+    return agent_node_name(state.decisions[-1].selected_agent)
+
+
+def fanout_router(state: SupervisorState):
+    """Send every task of the current step to its agent node; they run in the same superstep."""
+    if state.current_task is None:
+        return END
+    step = state.decisions[-1].step
+    sends = []
+    for index, pending in enumerate(state.pending_tasks):
+        node = agent_node_name(pending["agent"])
+        if node == "END":
+            print(f"[fan-out] unknown agent '{pending['agent']}', skipped")
+            continue
+        # Only what an agent reads: its task, the context so far and the user
+        sends.append(Send(node, {
+            "task": pending["task"],
+            "context": dict(state.context),
+            "user_query": state.user_query,
+            "user_detail": state.user_detail,
+            "step": step,
+            "index": index,
+            "agent": node,
+        }))
+    return sends or END
+
+
+def _branch(agent_fn):
+    """
+    Wrap an agent node for the fan-out graph. The agent runs on a small state
+    built from the Send payload and only reports what it added, so branches
+    never write the same channel.
+    """
+    async def run(payload: Dict[str, Any]) -> Dict[str, Any]:
+        state = SupervisorState(
+            user_query=payload["user_query"],
+            user_detail=payload["user_detail"],
+            context=payload["context"],
+            current_task=payload["task"],
+        )
+        started = time.time()
+        state = await agent_fn(state)
+        finished = time.time()
+        return {"branch_results": [{
+            "branch_id": uuid.uuid4().hex,
+            "step": payload["step"],
+            "index": payload["index"],
+            "agent": payload["agent"],
+            "agent_states": [a.model_dump() for a in state.agent_states],
+            "trade_executions": [t.model_dump() for t in state.trade_executions],
+            "started": started,
+            "finished": finished,
+        }]}
+    return run
+
+
+def join_node(state: SupervisorState) -> Dict[str, Any]:
+    """Fold the results of one fan-out step into the state, in dispatch order."""
+    step = state.decisions[-1].step if state.decisions else 0
+    results: List[Dict[str, Any]] = sorted(
+        (r for r in state.branch_results if r["step"] == step), key=lambda r: r["index"]
+    )
+    for r in results:
+        for agent_state in r["agent_states"]:
+            state.add_agent_state(agent_state["agent_name"], AgentState(**agent_state))
+        state.trade_executions.extend(TradeExecution(**t) for t in r["trade_executions"])
+
+    update: Dict[str, Any] = {
+        "agent_states": state.agent_states,
+        "context": state.context,
+        "trade_executions": state.trade_executions,
+        "current_task": None,
+        "pending_tasks": [],
+        "branch_results": None,
+    }
+    if results:
+        agent_seconds = sum(r["finished"] - r["started"] for r in results)
+        wall_seconds = max(r["finished"] for r in results) - min(r["started"] for r in results)
+        entry = {
+            "step": step,
+            "agents": [r["agent"] for r in results],
+            "wall_seconds": round(wall_seconds, 3),
+            "agent_seconds": round(agent_seconds, 3),
+            "seconds_saved": round(max(agent_seconds - wall_seconds, 0.0), 3),
+        }
+        update["parallel_steps"] = state.parallel_steps + [entry]
+        m = _fanout_metrics
+        m["parallel_steps"] += 1
+        m["agents_dispatched"] += len(results)
+        m["agent_seconds"] += agent_seconds
+        m["wall_seconds"] += wall_seconds
+        # A sequential run needs one supervisor decision per agent
+        m["supervisor_calls_saved"] += len(results) - 1
+        print(f"[fan-out] step {step}: {entry['agents']} in {wall_seconds:.2f}s (sequential {agent_seconds:.2f}s)")
+    return update
+
+
+def fanout_metrics() -> Dict[str, float]:
+    """Agent time vs wall-clock time of fan-out steps; ``seconds_saved`` is the difference."""
+    m = _fanout_metrics
+    return {
+        **m,
+        "seconds_saved": max(m["agent_seconds"] - m["wall_seconds"], 0.0),
+    }
+
+
+def build_fanout_graph():
+    """
+    Graph variant where the supervisor can dispatch several independent agents
+    in one step. Each runs as a parallel branch (LangGraph ``Send``); the join
+    node merges their outputs before the supervisor decides again.
+    """
+    global _fanout_app
+    if _fanout_app is None:
+        g = StateGraph(SupervisorState)
+        g.add_node("supervisor", fanout_supervisor_node)
+        for name, agent_fn in AGENT_NODES.items():
+            g.add_node(name, _branch(agent_fn))
+            g.add_edge(name, "join")
+        g.add_node("join", join_node)
+        g.set_entry_point("supervisor")
+        g.add_conditional_edges("supervisor", fanout_router, [*AGENT_NODES, END])
+        g.add_edge("join", "supervisor")
+        _fanout_app = g.compile(checkpointer=checkpointer)
+
+    return _fanout_app
+
+
+def build_graph(fanout: bool = False):
     """
     Build and cache the graph once, using the persistent checkpointer.
+    ``fanout=True`` returns the parallel fan-out variant instead.
     """
     global  _graph, _app
+    if fanout:
+        return build_fanout_graph()
     if _app is None:
         g = StateGraph(SupervisorState)
         g.add_node("supervisor", supervisor_node)
@@ -69,6 +211,7 @@ async def run_sync(state: SupervisorState, thread_id: str,**kwargs):
     Execute the graph step-by-step and yield intermediate states.
     To fetch user_id : 
     ``` user_id=kwargs.get("user_id")```
+    ``fanout=True`` runs the fan-out graph (default: SUPERVISOR_FANOUT).
     """
     print(kwargs.get("user_id"))
 
@@ -76,13 +219,24 @@ async def run_sync(state: SupervisorState, thread_id: str,**kwargs):
     # print("=============================")
     # print(checkpointer.get_tuple(config))
     # print("==============================")
-    app = build_graph()
-    final_state = None
-    
-
-    async for s in app.astream(state, config):
-        yield s
-        final_state = s
+    fanout = kwargs.get("fanout", settings.SUPERVISOR_FANOUT)
+    app = build_graph(fanout)
+    if not fanout:
+        async for s in app.astream(state, config):
+            yield s
+        return
+
+    # Fan-out nodes return partial updates (branch results, the join's merge);
+    # yield {node: full state} like the sequential graph so consumers can treat
+    # every chunk the same way
+    ran: List[str] = []
+    async for mode, chunk in app.astream(state, config, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            ran.extend(chunk)
+        elif ran:
+            for node in ran:
+                yield {node: chunk}
+            ran = []
 
 
 
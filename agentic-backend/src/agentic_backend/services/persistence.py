@@ -1,5 +1,8 @@
 # src/agentic_backend/services/persistence.py
 import os, json
+import base64
+import sqlite3
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
@@ -12,33 +15,122 @@ from ..models.state_models import SupervisorState
 RUN_DIR = Path(settings.RUN_SAVE_DIR)
 RUN_DIR.mkdir(parents=True, exist_ok=True)
 
-# Memory DB file path
-MEMORY_DB_PATH = RUN_DIR / "memory.json"
+# Memory DB file paths
+MEMORY_DB_PATH = RUN_DIR / "memory.sqlite"
+LEGACY_MEMORY_JSON_PATH = RUN_DIR / "memory.json"
 
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
 
-def _load_memory_db() -> Dict[str, Dict[str, Dict[str, Any]]]:
-    """Load the entire memory database from JSON file."""
-    # Create file if it doesn't exist
-    if not MEMORY_DB_PATH.exists():
-        MEMORY_DB_PATH.write_text("{}")
-        return {}
 
+def _now() -> str:
+    return datetime.now(ZoneInfo("Europe/London")).isoformat()
+
+
+def _epoch(iso: str) -> float:
     try:
-        with open(MEMORY_DB_PATH, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        # If file is corrupted, reset it
-        MEMORY_DB_PATH.write_text("{}")
-        return {}
+        return datetime.fromisoformat(iso).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
 
+def _connect() -> sqlite3.Connection:
+    """Return this thread's connection to the memory DB, creating the schema on first use."""
+    global _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        MEMORY_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(MEMORY_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                _create_schema(conn)
+                _import_legacy_json(conn)
+                _initialized = True
+    return conn
 
-def _save_memory_db(db: Dict[str, Dict[str, Dict[str, Any]]]):
-    """Save the entire memory database to JSON file."""
-    # Ensure directory exists before writing
-    MEMORY_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(MEMORY_DB_PATH, "w") as f:
-        json.dump(db, f, indent=2)
+def _create_schema(conn: sqlite3.Connection):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS threads (
+            user_id TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            request_summary TEXT NOT NULL DEFAULT '',
+            response_summary TEXT NOT NULL DEFAULT '',
+            last_updated TEXT NOT NULL,
+            updated_at REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, thread_id)
+        );
+        CREATE TABLE IF NOT EXISTS conversation_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            entry TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_thread
+            ON conversation_entries (user_id, thread_id, id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """)
+    # updated_at (epoch seconds) orders thread listings; last_updated strings
+    # carry a DST-dependent offset and don't sort chronologically.
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(threads)").fetchall()]
+    if "updated_at" not in columns:
+        conn.execute("ALTER TABLE threads ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+        rows = conn.execute("SELECT user_id, thread_id, last_updated FROM threads").fetchall()
+        conn.executemany(
+            "UPDATE threads SET updated_at = ? WHERE user_id = ? AND thread_id = ?",
+            [(_epoch(last_updated), user_id, thread_id) for user_id, thread_id, last_updated in rows],
+        )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_threads_user_recent "
+        "ON threads (user_id, updated_at DESC, thread_id DESC)"
+    )
+
+
+def _import_legacy_json(conn: sqlite3.Connection):
+    """One-time import of the old whole-file runs/memory.json store."""
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone():
+        return
+    db: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    if LEGACY_MEMORY_JSON_PATH.exists():
+        try:
+            with open(LEGACY_MEMORY_JSON_PATH, "r") as f:
+                db = json.load(f)
+        except json.JSONDecodeError:
+            db = {}
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for user_id, threads in db.items():
+            for thread_id, data in threads.items():
+                last_updated = data.get("last_updated", _now())
+                conn.execute(
+                    "INSERT OR IGNORE INTO threads VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        user_id,
+                        thread_id,
+                        data.get("request_summary", ""),
+                        data.get("response_summary", ""),
+                        last_updated,
+                        _epoch(last_updated),
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO conversation_entries (user_id, thread_id, entry) VALUES (?, ?, ?)",
+                    [(user_id, thread_id, json.dumps(e, default=str)) for e in data.get("raw_conversation", [])],
+                )
+        conn.execute("INSERT INTO meta VALUES ('legacy_json_imported', ?)", (_now(),))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
 
 def get_thread_memory(user_id: str, thread_id: str) -> Optional[Dict[str, Any]]:
@@ -49,11 +141,27 @@ def get_thread_memory(user_id: str, thread_id: str) -> Optional[Dict[str, Any]]:
         {
             "request_summary": str,
             "response_summary": str,
-            "raw_conversation": List[Dict]
+            "raw_conversation": List[Dict],
+            "last_updated": str
         }
     """
-    db = _load_memory_db()
-    return db.get(user_id, {}).get(thread_id)
+    conn = _connect()
+    row = conn.execute(
+        "SELECT request_summary, response_summary, last_updated FROM threads WHERE user_id = ? AND thread_id = ?",
+        (user_id, thread_id),
+    ).fetchone()
+    if row is None:
+        return None
+    entries = conn.execute(
+        "SELECT entry FROM conversation_entries WHERE user_id = ? AND thread_id = ? ORDER BY id",
+        (user_id, thread_id),
+    ).fetchall()
+    return {
+        "request_summary": row[0],
+        "response_summary": row[1],
+        "raw_conversation": [json.loads(e[0]) for e in entries],
+        "last_updated": row[2],
+    }
 
 
 def update_thread_memory(
@@ -73,58 +181,156 @@ def update_thread_memory(
         response_summary: Summary of agent responses (optional, will append if provided)
         conversation_entry: Single conversation turn to append to raw_conversation
     """
-    db = _load_memory_db()
-    print(db)
-    # Initialize user if not exists
-    print(user_id not in db)
-    if user_id not in db:
-        db[user_id] = {}
-    
-    # Initialize thread if not exists
-    if thread_id not in db[user_id]:
-        db[user_id][thread_id] = {
-            "request_summary": "",
-            "response_summary": "",
-            "raw_conversation": [],
-            "last_updated": datetime.now(ZoneInfo("Europe/London")).isoformat()
-        }
+    update_thread_memory_batch([{
+        "user_id": user_id,
+        "thread_id": thread_id,
+        "request_summary": request_summary,
+        "response_summary": response_summary,
+        "conversation_entry": conversation_entry,
+    }])
 
-    thread_data = db[user_id][thread_id]
 
-    # Update summaries (append if provided)
-    if request_summary:
-        current = thread_data["request_summary"]
-        thread_data["request_summary"] = f"{current}\n{request_summary}".strip() if current else request_summary
+def update_thread_memory_batch(updates: List[Dict[str, Any]]):
+    """
+    Apply several update_thread_memory() calls in one transaction.
+
+    Each update is a dict of update_thread_memory() keyword arguments.
+    """
+    conn = _connect()
 
-    if response_summary:
-        current = thread_data["response_summary"]
-        thread_data["response_summary"] = f"{current}\n{response_summary}".strip() if current else response_summary
+    # Single transaction so concurrent sessions never lose each other's writes
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for update in updates:
+            _apply_update(conn, **update)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
-    # Append conversation entry
-    if conversation_entry:
-        thread_data["raw_conversation"].append({
-            **conversation_entry,
-            "timestamp": datetime.now(ZoneInfo("Europe/London")).isoformat()
-        })
 
-    # Update last_updated timestamp
-    thread_data["last_updated"] = datetime.now(ZoneInfo("Europe/London")).isoformat()
+def _apply_update(
+    conn: sqlite3.Connection,
+    user_id: str,
+    thread_id: str,
+    request_summary: Optional[str] = None,
+    response_summary: Optional[str] = None,
+    conversation_entry: Optional[Dict[str, Any]] = None
+):
+    now = _now()
+    updated_at = _epoch(now)
+    conn.execute(
+        "INSERT OR IGNORE INTO threads (user_id, thread_id, last_updated, updated_at) VALUES (?, ?, ?, ?)",
+        (user_id, thread_id, now, updated_at),
+    )
+
+    # Update summaries (append if provided)
+    conn.execute(
+        """
+        UPDATE threads SET
+            request_summary = CASE
+                WHEN ? IS NULL OR ? = '' THEN request_summary
+                WHEN request_summary = '' THEN ?
+                ELSE trim(request_summary || char(10) || ?, ' ' || char(9, 10, 13)) END,
+            response_summary = CASE
+                WHEN ? IS NULL OR ? = '' THEN response_summary
+                WHEN response_summary = '' THEN ?
+                ELSE trim(response_summary || char(10) || ?, ' ' || char(9, 10, 13)) END,
+            last_updated = ?,
+            updated_at = ?
+        WHERE user_id = ? AND thread_id = ?
+        """,
+        (
+            request_summary, request_summary, request_summary, request_summary,
+            response_summary, response_summary, response_summary, response_summary,
+            now, updated_at, user_id, thread_id,
+        ),
+    )
 
-    _save_memory_db(db)
+    # Append conversation entry
+    if conversation_entry:
+        conn.execute(
+            "INSERT INTO conversation_entries (user_id, thread_id, entry) VALUES (?, ?, ?)",
+            (user_id, thread_id, json.dumps({**conversation_entry, "timestamp": now}, default=str)),
+        )
 
 
 def clear_thread_memory(user_id: str, thread_id: str):
     """Clear memory for a specific thread."""
-    db = _load_memory_db()
-    if user_id in db and thread_id in db[user_id]:
-        del db[user_id][thread_id]
-        _save_memory_db(db)
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM conversation_entries WHERE user_id = ? AND thread_id = ?", (user_id, thread_id))
+        conn.execute("DELETE FROM threads WHERE user_id = ? AND thread_id = ?", (user_id, thread_id))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
 
 def get_user_threads(user_id: str) -> List[str]:
     """Get all thread IDs for a user."""
-    db = _load_memory_db()
-    return list(db.get(user_id, {}).keys())
+    conn = _connect()
+    rows = conn.execute("SELECT thread_id FROM threads WHERE user_id = ? ORDER BY rowid", (user_id,)).fetchall()
+    return [r[0] for r in rows]
+
+
+def _encode_cursor(updated_at: float, thread_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([updated_at, thread_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        updated_at, thread_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(updated_at), str(thread_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_user_threads(
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    preview_chars: int = 200
+) -> Dict[str, Any]:
+    """
+    List a user's threads, most recently updated first, without loading conversations.
+
+    Args:
+        user_id: User identifier
+        limit: Page size
+        cursor: ``next_cursor`` from the previous page (None for the first page)
+        preview_chars: Length of the request_summary preview
+
+    Returns:
+        {
+            "threads": [{"thread_id": str, "request_summary": str, "last_updated": str}],
+            "next_cursor": Optional[str]
+        }
+    """
+    conn = _connect()
+    query = (
+        "SELECT thread_id, substr(request_summary, 1, ?), last_updated, updated_at "
+        "FROM threads WHERE user_id = ?"
+    )
+    params: List[Any] = [preview_chars, user_id]
+    if cursor:
+        updated_at, thread_id = _decode_cursor(cursor)
+        query += " AND (updated_at < ? OR (updated_at = ? AND thread_id < ?))"
+        params += [updated_at, updated_at, thread_id]
+    query += " ORDER BY updated_at DESC, thread_id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = conn.execute(query, params).fetchall()
+    page = rows[:limit]
+    next_cursor = _encode_cursor(page[-1][3], page[-1][0]) if len(rows) > limit else None
+    return {
+        "threads": [
+            {"thread_id": r[0], "request_summary": r[1], "last_updated": r[2]}
+            for r in page
+        ],
+        "next_cursor": next_cursor,
+    }
 
 
 # Legacy functions for backward compatibility
@@ -0,0 +1,101 @@
+# src/agentic_backend/services/strategy_cache.py
+"""
+Content-addressed cache for generated strategy code and backtest reports.
+
+Code generation is keyed by a hash of the normalized request (description with
+case and whitespace folded, ticker, days) plus a prompt version, so editing the
+prompt or the reference examples invalidates old code. Reports are keyed by the
+code key plus the data window: generated scripts backtest [today - days,
+today), so a report stays valid until the date changes. Callers only store
+code after it backtested successfully and delete it when a cached copy fails.
+
+Entries live in a SQLite file under RUN_SAVE_DIR, expire after ``ttl`` seconds
+and the total payload size is capped; least recently used entries are evicted
+first (utils/sqlite_cache.py).
+
+Only depends on the standard library so the standalone backtest app
+(api/main.py) can use it.
+"""
+import json
+import time
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    from ..utils.sqlite_cache import SQLiteLRUCache
+except ImportError:  # standalone app (api/main.py): services and utils are top-level packages
+    from utils.sqlite_cache import SQLiteLRUCache
+
+
+def normalize_description(description: str) -> str:
+    return " ".join(description.lower().split())
+
+
+def make_code_key(description: str, ticker: str, days: int, version: str = "") -> str:
+    raw = json.dumps([normalize_description(description), ticker.strip().upper(), int(days), version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def current_window() -> str:
+    """Identifies the data window generated scripts use (they end at datetime.today())."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class StrategyCache(SQLiteLRUCache):
+    TABLES = {"strategy_cache": "key"}
+    EXPIRING = ("strategy_cache",)
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        super().__init__(path, max_bytes, [
+            "CREATE TABLE IF NOT EXISTS strategy_cache ("
+            " key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)",
+        ])
+        self.ttl = ttl
+
+    def _get(self, kind: str, key: str) -> Optional[Any]:
+        return self._get_json("strategy_cache", f"{kind}:{key}", counter=f"{kind}_")
+
+    def _set(self, kind: str, key: str, value: Any):
+        payload = json.dumps(value, default=str)
+        self._put("strategy_cache", {
+            "key": f"{kind}:{key}", "kind": kind, "value": payload, "size": len(payload),
+            "expires_at": time.time() + self.ttl,
+        })
+
+    # ---------- generated code ----------
+
+    def get_code(self, key: str) -> Optional[str]:
+        return self._get("code", key)
+
+    def set_code(self, key: str, code: str):
+        self._set("code", key, code)
+
+    def delete_code(self, key: str):
+        """Drop code that failed to run, and the reports made with it."""
+        with self._lock:
+            self._conn.execute("DELETE FROM strategy_cache WHERE key = ? OR key LIKE ?",
+                               (f"code:{key}", f"report:{key}:%"))
+
+    # ---------- backtest reports ----------
+
+    def get_report(self, key: str, window: str) -> Optional[Dict[str, Any]]:
+        return self._get("report", f"{key}:{window}")
+
+    def set_report(self, key: str, window: str, report: Dict[str, Any]):
+        self._set("report", f"{key}:{window}", report)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = self._counters()
+            by_kind = {
+                kind: {"entries": entries, "bytes": size}
+                for kind, entries, size in self._conn.execute(
+                    "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM strategy_cache GROUP BY kind"
+                ).fetchall()
+            }
+        stats = {"evictions": counters.get("evictions", 0), "max_bytes": self.max_bytes, "ttl": self.ttl}
+        for kind in ("code", "report"):
+            stats[kind] = {**self._hit_rate(counters, f"{kind}_"), **by_kind.get(kind, {"entries": 0, "bytes": 0})}
+        return stats
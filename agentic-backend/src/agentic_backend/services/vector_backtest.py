@@ -0,0 +1,345 @@
+# src/agentic_backend/services/vector_backtest.py
+"""
+Vectorized backtest engine for simple indicator strategies.
+
+Instead of generating a Backtrader script, a strategy can be described by a
+declarative spec:
+
+    {
+        "indicators": {
+            "fast": {"type": "ema", "period": 9},
+            "slow": {"type": "ema", "period": 15}
+        },
+        "entry": {"all": [{"left": "fast", "op": "crosses_above", "right": "slow"}]},
+        "exit":  {"any": [{"left": "fast", "op": "crosses_below", "right": "slow"}]},
+        "cash": 10000,
+        "commission": 0.001,
+        "size": 1
+    }
+
+Operands are indicator names, price fields (open/high/low/close/volume) or
+numbers. Supported indicators: sma, ema, rsi (Wilder), rsi_sma (Cutler).
+Supported ops: >, <, >=, <=, crosses_above, crosses_below.
+
+Indicators and rule masks are computed with NumPy over the whole series; only
+the (few) bars that carry a signal are walked to build trades. The semantics
+follow the Backtrader scripts in api/xample.py, so both engines report the same
+numbers: long only, fixed size, market orders filled at the next bar's open,
+no signals before every indicator is warmed up, and commission charged on both
+legs. The report has the same shape as the __JSON_REPORT_START__ block.
+
+Only depends on numpy and the OHLCV store so the standalone backtest app (api/main.py) can use it.
+"""
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ohlcv_store import OHLCVStore
+
+PRICE_FIELDS = {"open": 1, "high": 2, "low": 3, "close": 4, "volume": 5}
+COMPARISONS = {
+    ">": np.greater,
+    "<": np.less,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+}
+TRADING_DAYS = 252.0  # Backtrader's annualisation factor for daily returns
+RISK_FREE_RATE = 0.01  # SharpeRatio default
+
+
+# ---------- indicators (seeded like Backtrader's) ----------
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        csum = np.cumsum(np.insert(x, 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def _smoothed(x: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Exponential smoothing seeded with the SMA of the first ``period`` values."""
+    out = np.full(len(x), np.nan)
+    seed = period - 1
+    if len(x) <= seed:
+        return out
+    prev = x[:period].mean()
+    out[seed] = prev
+    for i in range(seed + 1, len(x)):
+        prev = prev + alpha * (x[i] - prev)
+        out[i] = prev
+    return out
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    return _smoothed(x, period, 2.0 / (period + 1))
+
+
+def _rsi(x: np.ndarray, period: int, average) -> np.ndarray:
+    diff = np.diff(x)
+    up = average(np.where(diff > 0, diff, 0.0), period)
+    down = average(np.where(diff < 0, -diff, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(down == 0, 100.0, 100.0 - 100.0 / (1.0 + up / down))
+    return np.r_[np.nan, out]
+
+
+def rsi(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's RSI (bt.indicators.RSI)."""
+    return _rsi(x, period, lambda v, p: _smoothed(v, p, 1.0 / p))
+
+
+def rsi_sma(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """Cutler's RSI (bt.indicators.RSI_SMA)."""
+    return _rsi(x, period, sma)
+
+
+INDICATORS = {
+    # type → (function, default period, warm-up bars beyond period - 1)
+    "sma": (sma, 20, 0),
+    "ema": (ema, 20, 0),
+    "rsi": (rsi, 14, 1),
+    "rsi_sma": (rsi_sma, 14, 1),
+}
+
+
+# ---------- spec ----------
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_spec(spec: Dict[str, Any]):
+    """Raise ValueError if the spec is malformed or uses anything this engine does not support."""
+    if not isinstance(spec, dict):
+        raise ValueError("strategy_spec must be an object")
+    indicators = spec.get("indicators", {})
+    if not isinstance(indicators, dict):
+        raise ValueError("'indicators' must map names to indicator objects")
+    for name, ind in indicators.items():
+        if name in PRICE_FIELDS:
+            raise ValueError(f"Indicator name '{name}' shadows a price field")
+        if not isinstance(ind, dict):
+            raise ValueError(f"Indicator '{name}' must be an object with a 'type'")
+        if ind.get("type") not in INDICATORS:
+            raise ValueError(f"Unsupported indicator type: {ind.get('type')}")
+        period = ind.get("period", INDICATORS[ind["type"]][1])
+        if not isinstance(period, int) or isinstance(period, bool) or period < 1:
+            raise ValueError(f"Indicator '{name}' needs a positive integer period")
+        if ind.get("source", "close") not in PRICE_FIELDS:
+            raise ValueError(f"Indicator '{name}' source must be one of {sorted(PRICE_FIELDS)}")
+    for side in ("entry", "exit"):
+        rules = spec.get(side)
+        if not isinstance(rules, dict) or not (rules.get("all") or rules.get("any")):
+            raise ValueError(f"'{side}' needs a non-empty 'all' or 'any' list of conditions")
+        conditions = []
+        for group in ("all", "any"):
+            if not isinstance(rules.get(group, []), list):
+                raise ValueError(f"'{side}.{group}' must be a list of conditions")
+            conditions += rules.get(group, [])
+        for cond in conditions:
+            if not isinstance(cond, dict):
+                raise ValueError(f"Conditions must be objects with 'left', 'op' and 'right', got {cond!r}")
+            if cond.get("op") not in COMPARISONS and cond.get("op") not in ("crosses_above", "crosses_below"):
+                raise ValueError(f"Unsupported operator: {cond.get('op')}")
+            for operand in (cond.get("left"), cond.get("right")):
+                if not _is_number(operand) and not (
+                    isinstance(operand, str) and (operand in indicators or operand in PRICE_FIELDS)
+                ):
+                    raise ValueError(f"Unknown operand: {operand!r}")
+    for field in ("cash", "size"):
+        if field in spec and not (_is_number(spec[field]) and spec[field] > 0):
+            raise ValueError(f"'{field}' must be a positive number")
+    if "commission" in spec and not (_is_number(spec["commission"]) and 0 <= spec["commission"] < 1):
+        raise ValueError("'commission' must be a fraction between 0 and 1")
+
+
+def _series(operand, candles: np.ndarray, values: Dict[str, np.ndarray]) -> np.ndarray:
+    if isinstance(operand, (int, float)):
+        return np.full(len(candles), float(operand))
+    if operand in values:
+        return values[operand]
+    return candles[:, PRICE_FIELDS[operand]]
+
+
+def _condition(cond: Dict[str, Any], candles: np.ndarray, values: Dict[str, np.ndarray]) -> np.ndarray:
+    left = _series(cond["left"], candles, values)
+    right = _series(cond["right"], candles, values)
+    op = cond["op"]
+    with np.errstate(invalid="ignore"):
+        if op in COMPARISONS:
+            return COMPARISONS[op](left, right)
+        prev_left = np.roll(left, 1)
+        prev_right = np.roll(right, 1)
+        prev_left[0] = prev_right[0] = np.nan
+        if op == "crosses_above":
+            return (left > right) & (prev_left <= prev_right)
+        return (left < right) & (prev_left >= prev_right)
+
+
+def _rule(rules: Dict[str, Any], candles: np.ndarray, values: Dict[str, np.ndarray]) -> np.ndarray:
+    mask = np.ones(len(candles), dtype=bool) if rules.get("all") else np.zeros(len(candles), dtype=bool)
+    for cond in rules.get("all", []):
+        mask &= _condition(cond, candles, values)
+    for cond in rules.get("any", []):
+        mask |= _condition(cond, candles, values)
+    return mask
+
+
+# ---------- engine ----------
+
+def _sharpe(values: np.ndarray, timestamps: np.ndarray, initial: float) -> Optional[float]:
+    """Backtrader SharpeRatio defaults: yearly returns, 1% risk-free rate, population stddev."""
+    years = np.array([datetime.fromtimestamp(t, timezone.utc).year for t in timestamps])
+    year_end = np.r_[years[1:] != years[:-1], True]
+    closes = values[year_end]
+    returns = closes / np.r_[initial, closes[:-1]] - 1.0
+    excess = [float(r) - RISK_FREE_RATE for r in returns]
+    avg = sum(excess) / len(excess)
+    std = math.sqrt(sum((r - avg) ** 2 for r in excess) / len(excess))
+    try:
+        return avg / std
+    except ZeroDivisionError:
+        return None
+
+
+def _sqn(pnls: List[float]) -> Optional[float]:
+    if len(pnls) <= 1:
+        return 0
+    avg = sum(pnls) / len(pnls)
+    std = math.sqrt(sum((p - avg) ** 2 for p in pnls) / len(pnls))
+    try:
+        return math.sqrt(len(pnls)) * avg / std
+    except ZeroDivisionError:
+        return None
+
+
+def _date(ts: float):
+    return datetime.fromtimestamp(ts, timezone.utc).date()
+
+
+def run_vector_backtest(spec: Dict[str, Any], candles: np.ndarray) -> Dict[str, Any]:
+    """
+    Backtest ``spec`` over ``candles`` (rows of [timestamp, open, high, low,
+    close, volume], see services/ohlcv_store.py). Returns the report dict.
+    """
+    validate_spec(spec)
+    start = time.perf_counter()
+    candles = np.asarray(candles, dtype=np.float64)
+    n = len(candles)
+    if n < 2:
+        raise ValueError("Not enough candles to backtest")
+    cash0 = float(spec.get("cash", 10000))
+    commission = float(spec.get("commission", 0.001))
+    size = float(spec.get("size", 1))
+    ts, opens, closes = candles[:, 0], candles[:, 1], candles[:, 4]
+
+    values = {}
+    warmup = 0
+    for name, ind in spec.get("indicators", {}).items():
+        func, default_period, extra = INDICATORS[ind["type"]]
+        period = int(ind.get("period", default_period))
+        source = candles[:, PRICE_FIELDS[ind.get("source", "close")]]
+        values[name] = func(source, period)
+        warmup = max(warmup, period - 1 + extra)
+
+    entry = _rule(spec["entry"], candles, values)
+    exit_ = _rule(spec["exit"], candles, values)
+    entry[:warmup] = exit_[:warmup] = False
+    # An order placed on the last bar never fills
+    entry[-1] = exit_[-1] = False
+
+    # Walk only the signal bars: if flat and entry → buy, elif long and exit → sell
+    cash = cash0
+    in_position = False
+    fills: List[Tuple[int, int]] = []  # (bar index of fill, +1 buy / -1 sell)
+    entry_fill = None
+    pnls, trades = [], []
+    for i in np.flatnonzero(entry | exit_):
+        fill = i + 1
+        price = opens[fill]
+        if not in_position and entry[i]:
+            cost = price * size
+            if cost + cost * commission > cash:
+                continue  # broker rejects the order (not enough cash)
+            cash -= cost + cost * commission
+            in_position, entry_fill = True, fill
+            fills.append((fill, 1))
+        elif in_position and exit_[i]:
+            entry_price = opens[entry_fill]
+            entry_comm = entry_price * size * commission
+            exit_comm = price * size * commission
+            cash += price * size - exit_comm
+            in_position = False
+            fills.append((fill, -1))
+
+            gross = (price - entry_price) * size
+            net = gross - entry_comm - exit_comm
+            pnls.append(float(net))
+            entry_date, exit_date = _date(ts[entry_fill]), _date(ts[fill])
+            trades.append({
+                "Entry Date": entry_date.strftime("%Y-%m-%d"),
+                "Exit Date": exit_date.strftime("%Y-%m-%d"),
+                "Entry Price": round(float(entry_price), 4),
+                "Exit Price": round(float(price), 4),
+                "Size": round(size, 6),
+                "PnL": round(float(gross), 2),
+                "PnL (Net)": round(float(net), 2),
+                "Commission": round(float(entry_comm + exit_comm), 2),
+                "Duration (Days)": (exit_date - entry_date).days,
+                "Direction": "Long"
+            })
+
+    # Equity curve: cash and holdings change only at fills
+    cash_delta = np.zeros(n)
+    pos_delta = np.zeros(n)
+    for fill, side in fills:
+        price = opens[fill] * size
+        cash_delta[fill] -= side * price + price * commission
+        pos_delta[fill] += side * size
+    equity = cash0 + np.cumsum(cash_delta) + np.cumsum(pos_delta) * closes
+
+    final_value = float(equity[-1])
+    peaks = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max(100.0 * (peaks - equity) / peaks))
+    ratio = final_value / cash0
+    rtot = math.log(ratio) if ratio > 0 else float("-inf")
+    ravg = rtot / n
+    cumulative = math.expm1(ravg * TRADING_DAYS) if ravg > float("-inf") else ravg
+    won = sum(1 for p in pnls if p >= 0)
+
+    return {
+        "summary": {
+            "initial_value": cash0,
+            "final_value": final_value,
+            "total_return_pct": round((final_value - cash0) / cash0 * 100, 2),
+            "sharpe_ratio": _sharpe(equity, ts, cash0),
+            "max_drawdown": max_drawdown,
+            "cumulative_returns": cumulative,
+            "total_trades": len(pnls) + int(in_position),
+            "winning_trades": won,
+            "losing_trades": len(pnls) - won,
+            "sqn": _sqn(pnls),
+            "avg_holding_days": sum(t["Duration (Days)"] for t in trades) / len(trades) if trades else 0
+        },
+        "trades": trades,
+        "engine": {
+            "name": "vectorized",
+            "bars": n,
+            "seconds": round(time.perf_counter() - start, 6),
+        },
+    }
+
+
+def run_spec_backtest(spec: Dict[str, Any], store: OHLCVStore, ticker: str, days: int, interval: str = "1d") -> Dict[str, Any]:
+    """
+    Refresh the store and backtest ``spec`` over the last ``days`` days.
+    Blocking; run it in a worker thread. Callers validate the spec first
+    (validate_spec) so any other error is a data or engine failure.
+    """
+    validate_spec(spec)
+    store.update(ticker, interval, days)
+    return run_vector_backtest(spec, store.window(ticker, interval, days))
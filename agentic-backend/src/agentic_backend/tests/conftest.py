@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Importing the agents builds chat models (no request is made) and the API
+# modules open their SQLite files under RUN_SAVE_DIR: keep both out of the way
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("RUN_SAVE_DIR", tempfile.mkdtemp(prefix="agentic-tests-"))
+
+# The MCP servers run as scripts and import their siblings by module name
+SERVERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp", "servers")
+if SERVERS_DIR not in sys.path:
+    sys.path.append(SERVERS_DIR)
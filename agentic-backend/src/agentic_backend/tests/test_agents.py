@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import ToolNode
+
+from agentic_backend.agents import registry
+
+
+def sleepy_tool(name, log):
+    async def lookup(symbol: str):
+        log.append(("start", name))
+        await asyncio.sleep(0.1)
+        log.append(("end", name))
+        return f"{name} {symbol}", {"symbol": symbol}
+
+    return StructuredTool.from_function(coroutine=lookup, name=name, description=name,
+                                        response_format="content_and_artifact")
+
+
+def tool_turn(names):
+    return {"messages": [AIMessage(content="", tool_calls=[
+        {"name": name, "args": {"symbol": "ETH"}, "id": f"call-{name}"} for name in names
+    ])]}
+
+
+async def run_turn(names, limit):
+    log = []
+    node = ToolNode([registry.TimedTool(sleepy_tool(name, log)) for name in names])
+    token = registry._tool_slots.set(asyncio.Semaphore(limit))
+    try:
+        result = await node.ainvoke(tool_turn(names))
+    finally:
+        registry._tool_slots.reset(token)
+    return result["messages"], log
+
+
+def test_timed_tool_stamps_tool_messages():
+    messages, _ = asyncio.run(run_turn(["price"], 1))
+    [message] = messages
+    assert message.content == "price ETH"
+    assert message.artifact == {"symbol": "ETH"}
+    assert message.tool_call_id == "call-price"
+    assert message.response_metadata["tool_timing"]["seconds"] >= 0.1
+
+
+@pytest.mark.parametrize("limit, overlap", [(1, False), (3, True)])
+def test_run_semaphore_bounds_concurrent_tool_calls(limit, overlap):
+    messages, log = asyncio.run(run_turn(["price", "rsi", "macd"], limit))
+    assert len(messages) == 3
+    # One at a time means every start is followed by its own end
+    sequential = all(log[i][0] == "start" and log[i + 1] == ("end", log[i][1]) for i in range(0, len(log), 2))
+    assert sequential is not overlap
+
+
+def test_concurrent_first_uses_compile_an_agent_once(monkeypatch):
+    calls = []
+
+    async def slow_get_tools(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return []
+
+    class StubLLM:
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    monkeypatch.setattr(registry, "get_tools", slow_get_tools)
+    monkeypatch.setattr(registry, "_specs", {"stub_agent": (StubLLM(), "stub_tools", False)})
+    monkeypatch.setattr(registry, "_agents", {})
+    monkeypatch.setattr(registry, "_build_locks", {})
+    monkeypatch.setattr(registry, "create_react_agent", lambda *args, **kwargs: object())
+    monkeypatch.setitem(registry._metrics, "stub_agent", {"builds": 0, "build_seconds": 0.0})
+
+    async def first_uses():
+        return await asyncio.gather(*(registry.get_agent("stub_agent") for _ in range(3)))
+
+    agents = asyncio.run(first_uses())
+    assert calls == ["stub_tools"]
+    assert agents[0] is agents[1] is agents[2]
+    assert registry._metrics["stub_agent"]["builds"] == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from article_cache import ArticleCache, is_near_duplicate, simhash
+
+STORY = (
+    "Ether climbed 4% on Tuesday as spot ETF inflows hit their highest level since launch, "
+    "with traders pointing to a shrinking exchange supply and renewed demand from treasuries. "
+    "Analysts at two desks said the move above the 200-day average could extend if funding "
+    "rates stay neutral, though options markets still price elevated volatility into Friday's "
+    "expiry. Bitcoin traded flat while smaller tokens lagged the broader market rally."
+)
+OTHER = (
+    "The central bank left rates unchanged and signalled patience, citing sticky services "
+    "inflation and a cooling labour market. Bond yields fell across the curve after the "
+    "decision while the dollar weakened against most majors in afternoon trading."
+)
+
+
+def distance(a: str, b: str) -> int:
+    return bin(simhash(a) ^ simhash(b)).count("1")
+
+
+def test_simhash_is_a_stable_64_bit_fingerprint():
+    assert simhash(STORY) == simhash(STORY)
+    assert 0 <= simhash(STORY) < 1 << 64
+    # Case and punctuation don't count
+    assert simhash(STORY) == simhash(STORY.upper().replace(",", "").replace(".", " "))
+
+
+def test_syndicated_copy_is_a_near_duplicate():
+    copy = STORY.replace("Tuesday", "Wednesday") + " Reporting by Reuters."
+    assert is_near_duplicate(simhash(STORY), simhash(copy), distance=12)
+    assert distance(STORY, copy) < distance(STORY, OTHER)
+
+
+def test_different_stories_are_not_duplicates():
+    assert not is_near_duplicate(simhash(STORY), simhash(OTHER))
+    assert distance(STORY, OTHER) > 12
+
+
+def test_texts_shorter_than_a_shingle_are_hashed():
+    assert simhash("ether") == simhash("Ether!")
+    assert simhash("") == simhash("")
+
+
+def test_is_near_duplicate_counts_differing_bits():
+    assert is_near_duplicate(0b1011, 0b1011, distance=0)
+    assert is_near_duplicate(0b1011, 0b0010, distance=2)
+    assert not is_near_duplicate(0b1011, 0b0100, distance=3)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArticleCache(str(tmp_path / "article_cache.sqlite"), max_bytes=1 << 20, fresh_seconds=3600)
+
+
+def test_entries_go_stale_and_carry_their_validators(cache):
+    cache.set("https://example.com/a", "text", etag='"v1"', last_modified="Tue, 01 Oct 2024 10:00:00 GMT")
+    entry = cache.get("https://example.com/a")
+    assert (entry["text"], entry["fresh"]) == ("text", True)
+    assert cache.validators(entry) == {"If-None-Match": '"v1"', "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT"}
+
+    cache.fresh_seconds = 0
+    assert cache.get("https://example.com/a")["fresh"] is False
+    assert cache.get("https://example.com/missing") is None
+
+
+def test_scores_are_cached_by_key(cache):
+    assert cache.get_score("k") is None
+    cache.set_score("k", {"sentiment": "bullish", "score": 0.7})
+    assert cache.get_score("k") == {"sentiment": "bullish", "score": 0.7}
+    stats = cache.stats()
+    assert stats["score_hit_rate"] == 0.5
@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+import pytest
+
+from agentic_backend.services.async_persistence import AsyncThreadStore, FlusherStopped
+
+
+def user():
+    return f"user-{uuid.uuid4().hex[:8]}"
+
+
+def test_writes_are_read_back_after_the_flush():
+    async def run():
+        store = AsyncThreadStore(max_queue=8, batch_size=4, flush_interval=0.01)
+        user_id = user()
+        await store.update_thread_memory(user_id, "t1", request_summary="hello")
+        memory = await store.get_thread_memory(user_id, "t1")
+        await store.close()
+        return memory, store.metrics()
+
+    memory, metrics = asyncio.run(run())
+    assert memory["request_summary"] == "hello"
+    assert (metrics["enqueued"], metrics["flushed"], metrics["failed"]) == (1, 1, 0)
+
+
+def test_a_broken_batch_fails_its_writes_and_the_flusher_keeps_going(monkeypatch):
+    async def run():
+        store = AsyncThreadStore(max_queue=8, batch_size=4, flush_interval=0.01)
+        write_batch = store._write_batch
+
+        async def broken(batch):
+            monkeypatch.setattr(store, "_write_batch", write_batch)
+            raise KeyError("bookkeeping")
+
+        monkeypatch.setattr(store, "_write_batch", broken)
+        user_id = user()
+        with pytest.raises(KeyError):
+            await store.update_thread_memory(user_id, "t1", request_summary="lost", wait=True)
+        assert not store._flusher.done()
+        await store.update_thread_memory(user_id, "t1", request_summary="kept", wait=True)
+        memory = await store.get_thread_memory(user_id, "t1")
+        await store.close()
+        return memory
+
+    assert asyncio.run(run())["request_summary"] == "kept"
+
+
+def test_writes_held_by_a_stopped_flusher_fail_and_the_next_write_restarts_it():
+    async def run():
+        # Long interval: the writes sit in the flusher's batch when it stops
+        store = AsyncThreadStore(max_queue=8, batch_size=4, flush_interval=60)
+        user_id = user()
+        futures = [await store.update_thread_memory(user_id, "t1", request_summary=str(i)) for i in range(2)]
+        await asyncio.sleep(0.05)  # both taken, waiting for more
+        store._flusher.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 1)
+        assert store._pending == {}
+
+        store.flush_interval = 0.01
+        await asyncio.wait_for(store.update_thread_memory(user_id, "t1", request_summary="after", wait=True), 1)
+        memory = await store.get_thread_memory(user_id, "t1")
+        await store.close()
+        return results, memory, store.metrics()
+
+    results, memory, metrics = asyncio.run(run())
+    assert all(isinstance(result, FlusherStopped) for result in results)
+    assert memory["request_summary"] == "after"
+    assert metrics["flusher_restarts"] == 1
@@ -0,0 +1,108 @@
+import asyncio
+import os
+
+import pytest
+
+from agentic_backend.services.backtest_executor import EVENT_MARKER, BacktestExecutor
+
+REPORT = 'print("__JSON_REPORT_START__"); print(\'{"total_return_pct": 1.5}\'); print("__JSON_REPORT_END__")'
+SLOW = "import time; time.sleep(30)"
+
+
+def drain(job):
+    events = []
+    while not job.events.empty():
+        events.append(job.events.get_nowait())
+    return events
+
+
+async def until(condition, timeout=10):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_queue_fifo_and_can_be_cancelled_while_queued_or_running():
+    async def run():
+        executor = BacktestExecutor(max_concurrency=1, warm_workers=False)
+        slow = executor.submit(SLOW)
+        second, third = executor.submit(REPORT), executor.submit(REPORT)
+        assert (slow.position, second.position, third.position) == (0, 1, 2)
+        assert executor.stats()["running"] == 1 and executor.stats()["queued"] == 2
+
+        second.cancel()
+        assert (await second.result())["status"] == "cancelled"
+        assert third.position == 1
+        assert {"job_id": third.id, "type": "queued", "position": 1} in drain(third)
+
+        await until(lambda: slow._process is not None)
+        slow.cancel()
+        assert (await asyncio.wait_for(slow.result(), 5))["status"] == "cancelled"
+
+        result = await asyncio.wait_for(third.result(), 30)
+        await executor.close()
+        return result, drain(third)
+
+    result, events = asyncio.run(run())
+    assert result["status"] == "success"
+    assert result["backtest_results"] == {"total_return_pct": 1.5}
+    assert [e["type"] for e in events] == ["started", "done"]
+
+
+def test_timeout_kills_the_script():
+    async def run():
+        executor = BacktestExecutor(timeout=0.5, warm_workers=False)
+        return await executor.run(SLOW)
+
+    assert asyncio.run(run())["status"] == "timeout"
+
+
+def test_script_events_are_streamed_to_the_job():
+    code = f'print({EVENT_MARKER!r} + \'{{"type": "progress", "pct": 50}}\')\n{REPORT}'
+
+    async def run():
+        executor = BacktestExecutor(warm_workers=False)
+        job = executor.submit(code)
+        await job.result()
+        return drain(job)
+
+    events = asyncio.run(run())
+    assert {"job_id": events[0]["job_id"], "type": "progress", "pct": 50} in events
+
+
+def test_close_cancels_everything():
+    async def run():
+        executor = BacktestExecutor(max_concurrency=1, warm_workers=False)
+        jobs = [executor.submit(SLOW) for _ in range(3)]
+        await until(lambda: jobs[0]._process is not None)
+        await asyncio.wait_for(executor.close(), 5)
+        return [job.status for job in jobs]
+
+    assert asyncio.run(run()) == ["cancelled"] * 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="warm workers need fork")
+def test_warm_worker_runs_jobs_and_is_replaced_after_a_cancel():
+    async def run():
+        executor = BacktestExecutor(max_concurrency=1, preload=())
+        await executor.start()
+        await until(lambda: executor.stats()["workers"]["idle"] == 1)
+        first = await executor.run(REPORT)
+
+        slow = executor.submit(SLOW)
+        await until(lambda: slow.status == "running")
+        await asyncio.sleep(0.2)  # script sent to the worker
+        slow.cancel()
+        cancelled = await asyncio.wait_for(slow.result(), 5)
+        second = await asyncio.wait_for(executor.run(REPORT), 30)
+        stats = executor.stats()
+        await executor.close()
+        return first, cancelled, second, stats
+
+    first, cancelled, second, stats = asyncio.run(run())
+    assert (first["status"], first["startup"]) == ("success", "warm")
+    assert cancelled["status"] == "cancelled"
+    assert second["status"] == "success"
+    assert stats["workers"]["recycled"] == {"cancelled": 1}
+    assert stats["workers"]["spawned"] == 2
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from agentic_backend.models.backtest_models import BacktestRequest
+from agentic_backend.services.backtest_executor import BacktestExecutor
+from agentic_backend.services.backtest_service import BacktestService
+from agentic_backend.services.ohlcv_store import OHLCVStore
+from agentic_backend.services.strategy_cache import StrategyCache, current_window, make_code_key
+
+
+class NoLLM:
+    """OpenAI client stand-in: these requests must never reach code generation."""
+
+    @property
+    def chat(self):
+        raise AssertionError("code generation was called")
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = BacktestService(
+        client=NoLLM(),
+        model="test-model",
+        backtest_executor=BacktestExecutor(warm_workers=False),
+        sweep_executor=BacktestExecutor(warm_workers=False),
+        ohlcv_store=OHLCVStore(str(tmp_path / "ohlcv")),
+        strategy_cache=StrategyCache(str(tmp_path / "strategy_cache.sqlite"), max_bytes=1 << 20, ttl=60),
+        sweep_max_combinations=4,
+    )
+    yield service
+    asyncio.run(service.close())
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+
+    @app.websocket("/ws/backtest")
+    async def websocket_backtest(websocket: WebSocket):
+        await websocket.accept()
+        await service.stream(websocket)
+
+    return TestClient(app)
+
+
+def ws_request(client, data):
+    with client.websocket_connect("/ws/backtest") as websocket:
+        websocket.send_json(data)
+        return websocket.receive_json()
+
+
+def test_ws_sweep_validates_days_like_rest(client):
+    reply = ws_request(client, {"mode": "sweep", "generated_code": "print(1)", "days": 99999,
+                                "param_grid": {"fast": [5, 9]}})
+    assert reply["type"] == "error"
+    assert reply["message"].startswith("Sweep setup failed: days:")
+
+
+def test_ws_sweep_rejects_oversized_grid_before_generating_code(client):
+    reply = ws_request(client, {"mode": "sweep", "strategy_description": "ema cross",
+                                "param_grid": {"fast": [1, 2, 3], "slow": [4, 5]}})
+    assert reply["type"] == "error"
+    assert "Sweep setup failed" in reply["message"]
+
+
+def test_ws_backtest_validates_the_request_model(client):
+    reply = ws_request(client, {"strategy_description": "ema cross", "days": 0})
+    assert reply == {"type": "error", "message": "Invalid request: days: Input should be greater than or equal to 1"}
+
+    reply = ws_request(client, {"ticker": "ETH-USD"})
+    assert reply["type"] == "error"
+    assert "strategy_description: Field required" in reply["message"]
+
+
+def test_ws_backtest_rejects_invalid_spec(client):
+    reply = ws_request(client, {"strategy_description": "ema cross",
+                                "strategy_spec": {"indicators": {"f": {"type": "macd"}}}})
+    assert reply["type"] == "error"
+    assert reply["message"].startswith("Invalid strategy_spec: ")
+
+
+def test_validate_rejects_invalid_spec(service):
+    with pytest.raises(ValueError, match="Invalid strategy_spec"):
+        service.validate(BacktestRequest(strategy_description="x", strategy_spec={"indicators": []}))
+    service.validate(BacktestRequest(strategy_description="x"))
+
+
+def test_cached_report_is_served_on_both_paths(service, client):
+    request = BacktestRequest(strategy_description="EMA cross", ticker="ETH-USD", days=30)
+    key = make_code_key(request.strategy_description, request.ticker, request.days, service.prompt_version)
+    service.strategy_cache.set_code(key, "print('cached')")
+    service.strategy_cache.set_report(key, current_window(), {"total_return_pct": 4.2})
+
+    response = asyncio.run(service.backtest(request))
+    assert (response.status, response.cached, response.code_cached) == ("success", True, True)
+    assert response.backtest_results == {"total_return_pct": 4.2}
+
+    with client.websocket_connect("/ws/backtest") as websocket:
+        websocket.send_json(request.model_dump())
+        messages = [websocket.receive_json() for _ in range(3)]
+    assert [m["type"] for m in messages] == ["status", "code_generated", "backtest_complete"]
+    assert messages[-1]["data"]["cached"] is True
+    assert messages[-1]["data"]["backtest_results"] == {"total_return_pct": 4.2}
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from agentic_backend.services.backtest_executor import BacktestExecutor
+from agentic_backend.services.backtest_sweep import check_rank_by, expand_grid, rank_results, run_sweep
+
+
+def test_expand_grid_lists_and_inclusive_ranges():
+    grid = {"ema_fast": [5, 9], "ema_slow": {"start": 20, "stop": 40, "step": 10}}
+    assert expand_grid(grid, 64) == [
+        {"ema_fast": 5, "ema_slow": 20}, {"ema_fast": 5, "ema_slow": 30}, {"ema_fast": 5, "ema_slow": 40},
+        {"ema_fast": 9, "ema_slow": 20}, {"ema_fast": 9, "ema_slow": 30}, {"ema_fast": 9, "ema_slow": 40},
+    ]
+
+
+def test_float_ranges_do_not_drift():
+    assert expand_grid({"stop_loss": {"start": 0.1, "stop": 0.3, "step": 0.1}}, 64) == [
+        {"stop_loss": 0.1}, {"stop_loss": 0.2}, {"stop_loss": 0.3},
+    ]
+    assert expand_grid({"period": {"start": 10, "stop": 15, "step": 2}}, 64) == [
+        {"period": 10}, {"period": 12}, {"period": 14},
+    ]
+
+
+@pytest.mark.parametrize("grid, message", [
+    ({}, "at least one"),
+    ([5, 9], "at least one"),
+    ({"fast": []}, "must not be empty"),
+    ({"fast": 5}, "list or a start/stop/step"),
+    ({"fast": {"start": 5, "stop": 1}}, "Invalid range"),
+    ({"fast": {"start": 1, "stop": 5, "step": 0}}, "Invalid range"),
+    ({"fast": {"start": "1", "stop": 5}}, "must be numbers"),
+    ({"fast": list(range(5)), "slow": list(range(5))}, "25 combinations"),
+])
+def test_invalid_grids_raise_value_error(grid, message):
+    with pytest.raises(ValueError, match=message):
+        expand_grid(grid, 16)
+
+
+def entry(status, **summary):
+    return {"status": status, "summary": summary or None}
+
+
+def test_rank_results_best_first_failures_last():
+    results = [
+        entry("success", total_return_pct=3.0, max_drawdown=8.0),
+        entry("error"),
+        entry("success", total_return_pct=7.5, max_drawdown=12.0),
+        entry("success", total_return_pct=None, max_drawdown=1.0),
+    ]
+    ranked = rank_results(list(results), "total_return_pct")
+    assert [r["summary"] and r["summary"]["total_return_pct"] for r in ranked] == [7.5, 3.0, None, None]
+    assert [r["rank"] for r in ranked] == [1, 2, 3, 4]
+
+    # Smaller drawdown ranks higher
+    ranked = rank_results(list(results), "max_drawdown")
+    assert [r["summary"] and r["summary"]["max_drawdown"] for r in ranked][:3] == [1.0, 8.0, 12.0]
+    assert ranked[-1]["status"] == "error"
+
+
+def test_rank_by_must_be_a_summary_metric():
+    check_rank_by("sharpe_ratio")
+    with pytest.raises(ValueError, match="rank_by must be one of"):
+        check_rank_by("trades")
+
+
+SCRIPT = '''
+import json
+import backtrader as bt
+
+class Strategy(bt.Strategy):
+    params = (("fast", 0), ("slow", 0))
+
+cerebro = bt.Cerebro()
+cerebro.addstrategy(Strategy)
+params = cerebro.strats[0][0][2]
+if params["slow"] <= params["fast"]:
+    raise SystemExit("slow must be above fast")
+print("__JSON_REPORT_START__")
+print(json.dumps({"summary": {"total_return_pct": params["slow"] - params["fast"]}}))
+print("__JSON_REPORT_END__")
+'''
+
+
+def test_run_sweep_runs_every_combination_and_streams_the_ranking():
+    pytest.importorskip("backtrader")
+    combinations = expand_grid({"fast": [5, 9], "slow": [8, 20]}, 16)
+    updates = []
+
+    async def on_result(entry, ranking):
+        updates.append([r["params"] for r in ranking])
+
+    async def run():
+        executor = BacktestExecutor(max_concurrency=2, warm_workers=False)
+        try:
+            return await asyncio.wait_for(run_sweep(executor, SCRIPT, combinations, on_result=on_result), 60)
+        finally:
+            await executor.close()
+
+    report = asyncio.run(run())
+    assert (report["combinations"], report["succeeded"]) == (4, 3)
+    assert [r["params"] for r in report["results"]] == [
+        {"fast": 5, "slow": 20}, {"fast": 9, "slow": 20}, {"fast": 5, "slow": 8}, {"fast": 9, "slow": 8},
+    ]
+    assert report["results"][-1]["status"] == "error"
+    assert len(updates) == 4 and updates[-1] == [r["params"] for r in report["results"]]
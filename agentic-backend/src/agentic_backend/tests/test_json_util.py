@@ -0,0 +1,66 @@
+import pytest
+
+from agentic_backend.api.streaming import build_stream_message
+from agentic_backend.utils.json_util import apply_json_patch, make_json_patch
+
+STATE = {
+    "query": "analyse ETH",
+    "decisions": [{"agent": "market", "confidence": 0.4}],
+    "agent_states": {"market": {"status": "running"}},
+    "final": None,
+}
+
+CASES = [
+    (STATE, STATE),
+    (STATE, {**STATE, "decisions": STATE["decisions"] + [{"agent": "risk"}, {"agent": "trade"}]}),
+    (STATE, {**STATE, "agent_states": {"market": {"status": "done", "took": 1.5}}}),
+    (STATE, {k: v for k, v in STATE.items() if k != "final"}),
+    (STATE, {**STATE, "decisions": []}),
+    (STATE, {**STATE, "decisions": [{"agent": "market", "confidence": 0.9}]}),
+    ({"a/b": 1, "c~d": [1, 2]}, {"a/b": 2, "c~d": [1, 3], "e/~f": {}}),
+    ([1, [2, 3]], [1, [2, 4], 5]),
+    ({"x": 1}, [1, 2]),
+    ("old", "new"),
+]
+
+
+@pytest.mark.parametrize("old, new", CASES)
+def test_patch_round_trips(old, new):
+    patch = make_json_patch(old, new)
+    assert apply_json_patch(old, patch) == new
+
+
+@pytest.mark.parametrize("old, new", CASES)
+def test_patch_is_valid_rfc6902(old, new):
+    jsonpatch = pytest.importorskip("jsonpatch")
+    assert jsonpatch.apply_patch(old, make_json_patch(old, new)) == new
+
+
+def test_grown_lists_become_appends():
+    new = {**STATE, "decisions": STATE["decisions"] + [{"agent": "risk"}]}
+    assert make_json_patch(STATE, new) == [{"op": "add", "path": "/decisions/-", "value": {"agent": "risk"}}]
+    assert make_json_patch(STATE, STATE) == []
+
+
+def test_keys_are_escaped():
+    assert make_json_patch({}, {"a/b~c": 1}) == [{"op": "add", "path": "/a~1b~0c", "value": 1}]
+
+
+def test_apply_does_not_mutate_the_input():
+    new = {**STATE, "agent_states": {"market": {"status": "done"}}}
+    apply_json_patch(STATE, make_json_patch(STATE, new))
+    assert STATE["agent_states"]["market"]["status"] == "running"
+
+
+def test_delta_stream_sends_the_first_chunk_in_full_then_patches():
+    first, state = build_stream_message("t1", {"market": STATE}, "delta", None)
+    assert first == {"type": "chunk", "thread_id": "t1", "state": {"market": STATE}}
+
+    new = {**STATE, "final": "buy"}
+    delta, state = build_stream_message("t1", {"risk": new}, "delta", state)
+    assert delta == {"type": "delta", "thread_id": "t1", "node": "risk",
+                     "patch": [{"op": "replace", "path": "/final", "value": "buy"}]}
+    assert apply_json_patch(STATE, delta["patch"]) == state == new
+
+    full, _ = build_stream_message("t1", {"risk": new}, "full", state)
+    assert full["type"] == "chunk"
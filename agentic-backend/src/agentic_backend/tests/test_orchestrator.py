@@ -0,0 +1,119 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from agentic_backend.agents import supervisor
+from agentic_backend.models.state_models import AgentState, SupervisorState
+from agentic_backend.services import orchestrator
+
+
+def stub_agent(name, delay):
+    async def node(state: SupervisorState) -> SupervisorState:
+        await asyncio.sleep(delay)
+        state.agent_states.append(AgentState(agent_name=name, agent_input=state.current_task,
+                                             agent_output=f"{name} on {state.current_task}"))
+        state.current_task = None
+        return state
+    return node
+
+
+def stub_supervisor(state: SupervisorState) -> SupervisorState:
+    if not state.decisions:
+        # finance_agent is dispatched first but finishes last
+        state.decisions.append(supervisor.SupervisorDecision(
+            step=1, selected_agent="crypto_price_agent", reasoning="", task="price"))
+        state.decisions.append(supervisor.SupervisorDecision(
+            step=1, selected_agent="news_sentiment_agent", reasoning="", task="news"))
+        state.pending_tasks = [{"agent": "crypto_price_agent", "task": "price"},
+                               {"agent": "news_sentiment_agent", "task": "news"}]
+        state.current_task = "price"
+        return state
+    state.final_output = " | ".join(s.agent_output for s in state.agent_states)
+    state.current_task = None
+    return state
+
+
+@pytest.fixture
+def fanout_graph(monkeypatch):
+    monkeypatch.setattr(orchestrator, "AGENT_NODES", {
+        "finance_agent": stub_agent("finance_agent", 0.2),
+        "websearch_agent": stub_agent("websearch_agent", 0),
+        "sentiment_agent": stub_agent("news_sentiment_agent", 0),
+        "trade_agent": stub_agent("trade_agent", 0),
+    })
+    monkeypatch.setattr(orchestrator, "fanout_supervisor_node", stub_supervisor)
+    monkeypatch.setattr(orchestrator, "_fanout_app", None)
+    yield
+    orchestrator._fanout_app = None
+
+
+async def collect(state):
+    return [chunk async for chunk in orchestrator.run_sync(state, thread_id=uuid.uuid4().hex, fanout=True)]
+
+
+def test_fanout_join_merges_results_in_dispatch_order(fanout_graph):
+    chunks = asyncio.run(collect(SupervisorState(user_query="q", user_detail="u")))
+
+    # Every chunk is {node: full state}, like the sequential graph
+    assert all(len(chunk) == 1 and "user_query" in next(iter(chunk.values())) for chunk in chunks)
+    nodes = [node for chunk in chunks for node in chunk]
+    # Branches are reported as they finish: sentiment_agent first
+    assert nodes == ["supervisor", "sentiment_agent", "finance_agent", "join", "supervisor"]
+
+    final = SupervisorState.model_validate(chunks[-1]["supervisor"])
+    assert [s.agent_name for s in final.agent_states] == ["finance_agent", "news_sentiment_agent"]
+    assert final.context == {"finance_agent_step1": "finance_agent on price",
+                             "news_sentiment_agent_step1": "news_sentiment_agent on news"}
+    assert final.final_output == "finance_agent on price | news_sentiment_agent on news"
+    assert final.branch_results == []
+    step = final.parallel_steps[0]
+    assert step["agents"] == ["finance_agent", "sentiment_agent"]
+    assert step["wall_seconds"] < step["agent_seconds"] + 0.05
+
+
+def test_branch_payload_carries_only_what_agents_read():
+    state = SupervisorState(user_query="q", user_detail="u", context={"a": "1"}, current_task="price",
+                            pending_tasks=[{"agent": "crypto_price_agent", "task": "price"}])
+    state.decisions.append(supervisor.SupervisorDecision(step=3, selected_agent="crypto_price_agent",
+                                                         reasoning="", task="price"))
+    [send] = orchestrator.fanout_router(state)
+    assert send.node == "finance_agent"
+    assert send.arg == {"task": "price", "context": {"a": "1"}, "user_query": "q", "user_detail": "u",
+                        "step": 3, "index": 0, "agent": "finance_agent"}
+
+
+class StubLLM:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return json.dumps(self.reply)
+
+
+def test_trades_dispatched_with_analysis_are_deferred_to_the_next_step(monkeypatch):
+    llm = StubLLM({"dispatch": [
+        {"selected_agent": "crypto_price_agent", "task": "price"},
+        {"selected_agent": "trade_agent", "task": "buy 1 ETH"},
+    ], "reasoning": "analyse then trade"})
+    monkeypatch.setattr(supervisor, "llm", llm)
+    state = SupervisorState(user_query="q", user_detail="u")
+
+    state = supervisor.fanout_supervisor_node(state)
+    assert state.pending_tasks == [{"agent": "crypto_price_agent", "task": "price"}]
+    assert [t["task"] for t in state.deferred_tasks] == ["buy 1 ETH"]
+
+    state.current_task = None
+    state = supervisor.fanout_supervisor_node(state)
+    assert llm.calls == 1
+    assert state.pending_tasks == [{"agent": "trade_agent", "task": "buy 1 ETH"}]
+    assert state.deferred_tasks == []
+    assert [(d.step, d.selected_agent) for d in state.decisions] == [(1, "crypto_price_agent"), (2, "trade_agent")]
+
+
+def test_agent_names_containing_trad_are_not_treated_as_trades():
+    assert supervisor.agent_node_name("trading") == "trade_agent"
+    assert supervisor.agent_node_name("trade_history_agent") == "END"
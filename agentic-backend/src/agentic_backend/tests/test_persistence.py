@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+
+from agentic_backend.services import persistence
+
+
+@pytest.fixture
+def user_id():
+    return f"user-{uuid.uuid4().hex[:8]}"
+
+
+def walk(user_id, limit):
+    pages, cursor = [], None
+    while True:
+        page = persistence.list_user_threads(user_id, limit=limit, cursor=cursor)
+        pages.append([t["thread_id"] for t in page["threads"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_thread_once_even_with_equal_timestamps(user_id, monkeypatch):
+    monkeypatch.setattr(persistence, "_now", lambda: "2025-01-01T12:00:00+00:00")
+    for i in range(7):
+        persistence.update_thread_memory(user_id, f"t{i}", request_summary=f"request {i}")
+
+    pages = walk(user_id, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    # Ties on updated_at are broken by thread_id, descending
+    assert sum(pages, []) == [f"t{i}" for i in reversed(range(7))]
+
+
+def test_most_recently_updated_first_and_last_page_has_no_cursor(user_id, monkeypatch):
+    for i, now in enumerate(["2025-01-01T10:00:00+00:00", "2025-01-01T11:00:00+00:00", "2025-01-01T12:00:00+00:00"]):
+        monkeypatch.setattr(persistence, "_now", lambda now=now: now)
+        persistence.update_thread_memory(user_id, f"t{i}", request_summary="x")
+    monkeypatch.setattr(persistence, "_now", lambda: "2025-01-01T13:00:00+00:00")
+    persistence.update_thread_memory(user_id, "t0", response_summary="bumped")
+
+    page = persistence.list_user_threads(user_id, limit=3)
+    assert [t["thread_id"] for t in page["threads"]] == ["t0", "t2", "t1"]
+    assert page["threads"][0]["last_updated"] == "2025-01-01T13:00:00+00:00"
+    assert page["next_cursor"] is None
+    assert persistence.list_user_threads(f"{user_id}-nobody") == {"threads": [], "next_cursor": None}
+
+
+def test_preview_is_truncated(user_id):
+    persistence.update_thread_memory(user_id, "t1", request_summary="a" * 500)
+    thread = persistence.list_user_threads(user_id, preview_chars=10)["threads"][0]
+    assert thread["request_summary"] == "a" * 10
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", persistence._encode_cursor(1.0, "t")[:-4]])
+def test_invalid_cursor_is_rejected(user_id, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        persistence.list_user_threads(user_id, cursor=cursor)
@@ -0,0 +1,135 @@
+import os
+import uuid
+
+import pytest
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+chromadb = pytest.importorskip("chromadb")
+
+from rag_hybrid import BM25Index, hybrid_search, mark_changed, reciprocal_rank_fusion, tokenize
+
+
+class CountingCollection:
+    """Chroma collection that counts the document reads."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.gets = 0
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def get(self, *args, **kwargs):
+        self.gets += 1
+        return self.collection.get(*args, **kwargs)
+
+
+@pytest.fixture
+def collection():
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"test-{uuid.uuid4().hex[:8]}", metadata={"embed_model": "test"})
+    collection.add(ids=["a", "b"], documents=["clause 4.2.1 applies", "eth-usd is volatile"],
+                   embeddings=[[0.1, 0.2], [0.2, 0.1]])
+    return CountingCollection(collection)
+
+
+def test_sync_reads_documents_only_when_the_collection_changed(collection):
+    index = BM25Index()
+    index.sync(collection)
+    assert len(index) == 2
+    reads = collection.gets
+
+    index.sync(collection)
+    index.sync(collection)
+    assert collection.gets == reads
+
+    # Another process replaced a chunk: same count, new ingest version
+    collection.delete(ids=["b"])
+    collection.add(ids=["c"], documents=["btc dominance"], embeddings=[[0.3, 0.3]])
+    mark_changed(collection)
+    index.sync(collection)
+    assert collection.gets > reads
+    assert [doc_id for doc_id, _ in index.search("btc", 5)] == ["c"]
+    assert index.search("eth-usd", 5) == []
+
+
+def test_sync_rebuilds_when_the_count_changed_without_a_version(collection):
+    index = BM25Index()
+    index.sync(collection)
+    collection.add(ids=["c"], documents=["btc dominance"], embeddings=[[0.3, 0.3]])
+    index.sync(collection)
+    assert len(index) == 3
+
+
+def test_mark_changed_keeps_the_collection_metadata(collection):
+    mark_changed(collection)
+    assert collection.metadata["embed_model"] == "test"
+    version = collection.metadata["ingest_version"]
+    mark_changed(collection)
+    assert collection.metadata["ingest_version"] != version
+
+
+def test_index_kept_in_step_by_ingestion_is_not_rebuilt(collection):
+    index = BM25Index()
+    index.sync(collection)
+    assert index.in_sync(collection)
+    # What rag_ingest.ingest does after writing through the index
+    collection.add(ids=["c"], documents=["btc dominance"], embeddings=[[0.3, 0.3]])
+    index.add(["c"], ["btc dominance"])
+    mark_changed(collection)
+    index.mark_synced(collection)
+    reads = collection.gets
+    index.sync(collection)
+    assert collection.gets == reads
+    assert len(index) == 3
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    assert tokenize("See clause 4.2.1 for ETH-USD.") == ["see", "clause", "4.2.1", "4", "2", "1", "for", "eth-usd", "eth", "usd"]
+
+
+def test_bm25_ranks_exact_tokens_and_tracks_updates():
+    index = BM25Index()
+    index.add(["a", "b", "c"], ["clause 4.2.1 covers margin", "clause 4.3 covers leverage", "eth-usd price"])
+    assert [doc_id for doc_id, _ in index.search("4.2.1", 5)][0] == "a"
+    assert [doc_id for doc_id, _ in index.search("ETH-USD", 5)] == ["c"]
+    assert index.search("unknown", 5) == []
+
+    # Re-adding a chunk replaces its terms
+    index.add(["a"], ["stop loss rules"])
+    assert "a" not in dict(index.search("4.2.1", 5))
+    assert [doc_id for doc_id, _ in index.search("stop loss", 5)] == ["a"]
+    index.remove(["a", "missing"])
+    assert len(index) == 2 and index.search("stop", 5) == []
+
+
+def test_rrf_rewards_agreement_between_rankers():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b"]], rrf_k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "c"]
+    assert dict(fused)["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert dict(fused)["c"] == pytest.approx(1 / 63)
+
+
+def test_hybrid_search_adds_lexical_only_hits(collection):
+    collection.add(ids=["c"], documents=["margin policy overview"], embeddings=[[0.1, 0.21]])
+    index = BM25Index()
+    index.sync(collection)
+
+    # The dense candidates are "a" and "c"; only BM25 finds the ticker in "b"
+    results = hybrid_search(collection, index, "eth-usd", [0.1, 0.2], top_k=2, candidates=2, rrf_k=60)
+    assert [r["id"] for r in results] == ["a", "b"]
+    assert (results[0]["dense_rank"], results[0]["lexical_rank"]) == (1, None)
+    assert (results[1]["dense_rank"], results[1]["lexical_rank"], results[1]["distance"]) == (None, 1, None)
+    assert results[1]["content"] == "eth-usd is volatile"
+
+    dense = hybrid_search(collection, None, "eth-usd", [0.1, 0.2], top_k=2)
+    assert [r["id"] for r in dense] == ["a", "c"]
+    assert all(r["lexical_rank"] is None for r in dense)
+
+
+def test_hybrid_search_skips_chunks_deleted_since_the_last_sync(collection):
+    index = BM25Index()
+    index.sync(collection)
+    collection.delete(ids=["b"])
+    results = hybrid_search(collection, index, "eth-usd", [0.1, 0.2], top_k=2, candidates=2)
+    assert [r["id"] for r in results] == ["a"]
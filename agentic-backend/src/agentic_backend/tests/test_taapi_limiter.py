@@ -0,0 +1,72 @@
+import pytest
+
+import taapi_limiter
+from taapi_limiter import TokenBucket, build_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(taapi_limiter.time, "time", clock.time)
+    return clock
+
+
+def test_burst_up_to_capacity_then_wait_for_refill(tmp_path, clock):
+    bucket = TokenBucket(5, 15.0, str(tmp_path / "bucket.json"))
+    assert [bucket._take() for _ in range(5)] == [0.0] * 5
+    assert bucket._take() == pytest.approx(3.0)  # one token per 3s
+
+    clock.now += 3.0
+    assert bucket._take() == 0.0
+    assert bucket._take() > 0
+
+
+def test_refill_is_capped_at_capacity(tmp_path, clock):
+    bucket = TokenBucket(2, 10.0, str(tmp_path / "bucket.json"))
+    bucket._take()
+    clock.now += 3600
+    assert [bucket._take() for _ in range(2)] == [0.0, 0.0]
+    assert bucket._take() > 0
+
+
+def test_processes_share_the_bucket_through_the_state_file(tmp_path, clock):
+    path = str(tmp_path / "bucket.json")
+    first, second = TokenBucket(2, 10.0, path), TokenBucket(2, 10.0, path)
+    assert first._take() == 0.0
+    assert second._take() == 0.0
+    assert first._take() == pytest.approx(5.0)
+
+
+def test_corrupt_state_starts_a_full_bucket(tmp_path, clock):
+    path = tmp_path / "bucket.json"
+    path.write_text("{not json")
+    assert TokenBucket(1, 15.0, str(path))._take() == 0.0
+
+
+def test_acquire_only_waits_when_empty(tmp_path):
+    bucket = TokenBucket(1, 0.05, str(tmp_path / "bucket.json"))
+    assert bucket.acquire() < 0.01
+    assert bucket.acquire() == pytest.approx(0.05, abs=0.04)
+
+
+@pytest.mark.parametrize("rate, per", [(0, 15.0), (1, 0.0)])
+def test_invalid_quota_is_rejected(tmp_path, rate, per):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, per, str(tmp_path / "bucket.json"))
+
+
+def test_build_limiter_reads_plan_and_overrides(monkeypatch):
+    monkeypatch.setenv("TAAPI_PLAN", "pro")
+    assert build_limiter().capacity == 30
+    monkeypatch.setenv("TAAPI_RATE_LIMIT", "7")
+    monkeypatch.setenv("TAAPI_RATE_WINDOW", "7")
+    limiter = build_limiter()
+    assert (limiter.capacity, limiter.refill_per_second) == (7, 1.0)
@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from agentic_backend.services.vector_backtest import run_vector_backtest, validate_spec
+
+
+def make_spec(**overrides):
+    spec = {
+        "indicators": {"fast": {"type": "ema", "period": 9}, "slow": {"type": "sma", "period": 15}},
+        "entry": {"all": [{"left": "fast", "op": "crosses_above", "right": "slow"}]},
+        "exit": {"any": [{"left": "fast", "op": "crosses_below", "right": "slow"}]},
+        "cash": 10000,
+        "commission": 0.001,
+        "size": 1,
+    }
+    spec.update(overrides)
+    return spec
+
+
+def test_valid_spec_passes():
+    validate_spec(make_spec())
+    validate_spec(make_spec(indicators={"r": {"type": "rsi", "source": "open"}},
+                            entry={"all": [{"left": "r", "op": "<", "right": 30}]},
+                            exit={"all": [{"left": "r", "op": ">", "right": 70}]}))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"indicators": {"fast": {"type": "ema", "source": "hl2"}}}, "source"),
+    ({"indicators": {"f": "ema"}}, "must be an object"),
+    ({"indicators": ["ema"]}, "'indicators'"),
+    ({"indicators": {"fast": {"type": "macd"}}}, "Unsupported indicator type"),
+    ({"indicators": {"fast": {"type": "ema", "period": 0}}}, "period"),
+    ({"indicators": {"close": {"type": "ema"}}}, "shadows a price field"),
+    ({"entry": {"all": ["fast > slow"]}}, "Conditions must be objects"),
+    ({"entry": {"any": {"left": "fast", "op": ">", "right": "slow"}}}, "must be a list"),
+    ({"entry": {"all": [{"left": "fast", "op": "==", "right": "slow"}]}}, "Unsupported operator"),
+    ({"entry": {"all": [{"left": ["fast"], "op": ">", "right": "slow"}]}}, "Unknown operand"),
+    ({"exit": {"all": [{"left": "fast", "op": ">", "right": "medium"}]}}, "Unknown operand"),
+    ({"exit": {}}, "'exit'"),
+    ({"cash": 0}, "'cash'"),
+    ({"cash": "10000"}, "'cash'"),
+    ({"size": -1}, "'size'"),
+    ({"commission": 1.5}, "'commission'"),
+])
+def test_invalid_spec_raises_value_error(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        validate_spec(make_spec(**overrides))
+
+
+def test_spec_must_be_an_object():
+    with pytest.raises(ValueError):
+        validate_spec(["ema"])
+
+
+# ---------- parity with the Backtrader scripts (api/xample.py) ----------
+
+def make_candles(days=400, seed=7):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    opens = np.r_[closes[0], closes[:-1]] * (1 + rng.normal(0, 0.005, days))
+    highs = np.maximum(opens, closes) * 1.01
+    lows = np.minimum(opens, closes) * 0.99
+    ts = 1672531200 + 86400 * np.arange(days)  # daily from 2023-01-01 UTC
+    return np.column_stack([ts, opens, highs, lows, closes, np.full(days, 1000.0)])
+
+
+def run_backtrader(candles, strategy):
+    bt = pytest.importorskip("backtrader")
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame(candles[:, 1:], columns=["Open", "High", "Low", "Close", "Volume"],
+                      index=pd.to_datetime(candles[:, 0], unit="s"))
+
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(strategy(bt))
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.broker.setcash(10000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.SQN, _name="sqn")
+    strat = cerebro.run()[0]
+    trades = strat.analyzers.trades.get_analysis()
+    return {
+        "final_value": cerebro.broker.getvalue(),
+        "sharpe_ratio": strat.analyzers.sharpe.get_analysis().get("sharperatio"),
+        "max_drawdown": strat.analyzers.drawdown.get_analysis().max.drawdown,
+        "total_trades": trades.total.total if "total" in trades else 0,
+        "winning_trades": trades.won.total if "won" in trades else 0,
+        "sqn": strat.analyzers.sqn.get_analysis().sqn,
+    }
+
+
+def ema_cross(bt):
+    class EMACrossStrategy(bt.Strategy):
+        def __init__(self):
+            self.fast = bt.indicators.EMA(self.data.close, period=9)
+            self.slow = bt.indicators.SMA(self.data.close, period=15)
+
+        def next(self):
+            if not self.position and self.fast[0] > self.slow[0] and self.fast[-1] <= self.slow[-1]:
+                self.buy()
+            elif self.position and self.fast[0] < self.slow[0] and self.fast[-1] >= self.slow[-1]:
+                self.sell()
+    return EMACrossStrategy
+
+
+def rsi_bands(bt):
+    class RSIStrategy(bt.Strategy):
+        def __init__(self):
+            self.rsi = bt.indicators.RSI_SMA(self.data.close, period=14)
+
+        def next(self):
+            if not self.position and self.rsi < 40:
+                self.buy()
+            elif self.position and self.rsi > 60:
+                self.sell()
+    return RSIStrategy
+
+
+RSI_SPEC = make_spec(
+    indicators={"r": {"type": "rsi_sma", "period": 14}},
+    entry={"all": [{"left": "r", "op": "<", "right": 40}]},
+    exit={"all": [{"left": "r", "op": ">", "right": 60}]},
+)
+
+
+@pytest.mark.parametrize("spec, strategy", [(make_spec(), ema_cross), (RSI_SPEC, rsi_bands)])
+def test_vectorized_engine_matches_backtrader(spec, strategy):
+    candles = make_candles()
+    expected = run_backtrader(candles, strategy)
+    summary = run_vector_backtest(spec, candles)["summary"]
+
+    assert expected["total_trades"] > 2
+    for key in ("total_trades", "winning_trades"):
+        assert summary[key] == expected[key], key
+    for key in ("final_value", "max_drawdown", "sharpe_ratio", "sqn"):
+        assert summary[key] == pytest.approx(expected[key], rel=1e-6), key
+
+
+def test_orders_fill_at_the_next_open_with_commission():
+    candles = make_candles()
+    report = run_vector_backtest(make_spec(), candles)
+    opens = {datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d"): o for ts, o in candles[:, :2]}
+
+    assert report["trades"]
+    for trade in report["trades"]:
+        entry = opens[trade["Entry Date"]]
+        assert trade["Entry Price"] == round(entry, 4)
+        assert trade["Commission"] == pytest.approx((trade["Entry Price"] + trade["Exit Price"]) * 0.001, abs=0.01)
+
+
+def test_too_few_candles_is_an_error():
+    with pytest.raises(ValueError, match="Not enough candles"):
+        run_vector_backtest(make_spec(), make_candles(days=1))
@@ -0,0 +1,76 @@
+import copy
+from typing import Any, List, Dict
+
+
+def _escape(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_json_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Build an RFC 6902 JSON Patch turning ``old`` into ``new``.
+
+    Dicts are diffed key by key. Lists that only grew (the usual case for
+    decisions / agent_states) become ``add`` ops on ``/-``; lists of the same
+    length are diffed element-wise; anything else is replaced wholesale.
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(make_json_patch(old[key], value, child))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        if len(new) >= len(old) and new[:len(old)] == old:
+            return [{"op": "add", "path": f"{path}/-", "value": v} for v in new[len(old):]]
+        if len(new) == len(old):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                ops.extend(make_json_patch(a, b, f"{path}/{i}"))
+            return ops
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_json_patch(doc: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply a patch produced by make_json_patch() and return the new document."""
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        if op["path"] == "":
+            doc = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(t) for t in op["path"].split("/")[1:]]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+
+        if isinstance(target, list):
+            if op["op"] == "add":
+                if last == "-":
+                    target.append(op["value"])
+                else:
+                    target.insert(int(last), op["value"])
+            elif op["op"] == "remove":
+                del target[int(last)]
+            else:
+                target[int(last)] = op["value"]
+        else:
+            if op["op"] == "remove":
+                del target[last]
+            else:
+                target[last] = op["value"]
+    return doc
@@ -0,0 +1,177 @@
+"""
+Size-capped SQLite LRU cache shared by the indicator, article and strategy
+caches.
+
+The base class owns what they have in common: one WAL connection used under a
+lock (safe across threads and processes), a ``cache_stats`` counter table,
+write transactions that evict least recently used entries once the payload of
+all cache tables exceeds ``max_bytes``, and hit/miss statistics. Subclasses
+declare their tables and keep only their own key and expiry logic.
+
+Every cache table has a key column, ``size`` and ``last_access``; tables
+listed in ``EXPIRING`` also have ``expires_at`` and drop expired rows first.
+
+The caches are owned by the processes that fill them (the MCP servers);
+read_stats() reports on a cache file without the owning object, so the API can
+serve their metrics without importing server modules.
+
+Only depends on the standard library. The MCP servers import it as
+``agentic_backend.utils.sqlite_cache`` (mcp/clients.py puts src/ on their
+PYTHONPATH).
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class SQLiteLRUCache:
+    # table → key column of every table counted towards max_bytes
+    TABLES: Dict[str, str] = {}
+    # tables with an expires_at column
+    EXPIRING: Tuple[str, ...] = ()
+
+    def __init__(self, path: str, max_bytes: int, schema: Iterable[str]):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in schema:
+            self._conn.execute(statement)
+        for table in self.TABLES:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_access ON {table}(last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    # ---------- counters ----------
+
+    def _bump(self, name: str, amount: int = 1):
+        """Increment a counter; call with the lock held."""
+        self._conn.execute(
+            "INSERT INTO cache_stats(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def bump(self, name: str):
+        with self._lock:
+            self._bump(name)
+
+    def _counters(self) -> Dict[str, int]:
+        return dict(self._conn.execute("SELECT name, value FROM cache_stats").fetchall())
+
+    # ---------- reads and writes ----------
+
+    def _get_json(self, table: str, key: str, counter: str = "") -> Optional[Any]:
+        """
+        JSON ``value`` of a row, refreshing its LRU position. Expired rows are
+        deleted and count as misses. Bumps ``{counter}hits`` / ``{counter}misses``.
+        """
+        column = self.TABLES[table]
+        expiring = table in self.EXPIRING
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value{', expires_at' if expiring else ''} FROM {table} WHERE {column} = ?", (key,)
+            ).fetchone()
+            if row is not None and expiring and row[1] <= now:
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+                row = None
+            if row is None:
+                self._bump(f"{counter}misses")
+                return None
+            self._conn.execute(f"UPDATE {table} SET last_access = ? WHERE {column} = ?", (now, key))
+            self._bump(f"{counter}hits")
+        return json.loads(row[0])
+
+    def _put(self, table: str, row: Dict[str, Any]):
+        """Insert or replace ``row`` (last_access is set here), then evict down to max_bytes."""
+        now = time.time()
+        row = {**row, "last_access": now}
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(f"INSERT OR REPLACE INTO {table}({columns}) VALUES ({placeholders})",
+                                   tuple(row.values()))
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float):
+        for table in self.EXPIRING:
+            self._conn.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (now,))
+        total = sum(self._usage(table)[1] for table in self.TABLES)
+        if total <= self.max_bytes:
+            return
+        union = " UNION ALL ".join(
+            f"SELECT '{table}', {column}, size, last_access FROM {table}" for table, column in self.TABLES.items()
+        )
+        evicted = 0
+        for table, key, size, _ in self._conn.execute(f"{union} ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(f"DELETE FROM {table} WHERE {self.TABLES[table]} = ?", (key,))
+            total -= size
+            evicted += 1
+        if evicted:
+            self._bump("evictions", evicted)
+
+    # ---------- stats ----------
+
+    def _usage(self, table: str) -> Tuple[int, int]:
+        """(entries, payload bytes) of a table."""
+        return self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+
+    @staticmethod
+    def _hit_rate(counters: Dict[str, int], counter: str = "") -> Dict[str, Any]:
+        hits, misses = counters.get(f"{counter}hits", 0), counters.get(f"{counter}misses", 0)
+        return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = self._counters()
+            usage = {table: self._usage(table) for table in self.TABLES}
+        return summarize(counters, usage, self.max_bytes)
+
+
+def summarize(counters: Dict[str, int], usage: Dict[str, Tuple[int, int]], max_bytes: int) -> Dict[str, Any]:
+    """
+    Every counter, a hit rate per counter prefix (``hits``, ``score_hits``, ...;
+    ``revalidated`` lookups count as hits), entries and bytes per table.
+    """
+    stats: Dict[str, Any] = {"hits": 0, "misses": 0, "evictions": 0, **counters}
+    prefixes = {name[:-len(suffix)] for name in stats for suffix in ("hits", "misses") if name.endswith(suffix)}
+    for prefix in sorted(prefixes):
+        hits = stats.get(f"{prefix}hits", 0) + stats.get(f"{prefix}revalidated", 0)
+        lookups = hits + stats.get(f"{prefix}misses", 0)
+        stats[f"{prefix}hit_rate"] = hits / lookups if lookups else 0.0
+    stats["tables"] = {table: {"entries": entries, "bytes": size} for table, (entries, size) in usage.items()}
+    stats["bytes"] = sum(size for _, size in usage.values())
+    stats["max_bytes"] = max_bytes
+    return stats
+
+
+def read_stats(path: str, max_bytes: int) -> Dict[str, Any]:
+    """summarize() a cache file opened read-only; an empty report if it doesn't exist yet."""
+    if not os.path.exists(path):
+        return summarize({}, {}, max_bytes)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=10)
+    try:
+        counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'cache_stats'"
+        ).fetchall()]
+        usage = {
+            table: conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+            for table in tables
+        }
+    finally:
+        conn.close()
+    return summarize(counters, usage, max_bytes)